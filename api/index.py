@@ -9,7 +9,7 @@ import json
 import asyncio
 
 from claudesync.configmanager import InMemoryConfigManager
-from claudesync.providers.claude_ai import ClaudeAIProvider
+from claudesync.providers.async_claude_ai import AsyncClaudeAIProvider
 from claudesync.exceptions import ProviderError, ConfigurationError
 
 app = FastAPI(title="ClaudeSync API")
@@ -62,10 +62,10 @@ def get_provider():
         raise HTTPException(status_code=401, detail="Not authenticated")
     return provider
 
-async def stream_chat_response(org_id: str, chat_id: str, message: ChatMessage, provider: ClaudeAIProvider):
+async def stream_chat_response(org_id: str, chat_id: str, message: ChatMessage, provider: AsyncClaudeAIProvider):
     try:
         async def generate():
-            for event in provider.send_message(org_id, chat_id, message.prompt, message.timezone):
+            async for event in provider.send_message(org_id, chat_id, message.prompt, message.timezone):
                 if isinstance(event, dict):
                     yield f"data: {json.dumps(event)}\n\n"
                 else:
@@ -89,7 +89,7 @@ async def login(login_data: LoginRequest):
     global provider
     try:
         config.set("claude_api_url", "https://api.claude.ai/api")
-        provider = ClaudeAIProvider(config)
+        provider = AsyncClaudeAIProvider(config)
         
         expiry = datetime.now(timezone.utc) + timedelta(days=365) if not login_data.expires else \
                 datetime.strptime(login_data.expires, "%a, %d %b %Y %H:%M:%S %Z")
@@ -98,7 +98,7 @@ async def login(login_data: LoginRequest):
         
         # Verify the session key
         try:
-            orgs = provider.get_organizations()
+            orgs = await provider.get_organizations()
             if not orgs:
                 raise HTTPException(status_code=401, detail="Invalid session key")
         except ProviderError:
@@ -113,9 +113,9 @@ async def login(login_data: LoginRequest):
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/organizations")
-async def get_organizations(current_provider: ClaudeAIProvider = Depends(get_provider)):
+async def get_organizations(current_provider: AsyncClaudeAIProvider = Depends(get_provider)):
     try:
-        orgs = current_provider.get_organizations()
+        orgs = await current_provider.get_organizations()
         return orgs
     except ProviderError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -124,10 +124,10 @@ async def get_organizations(current_provider: ClaudeAIProvider = Depends(get_pro
 async def get_projects(
     org_id: str,
     include_archived: bool = False,
-    current_provider: ClaudeAIProvider = Depends(get_provider)
+    current_provider: AsyncClaudeAIProvider = Depends(get_provider)
 ):
     try:
-        projects = current_provider.get_projects(org_id, include_archived)
+        projects = await current_provider.get_projects(org_id, include_archived)
         return projects
     except ProviderError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -136,10 +136,10 @@ async def get_projects(
 async def create_chat(
     org_id: str,
     chat_data: ChatCreate,
-    current_provider: ClaudeAIProvider = Depends(get_provider)
+    current_provider: AsyncClaudeAIProvider = Depends(get_provider)
 ):
     try:
-        chat = current_provider.create_chat(
+        chat = await current_provider.create_chat(
             org_id,
             chat_data.chat_name,
             chat_data.project_uuid
@@ -151,10 +151,10 @@ async def create_chat(
 @app.get("/organizations/{org_id}/chats")
 async def get_chats(
     org_id: str,
-    current_provider: ClaudeAIProvider = Depends(get_provider)
+    current_provider: AsyncClaudeAIProvider = Depends(get_provider)
 ):
     try:
-        chats = current_provider.get_chat_conversations(org_id)
+        chats = await current_provider.get_chat_conversations(org_id)
         return chats
     except ProviderError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -163,11 +163,11 @@ async def get_chats(
 async def quick_chat(
     org_id: str,
     message: ChatMessage,
-    current_provider: ClaudeAIProvider = Depends(get_provider)
+    current_provider: AsyncClaudeAIProvider = Depends(get_provider)
 ):
     try:
         # Create a new chat
-        chat = current_provider.create_chat(org_id)
+        chat = await current_provider.create_chat(org_id)
         if not chat:
             raise HTTPException(status_code=500, detail="Failed to create chat")
         
@@ -182,7 +182,7 @@ async def send_message(
     org_id: str,
     chat_id: str,
     message: ChatMessage,
-    current_provider: ClaudeAIProvider = Depends(get_provider)
+    current_provider: AsyncClaudeAIProvider = Depends(get_provider)
 ):
     return await stream_chat_response(org_id, chat_id, message, current_provider)
 
@@ -7,7 +7,7 @@ import os
 from datetime import datetime, timezone, timedelta
 
 from claudesync.configmanager import InMemoryConfigManager
-from claudesync.providers.claude_ai import ClaudeAIProvider
+from claudesync.providers.async_claude_ai import AsyncClaudeAIProvider
 from claudesync.exceptions import ProviderError
 
 router = APIRouter(prefix="/api", tags=["chat"])
@@ -40,7 +40,7 @@ def initialize_provider():
             expiry = datetime.now(timezone.utc) + timedelta(days=30)
         
         config.set_session_key("claude.ai", session_key, expiry)
-        return ClaudeAIProvider(config)
+        return AsyncClaudeAIProvider(config)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -52,21 +52,21 @@ def get_provider():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/organizations")
-async def get_organizations(provider: ClaudeAIProvider = Depends(get_provider)):
+async def get_organizations(provider: AsyncClaudeAIProvider = Depends(get_provider)):
     """Get list of organizations"""
     try:
-        return provider.get_organizations()
+        return await provider.get_organizations()
     except ProviderError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/organizations/{org_id}/chats")
 async def get_chats(
     org_id: str,
-    provider: ClaudeAIProvider = Depends(get_provider)
+    provider: AsyncClaudeAIProvider = Depends(get_provider)
 ):
     """Get list of chat conversations for an organization"""
     try:
-        return provider.get_chat_conversations(org_id)
+        return await provider.get_chat_conversations(org_id)
     except ProviderError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -74,11 +74,11 @@ async def get_chats(
 async def create_chat(
     org_id: str,
     chat_data: ChatCreate,
-    provider: ClaudeAIProvider = Depends(get_provider)
+    provider: AsyncClaudeAIProvider = Depends(get_provider)
 ):
     """Create a new chat conversation"""
     try:
-        return provider.create_chat(
+        return await provider.create_chat(
             org_id, 
             chat_name=chat_data.chat_name,
             project_uuid=chat_data.project_uuid
@@ -90,11 +90,11 @@ async def create_chat(
 async def get_chat(
     org_id: str,
     chat_id: str,
-    provider: ClaudeAIProvider = Depends(get_provider)
+    provider: AsyncClaudeAIProvider = Depends(get_provider)
 ):
     """Get a specific chat conversation and its messages"""
     try:
-        return provider.get_chat_conversation(org_id, chat_id)
+        return await provider.get_chat_conversation(org_id, chat_id)
     except ProviderError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -102,11 +102,11 @@ async def get_chat(
 async def delete_chats(
     org_id: str,
     chat_ids: List[str],
-    provider: ClaudeAIProvider = Depends(get_provider)
+    provider: AsyncClaudeAIProvider = Depends(get_provider)
 ):
     """Delete one or more chat conversations"""
     try:
-        return provider.delete_chat(org_id, chat_ids)
+        return await provider.delete_chat(org_id, chat_ids)
     except ProviderError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -114,17 +114,17 @@ async def delete_chats(
 async def quick_chat(
     org_id: str,
     message: ChatMessage,
-    provider: ClaudeAIProvider = Depends(get_provider)
+    provider: AsyncClaudeAIProvider = Depends(get_provider)
 ):
     """Start a new chat and send a message in one request"""
     try:
         # Create a new chat
-        chat = provider.create_chat(org_id)
+        chat = await provider.create_chat(org_id)
         chat_id = chat["uuid"]
         
         # Stream the response
         async def message_stream():
-            for event in provider.send_message(org_id, chat_id, message.message, message.timezone):
+            async for event in provider.send_message(org_id, chat_id, message.message, message.timezone):
                 yield f"data: {json.dumps(event)}\n\n"
         
         return StreamingResponse(
@@ -139,12 +139,12 @@ async def send_message(
     org_id: str,
     chat_id: str,
     message: ChatMessage,
-    provider: ClaudeAIProvider = Depends(get_provider)
+    provider: AsyncClaudeAIProvider = Depends(get_provider)
 ):
     """Send a message in an existing chat conversation"""
     try:
         async def message_stream():
-            for event in provider.send_message(
+            async for event in provider.send_message(
                 org_id,
                 chat_id,
                 message.message,
@@ -16,7 +16,11 @@ def ls(config):
     provider = validate_and_get_provider(config, require_project=True)
     active_organization_id = config.get("active_organization_id")
     active_project_id = config.get("active_project_id")
-    files = provider.list_files(active_organization_id, active_project_id)
+    files = list(
+        provider.iter_files(
+            active_organization_id, active_project_id, include_content=False
+        )
+    )
     if not files:
         click.echo("No files found in the active project.")
     else:
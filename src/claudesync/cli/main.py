@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 import click
@@ -8,14 +9,24 @@ import subprocess
 import urllib.request
 from pkg_resources import get_distribution
 
+from concurrent.futures import ThreadPoolExecutor, wait
+from tqdm import tqdm
+
 from claudesync.cli.chat import chat
 from claudesync.configmanager import FileConfigManager, InMemoryConfigManager
+from claudesync.exceptions import ConfigurationError, ProviderError
+from claudesync.manifest import SyncManifest
 from claudesync.syncmanager import SyncManager
 from claudesync.utils import (
     handle_errors,
     validate_and_get_provider,
+    get_changed_files,
+    get_files_at,
+    get_ignore_matcher,
     get_local_files,
+    ProjectIndex,
 )
+from claudesync.watcher import RESCAN, create_watcher, iter_changes
 from .auth import auth
 from .organization import organization
 from .project import project
@@ -111,9 +122,29 @@ def upgrade(ctx):
 @click.option(
     "--uberproject", is_flag=True, help="Include submodules in the parent project sync"
 )
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    help="Show what would be synced, based on the remote state recorded by the last sync",
+)
+@click.option(
+    "--jobs",
+    type=click.IntRange(min=1),
+    help="Number of files to transfer concurrently (defaults to the sync_jobs setting)",
+)
+@click.option(
+    "--since",
+    metavar="GIT_REF",
+    help="Only sync the files changed, added, renamed or deleted since the given git revision",
+)
+@click.option(
+    "--force",
+    is_flag=True,
+    help="Sync even if nothing changed locally since the last sync",
+)
 @click.pass_obj
 @handle_errors
-def push(config, category, uberproject):
+def push(config, category, uberproject, dry_run, jobs, since, force):
     """Synchronize the project files, optionally including submodules in the parent project."""
     provider = validate_and_get_provider(config, require_project=True)
 
@@ -151,43 +182,159 @@ def push(config, category, uberproject):
         click.echo(
             f"Syncing submodule {current_submodule['active_project_name']} [{current_dir}]"
         )
-        sync_submodule(provider, config, current_submodule, category)
+        sync_submodule(
+            provider, config, current_submodule, category, dry_run, jobs, since, force
+        )
     else:
         # Sync main project
-        sync_manager = SyncManager(provider, config, config.get_local_path())
-        remote_files = provider.list_files(active_organization_id, active_project_id)
+        sync_manager = SyncManager(provider, config, config.get_local_path(), jobs=jobs)
+        submodule_sync_managers = make_submodule_sync_managers(
+            provider, config, submodules, jobs, sync_manager.content_cache
+        )
 
-        if uberproject:
-            # Include submodule files in the parent project
-            local_files = get_local_files(
-                config, local_path, category, include_submodules=True
+        index = None
+        if since:
+            local_files, deleted_files = get_sync_files(
+                sync_manager, config, local_path, category, uberproject, since
             )
         else:
-            # Exclude submodule files from the parent project
-            local_files = get_local_files(
-                config, local_path, category, include_submodules=False
+            # A single scan covers the main project and every submodule. Submodule files are
+            # included in the parent project only for an uberproject.
+            index = ProjectIndex.build(
+                config,
+                local_path,
+                category,
+                include_submodules=uberproject,
+                manifest=sync_manager.manifest,
+                submodule_manifests={
+                    submodule["relative_path"]: submodule_sync_manager.manifest
+                    for submodule, submodule_sync_manager in zip(
+                        submodules, submodule_sync_managers
+                    )
+                },
+                content_cache=sync_manager.content_cache,
             )
+            local_files, deleted_files = index.files, None
 
-        sync_manager.sync(local_files, remote_files)
-        click.echo(
-            f"Main project '{active_project_name}' synced successfully: https://claude.ai/project/{active_project_id}"
-        )
+        if dry_run:
+            echo_sync_preview(
+                sync_manager, local_files, active_project_name, deleted_files
+            )
+        elif not force and sync_manager.is_up_to_date():
+            click.echo(
+                f"Main project '{active_project_name}' is up to date, nothing to do."
+            )
+            sync_manager.manifest.save()
+        else:
+            remote_files = sync_manager.fetch_remote_files()
+            sync_manager.sync(local_files, remote_files, deleted_files)
+            if sync_manager.failures:
+                click.echo(
+                    f"Main project '{active_project_name}' synced with errors: https://claude.ai/project/{active_project_id}"
+                )
+                echo_sync_failures(sync_manager)
+            else:
+                click.echo(
+                    f"Main project '{active_project_name}' synced successfully: https://claude.ai/project/{active_project_id}"
+                )
 
         # Always sync submodules to their respective projects
-        for submodule in submodules:
-            sync_submodule(provider, config, submodule, category)
+        if dry_run:
+            for submodule, submodule_sync_manager in zip(
+                submodules, submodule_sync_managers
+            ):
+                submodule_files, deleted_files = get_submodule_files(
+                    submodule_sync_manager, config, submodule, category, since, index
+                )
+                echo_sync_preview(
+                    submodule_sync_manager,
+                    submodule_files,
+                    submodule["active_project_name"],
+                    deleted_files,
+                )
+        elif submodules:
+            sync_submodules(
+                config,
+                submodules,
+                submodule_sync_managers,
+                category,
+                since,
+                index,
+                force,
+            )
+
+
+def get_sync_files(
+    sync_manager, config, local_path, category, include_submodules, since
+):
+    """
+    Collects the local files to sync: all of them, or with `since` only the git change set.
+
+    Returns:
+        tuple: (local_files, deleted_files), `deleted_files` being None for a full sync.
+    """
+    if since and sync_manager.compression_algorithm != "none":
+        click.echo("--since is not supported with compression, syncing all files.")
+        since = None
+    if since:
+        return get_changed_files(
+            config,
+            local_path,
+            since,
+            category,
+            include_submodules=include_submodules,
+            manifest=sync_manager.manifest,
+            content_cache=sync_manager.content_cache,
+        )
+    local_files = get_local_files(
+        config,
+        local_path,
+        category,
+        include_submodules=include_submodules,
+        manifest=sync_manager.manifest,
+        content_cache=sync_manager.content_cache,
+    )
+    return local_files, None
+
+
+def echo_sync_failures(sync_manager):
+    click.echo(f"{len(sync_manager.failures)} file(s) could not be synced:")
+    for action, error in sync_manager.failures:
+        click.echo(f"  - {action.action_type.value} {action.file_name}: {str(error)}")
 
 
-def sync_submodule(provider, config, submodule, category):
+def echo_sync_preview(sync_manager, local_files, project_name, deleted_files=None):
+    click.echo(
+        f"Planned changes for '{project_name}' (remote state as of the last sync):"
+    )
+    if sync_manager.compression_algorithm != "none":
+        click.echo(
+            f"  pack     {len(local_files)} files "
+            f"({sync_manager.compression_algorithm} compression)"
+        )
+    else:
+        for line in sync_manager.preview(local_files, deleted_files).describe():
+            click.echo(line)
+    sync_manager.manifest.save()
+
+
+def make_submodule_sync_manager(
+    provider,
+    config,
+    submodule,
+    jobs=None,
+    base_config=None,
+    content_cache=None,
+):
     submodule_path = Path(config.get_local_path()) / submodule["relative_path"]
-    submodule_files = get_local_files(config, str(submodule_path), category)
-    remote_submodule_files = provider.list_files(
-        submodule["active_organization_id"], submodule["active_project_id"]
+    manifest = SyncManifest.for_project(
+        config.get_local_path(), submodule["active_project_id"]
     )
 
-    # Create a new ConfigManager instance for the submodule
+    # Create a new ConfigManager instance for the submodule, copied from `base_config` when several
+    # submodules are synced so the file config is only read once
     submodule_config = InMemoryConfigManager()
-    submodule_config.load_from_file_config(config)
+    submodule_config.load_from_file_config(base_config or config)
     submodule_config.set(
         "active_project_id", submodule["active_project_id"], local=True
     )
@@ -196,15 +343,328 @@ def sync_submodule(provider, config, submodule, category):
     )
 
     # Create a new SyncManager for the submodule
-    submodule_sync_manager = SyncManager(
-        provider, submodule_config, str(submodule_path)
+    return SyncManager(
+        provider,
+        submodule_config,
+        str(submodule_path),
+        manifest=manifest,
+        jobs=jobs,
+        content_cache=content_cache,
     )
 
-    submodule_sync_manager.sync(submodule_files, remote_submodule_files)
-    click.echo(
-        f"Submodule '{submodule['active_project_name']}' synced successfully: "
-        f"https://claude.ai/project/{submodule['active_project_id']}"
+
+def make_submodule_sync_managers(
+    provider, config, submodules, jobs=None, content_cache=None
+):
+    base_config = InMemoryConfigManager()
+    base_config.load_from_file_config(config)
+    return [
+        make_submodule_sync_manager(
+            provider,
+            config,
+            submodule,
+            jobs,
+            base_config=base_config,
+            content_cache=content_cache,
+        )
+        for submodule in submodules
+    ]
+
+
+def sync_submodule(
+    provider,
+    config,
+    submodule,
+    category,
+    dry_run=False,
+    jobs=None,
+    since=None,
+    force=False,
+):
+    submodule_sync_manager = make_submodule_sync_manager(
+        provider, config, submodule, jobs
+    )
+    if not dry_run:
+        echo_submodule_result(
+            submodule,
+            *push_submodule(
+                submodule_sync_manager,
+                config,
+                submodule,
+                category,
+                since,
+                force=force,
+            ),
+        )
+        return
+
+    submodule_files, deleted_files = get_sync_files(
+        submodule_sync_manager,
+        config,
+        submodule_sync_manager.local_path,
+        category,
+        False,
+        since,
+    )
+    echo_sync_preview(
+        submodule_sync_manager,
+        submodule_files,
+        submodule["active_project_name"],
+        deleted_files,
+    )
+
+
+def sync_submodules(
+    config, submodules, sync_managers, category, since=None, index=None, force=False
+):
+    """
+    Syncs submodules to their projects concurrently, `submodule_jobs` at a time.
+
+    Listing and syncing a submodule runs as one task, so the remote listings of the submodules are
+    fetched while others are being synced. All tasks share the provider, and with it the rate limiter
+    and connection pool, as well as one progress bar. The results are reported once every submodule
+    is done.
+    """
+    with tqdm(
+        total=0, desc=f"Local → Remote ({len(submodules)} submodules)"
+    ) as progress:
+        for sync_manager in sync_managers:
+            sync_manager.progress = progress
+        with ThreadPoolExecutor(
+            max_workers=max(1, config.get("submodule_jobs", 4))
+        ) as executor:
+            futures = [
+                executor.submit(
+                    push_submodule,
+                    sync_manager,
+                    config,
+                    submodule,
+                    category,
+                    since,
+                    index,
+                    force,
+                )
+                for submodule, sync_manager in zip(submodules, sync_managers)
+            ]
+            wait(futures)
+
+    for submodule, future in zip(submodules, futures):
+        try:
+            sync_manager, up_to_date = future.result()
+        except (ConfigurationError, ProviderError, OSError) as e:
+            click.echo(
+                f"Submodule '{submodule['active_project_name']}' could not be synced: {str(e)}"
+            )
+            continue
+        echo_submodule_result(submodule, sync_manager, up_to_date)
+
+
+def get_submodule_files(sync_manager, config, submodule, category, since, index=None):
+    """Returns the files of a submodule, from the project's `ProjectIndex` if there is one."""
+    if index is not None:
+        return index.submodule_files[submodule["relative_path"]], None
+    return get_sync_files(
+        sync_manager, config, sync_manager.local_path, category, False, since
+    )
+
+
+def push_submodule(
+    sync_manager, config, submodule, category, since=None, index=None, force=False
+):
+    submodule_files, deleted_files = get_submodule_files(
+        sync_manager, config, submodule, category, since, index
+    )
+    if not force and sync_manager.is_up_to_date():
+        sync_manager.manifest.save()
+        return sync_manager, True
+    remote_files = sync_manager.fetch_remote_files()
+    sync_manager.sync(submodule_files, remote_files, deleted_files)
+    return sync_manager, False
+
+
+def echo_submodule_result(submodule, sync_manager, up_to_date=False):
+    if up_to_date:
+        click.echo(
+            f"Submodule '{submodule['active_project_name']}' is up to date, nothing to do."
+        )
+    elif sync_manager.failures:
+        click.echo(
+            f"Submodule '{submodule['active_project_name']}' synced with errors: "
+            f"https://claude.ai/project/{submodule['active_project_id']}"
+        )
+        echo_sync_failures(sync_manager)
+    else:
+        click.echo(
+            f"Submodule '{submodule['active_project_name']}' synced successfully: "
+            f"https://claude.ai/project/{submodule['active_project_id']}"
+        )
+
+
+@cli.command()
+@click.option("--category", help="Specify the file category to sync")
+@click.option(
+    "--poll",
+    is_flag=True,
+    help="Poll the file system for changes instead of using inotify",
+)
+@click.option(
+    "--debounce",
+    type=click.FloatRange(min=0),
+    help="Seconds without further changes before pushing (defaults to the watch_debounce setting)",
+)
+@click.option(
+    "--jobs",
+    type=click.IntRange(min=1),
+    help="Number of files to transfer concurrently (defaults to the sync_jobs setting)",
+)
+@click.pass_obj
+@handle_errors
+def watch(config, category, poll, debounce, jobs):
+    """Keep pushing local changes to the project and its submodules as files change."""
+    provider = validate_and_get_provider(config, require_project=True)
+
+    if not category:
+        category = config.get_default_category()
+        if category:
+            click.echo(f"Using default category: {category}")
+
+    local_path = config.get_local_path()
+    if not local_path:
+        click.echo(
+            "No .claudesync directory found in this directory or any parent directories. "
+            "Please run 'claudesync project create' or 'claudesync project set' first."
+        )
+        return
+
+    # The provider, its session and every SyncManager are kept for the whole session.
+    targets = [
+        WatchTarget(
+            "",
+            SyncManager(provider, config, local_path, jobs=jobs),
+            f"Main project '{config.get('active_project_name')}'",
+        )
+    ]
+    for submodule in config.get("submodules", []):
+        targets.append(
+            WatchTarget(
+                submodule["relative_path"],
+                make_submodule_sync_manager(provider, config, submodule, jobs),
+                f"Submodule '{submodule['active_project_name']}'",
+            )
+        )
+    for target in targets:
+        target.push(config, category)
+
+    watcher = create_watcher(
+        local_path,
+        get_ignore_matcher(config, local_path, include_submodules=True).is_ignored_dir,
+        poll=poll,
+        poll_interval=config.get("watch_poll_interval", 2.0),
     )
+    click.echo(f"Watching {local_path} for changes, press Ctrl+C to stop.")
+    try:
+        for changes in iter_changes(
+            watcher,
+            debounce if debounce is not None else config.get("watch_debounce", 1.0),
+            config.get("watch_max_delay", 10.0),
+        ):
+            for target, paths in route_changes(targets, changes).items():
+                target.push(config, category, paths)
+    except KeyboardInterrupt:
+        click.echo("Stopped watching.")
+    finally:
+        watcher.close()
+
+
+class WatchTarget:
+    """A project kept in sync by `watch`: the main project or a submodule."""
+
+    def __init__(self, relative_path, sync_manager, label):
+        self.relative_path = relative_path
+        self.sync_manager = sync_manager
+        self.label = label
+        # Whether the remote snapshot in the manifest is known to match the remote project.
+        self.remote_known = False
+
+    def push(self, config, category, paths=None):
+        """Pushes the given paths, relative to the project root, or the whole project."""
+        sync_manager = self.sync_manager
+        if (
+            paths is None
+            or RESCAN in paths
+            or sync_manager.compression_algorithm != "none"
+        ):
+            local_files = get_local_files(
+                config,
+                sync_manager.local_path,
+                category,
+                manifest=sync_manager.manifest,
+                content_cache=sync_manager.content_cache,
+            )
+            deleted_files = None
+            # Only this session's pushes changed the remote project since it was last listed.
+            if self.remote_known and sync_manager.is_up_to_date(check_remote=False):
+                return
+        else:
+            local_files, deleted_files = get_files_at(
+                config,
+                sync_manager.local_path,
+                paths,
+                category,
+                manifest=sync_manager.manifest,
+                content_cache=sync_manager.content_cache,
+            )
+            if not local_files and not deleted_files:
+                sync_manager.manifest.save()
+                return
+
+        if self.remote_known:
+            # Nothing but this session changed the remote project since the last push.
+            remote_files = sync_manager.manifest.remote_snapshot()
+        else:
+            remote_files = sync_manager.fetch_remote_files()
+        sync_manager.sync(local_files, remote_files, deleted_files)
+        self.remote_known = not sync_manager.failures
+        if sync_manager.failures:
+            click.echo(f"{self.label} synced with errors:")
+            echo_sync_failures(sync_manager)
+        elif deleted_files is None:
+            click.echo(f"{self.label} synced {len(local_files)} file(s).")
+        else:
+            click.echo(
+                f"{self.label} synced {len(local_files)} changed and "
+                f"{len(deleted_files)} deleted file(s)."
+            )
+
+
+def route_changes(targets, changes):
+    """
+    Assigns changed paths to the project they belong to, the submodule with the longest matching
+    path or else the main project.
+
+    Returns:
+        dict: Targets mapped to sets of paths relative to their root. The set contains `RESCAN` when
+              the whole project has to be synced.
+    """
+    by_target = {}
+    for rel_path in changes:
+        if rel_path == RESCAN:
+            for target in targets:
+                by_target.setdefault(target, set()).add(RESCAN)
+            continue
+        target = max(
+            (
+                t
+                for t in targets
+                if not t.relative_path
+                or rel_path == t.relative_path
+                or rel_path.startswith(os.path.join(t.relative_path, ""))
+            ),
+            key=lambda t: len(t.relative_path),
+        )
+        path = os.path.relpath(rel_path, target.relative_path or os.curdir)
+        by_target.setdefault(target, set()).add(RESCAN if path == os.curdir else path)
+    return by_target
 
 
 cli.add_command(auth)
@@ -8,7 +8,6 @@ from ..utils import handle_errors, validate_and_get_provider
 from ..exceptions import ProviderError, ConfigurationError
 from .file import file
 from .submodule import submodule
-from ..syncmanager import retry_on_403
 
 logger = logging.getLogger(__name__)
 
@@ -318,10 +317,11 @@ def truncate(config, include_archived, yes):
     click.echo("All files have been deleted from all projects.")
 
 
-@retry_on_403()
 def delete_files_from_project(provider, organization_id, project_id, project_name):
     try:
-        files = provider.list_files(organization_id, project_id)
+        files = list(
+            provider.iter_files(organization_id, project_id, include_content=False)
+        )
         with tqdm(
             total=len(files), desc=f"Deleting files from {project_name}", leave=False
         ) as file_pbar:
@@ -30,7 +30,7 @@ def ls(config):
         return
 
     submodule_detect_filenames = config.get("submodule_detect_filenames", [])
-    submodules = detect_submodules(local_path, submodule_detect_filenames)
+    submodules = detect_submodules(local_path, submodule_detect_filenames, config)
 
     if not submodules:
         click.echo("No submodules detected in the current project.")
@@ -59,7 +59,9 @@ def create(config):
         return
 
     submodule_detect_filenames = config.get("submodule_detect_filenames", [])
-    submodules_with_files = detect_submodules(local_path, submodule_detect_filenames)
+    submodules_with_files = detect_submodules(
+        local_path, submodule_detect_filenames, config
+    )
 
     if not submodules_with_files:
         click.echo("No submodules detected in the current project.")
@@ -1,67 +1,731 @@
 import json
+import logging
 import zlib
 import bz2
 import lzma
 import base64
 import brotli
+import codecs
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
 import os
-import io
+import hashlib
 import heapq
+import tempfile
+import time
+
+logger = logging.getLogger(__name__)
+
+PACK_FILE_PREFIX = "claudesync_pack_"
+# Single-pack files written by earlier versions, replaced by chunks on the next sync.
+LEGACY_PACK_FILE_PREFIX = "claudesync_packed_"
+
+
+def is_pack_file(file_name):
+    return file_name.startswith((PACK_FILE_PREFIX, LEGACY_PACK_FILE_PREFIX))
+
+
+def pack_file_name(packed_content, algorithm):
+    """Names a chunk after its content, given as a string or in pieces, so an unchanged chunk keeps
+    its remote doc."""
+    if isinstance(packed_content, str):
+        packed_content = [packed_content]
+    digest = hashlib.md5(f"{algorithm}\0".encode("utf-8"))
+    for piece in packed_content:
+        digest.update(piece.encode("utf-8"))
+    return f"{PACK_FILE_PREFIX}{digest.hexdigest()}.dat"
+
+
+PACK_MAGIC = "CLAUDESYNC-PACK/1"
+
+# Memory the streaming functions may use for their output before it spills to a temporary file.
+DEFAULT_MEMORY_LIMIT = 8 * 1024 * 1024
+# Characters or bytes handed to a codec at once; a multiple of 4 so base64 blocks decode alone.
+_BLOCK_SIZE = 64 * 1024
+
+# Called with a level, None for the default one.
+_STREAM_COMPRESSORS = {
+    "zlib": lambda level: zlib.compressobj(-1 if level is None else level),
+    "bz2": lambda level: bz2.BZ2Compressor(9 if level is None else level),
+    "lzma": lambda level: lzma.LZMACompressor(preset=level),
+    "brotli": lambda level: brotli.Compressor(quality=11 if level is None else level),
+}
+_STREAM_DECOMPRESSORS = {
+    "zlib": zlib.decompressobj,
+    "bz2": bz2.BZ2Decompressor,
+    "lzma": lzma.LZMADecompressor,
+    "brotli": brotli.Decompressor,
+}
+# Algorithms that only work on the whole content at once.
+_BUFFERED_ALGORITHMS = frozenset({"dictionary", "rle", "huffman", "lzw"})
+
+BLOCK_MAGIC = "CLAUDESYNC-BLOCKS/1"
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+
+# Starts compressed packs, followed by the algorithm they were compressed with, so that a pack
+# uploaded with other settings is decompressed correctly.
+CODEC_MAGIC = "CLAUDESYNC-CODEC/1"
+
+
+def split_chunks(entries, chunk_size=256 * 1024):
+    """
+    Groups files into chunks whose boundaries depend only on the files themselves.
+
+    Files are taken in order, and a chunk ends after a file with a probability proportional to its
+    size, decided by a hash of its path, so that on average a chunk holds `chunk_size` characters.
+    A chunk also ends once it reaches four times `chunk_size`.
+
+    Editing a file without changing its length only changes the chunk holding it. A change of length
+    can add or remove the boundary after the file, merging its chunk with the next one or splitting
+    it, and can move the boundaries set by the size cap up to the next boundary set by a path hash.
+    Adding or removing a file affects its neighbours the same way.
+
+    Args:
+        entries (iterable): (file_path, content, file_hash) tuples in path order.
+        chunk_size (int, optional): Average chunk size, in characters.
+
+    Yields:
+        list: The entries of each chunk.
+    """
+    chunk, size = [], 0
+    for entry in entries:
+        file_path, content = entry[0], entry[1]
+        chunk.append(entry)
+        size += len(content)
+        threshold = int(hashlib.md5(file_path.encode("utf-8")).hexdigest()[:8], 16)
+        if threshold < len(content) * 2**32 / chunk_size or size >= 4 * chunk_size:
+            yield chunk
+            chunk, size = [], 0
+    if chunk:
+        yield chunk
+
+
+def pack_index(entries):
+    """
+    Returns the pack index of files, see `iter_pack`.
+
+    Args:
+        entries (iterable): (file_path, content, file_hash) tuples. A None hash is computed.
+
+    Returns:
+        list: (file_path, length, file_hash) tuples.
+    """
+    return [
+        (
+            file_path,
+            len(content),
+            file_hash or hashlib.md5(content.encode("utf-8")).hexdigest(),
+        )
+        for file_path, content, file_hash in entries
+    ]
+
+
+def iter_pack(index, read):
+    """
+    Yields a pack in pieces, reading the content of each file only once it is reached.
+
+    The pack starts with a header line holding `PACK_MAGIC` and the length of the index, followed by
+    the index, a JSON list of [file_path, offset, length, file_hash] entries, and then the file
+    contents back to back. Offsets are counted in characters from the end of the index, so any file
+    can be read without scanning the others, and contents are stored verbatim.
+
+    Args:
+        index (list): (file_path, length, file_hash) tuples, see `pack_index`.
+        read (callable): Called with a file path, returns the content of the file.
+
+    Yields:
+        str: The header and index, then the content of each file.
+
+    Raises:
+        ValueError: If the length of a file is not the one in the index, e.g. because the file
+                    changed in the meantime.
+    """
+    entries, offset = [], 0
+    for file_path, length, file_hash in index:
+        entries.append([file_path, offset, length, file_hash])
+        offset += length
+    entries = json.dumps(entries, separators=(",", ":"))
+    yield f"{PACK_MAGIC} {len(entries)}\n{entries}"
+    for file_path, length, _ in index:
+        content = read(file_path)
+        if len(content) != length:
+            raise ValueError(f"{file_path} changed while it was being packed")
+        yield content
+
+
+def pack_files(entries):
+    """
+    Packs files into a single string, see `iter_pack`.
+
+    Args:
+        entries (iterable): (file_path, content, file_hash) tuples. A None hash is computed.
+
+    Returns:
+        str: The pack.
+    """
+    entries = list(entries)
+    contents = {file_path: content for file_path, content, _ in entries}
+    return "".join(iter_pack(pack_index(entries), contents.__getitem__))
+
+
+class Pack:
+    """
+    Random access to the files of a pack, see `pack_files`.
+
+    Packs written by earlier versions, with "--- BEGIN FILE ---" markers, are read too.
+    """
+
+    def __init__(self, packed_content):
+        if not packed_content.startswith(PACK_MAGIC + " "):
+            packed_content = pack_files(_read_legacy_pack(packed_content))
+        self._content = packed_content
+        header_end = packed_content.index("\n")
+        body = header_end + 1 + int(packed_content[len(PACK_MAGIC) + 1 : header_end])
+        self._entries = {
+            file_path: (body + offset, length, file_hash)
+            for file_path, offset, length, file_hash in json.loads(
+                packed_content[header_end + 1 : body]
+            )
+        }
 
+    def __iter__(self):
+        """Yields the (file_path, content, file_hash) tuples of the files in the pack."""
+        for file_path in self._entries:
+            yield file_path, self.read(file_path), self.hash(file_path)
 
-def compress_files(local_path, local_files, algorithm):
-    packed_content = _pack_files(local_path, local_files)
-    return compress_content(packed_content, algorithm)
-
-
-def decompress_files(local_path, compressed_content, algorithm):
-    decompressed_content = decompress_content(compressed_content, algorithm)
-    _unpack_files(local_path, decompressed_content)
+    def __len__(self):
+        return len(self._entries)
 
+    def paths(self):
+        return list(self._entries)
 
-def _pack_files(local_path, local_files):
-    packed_content = io.StringIO()
-    for file_path, file_hash in local_files.items():
-        full_path = os.path.join(local_path, file_path)
-        with open(full_path, "r", encoding="utf-8") as f:
-            content = f.read()
-        packed_content.write(f"--- BEGIN FILE: {file_path} ---\n")
-        packed_content.write(content)
-        packed_content.write(f"\n--- END FILE: {file_path} ---\n")
-    return packed_content.getvalue()
+    def hash(self, file_path):
+        return self._entries[file_path][2]
 
+    def read(self, file_path):
+        """Returns the content of a file, raising KeyError if it is not in the pack."""
+        start, length, _ = self._entries[file_path]
+        return self._content[start : start + length]
 
-def _unpack_files(local_path, decompressed_content):
-    current_file = None
-    current_content = io.StringIO()
 
-    for line in decompressed_content.splitlines():
+def _read_legacy_pack(packed_content):
+    files = []
+    current_file, current_content = None, []
+    for line in packed_content.splitlines():
         if line.startswith("--- BEGIN FILE:"):
             if current_file:
-                _write_file(local_path, current_file, current_content.getvalue())
-                current_content = io.StringIO()
-            current_file = line.split("--- BEGIN FILE:")[1].strip()
+                files.append((current_file, "".join(current_content), None))
+            current_file = line[len("--- BEGIN FILE:") :].rsplit(" ---", 1)[0].strip()
+            current_content = []
         elif line.startswith("--- END FILE:"):
             if current_file:
-                _write_file(local_path, current_file, current_content.getvalue())
-                current_file = None
-                current_content = io.StringIO()
+                files.append((current_file, "".join(current_content), None))
+            current_file, current_content = None, []
         else:
-            current_content.write(line + "\n")
-
+            current_content.append(line + "\n")
     if current_file:
-        _write_file(local_path, current_file, current_content.getvalue())
+        files.append((current_file, "".join(current_content), None))
+    return files
+
+
+def compress_files(
+    local_path, local_files, algorithm, memory_limit=DEFAULT_MEMORY_LIMIT
+):
+    """
+    Packs and compresses files without holding their contents in memory together.
+
+    Every file is read twice, once to index it and once to pack it, so that only one file is in
+    memory at a time.
+
+    Args:
+        local_path (str): The project root.
+        local_files (dict): Relative paths mapped to the hashes of the files, or None.
+        algorithm (str): The compression algorithm.
+        memory_limit (int, optional): See `compress_stream`.
+
+    Returns:
+        SpooledTemporaryFile: The compressed pack, see `compress_stream`.
+    """
+
+    def read(file_path):
+        with open(os.path.join(local_path, file_path), "r", encoding="utf-8") as f:
+            return f.read()
+
+    index = [
+        pack_index([(file_path, read(file_path), file_hash)])[0]
+        for file_path, file_hash in local_files.items()
+    ]
+    return compress_stream(
+        iter_pack(index, read), algorithm, memory_limit, record_algorithm=True
+    )
+
+
+def decompress_files(
+    local_path, compressed_content, algorithm, local_files=None, executor=None
+):
+    """
+    Decompresses a pack and writes its files that differ from the local copies, streaming the pack
+    from the compressed content to the files.
+
+    Args:
+        local_path (str): The project root.
+        compressed_content (str or file): The compressed pack, see `decompress_stream`.
+        algorithm (str): The compression algorithm, if the pack does not record it.
+        local_files (dict, optional): See `unpack_stream`.
+        executor (Executor, optional): See `decompress_stream`.
+
+    Returns:
+        list: The relative paths of the files written.
+    """
+    return unpack_stream(
+        local_path,
+        decompress_stream(compressed_content, algorithm, executor),
+        local_files,
+    )
+
+
+def unpack_files(local_path, packed_content, local_files=None, paths=None):
+    """Writes the files of a pack that differ from the local copies, see `unpack_stream`."""
+    return unpack_stream(local_path, [packed_content], local_files, paths)
+
+
+def unpack_stream(local_path, pieces, local_files=None, paths=None):
+    """
+    Writes the files of a pack that differ from the local copies.
+
+    The pack is read sequentially and each file is written as its content arrives, so neither the
+    pack nor a whole file has to be in memory. Packs in the format of earlier versions are read into
+    memory first.
+
+    Args:
+        local_path (str): The project root.
+        pieces (iterable): The pack in pieces of text.
+        local_files (dict, optional): Relative paths mapped to the hashes of the local files. Files
+                                      with the hash recorded in the pack are skipped; without it,
+                                      the hashes of the local files are computed.
+        paths (iterable, optional): The files to extract, all files by default.
+
+    Returns:
+        list: The relative paths of the files written.
+
+    Raises:
+        ValueError: If the pack is truncated.
+    """
+    stream = _TextStream(pieces)
+    header = stream.readline()
+    if not header.startswith(PACK_MAGIC + " "):
+        stream = _TextStream(
+            [pack_files(_read_legacy_pack(header + "".join(stream.iter_read())))]
+        )
+        header = stream.readline()
+    index = json.loads("".join(stream.iter_read(int(header[len(PACK_MAGIC) + 1 :]))))
+
+    wanted = None if paths is None else set(paths)
+    written = []
+    for file_path, _, length, file_hash in index:
+        if wanted is None or file_path in wanted:
+            if local_files is not None:
+                local_hash = local_files.get(file_path)
+            else:
+                local_hash = _file_hash(local_path, file_path)
+            if local_hash != file_hash:
+                _write_file(local_path, file_path, stream.iter_read(length))
+                written.append(file_path)
+                continue
+        for _ in stream.iter_read(length):
+            pass
+    return written
+
+
+class _TextStream:
+    # Reads text given in pieces of any size.
+
+    def __init__(self, pieces):
+        self._pieces = iter(pieces)
+        self._buffer = ""
+
+    def readline(self):
+        """Returns the text up to the next newline, without it."""
+        while "\n" not in self._buffer:
+            piece = next(self._pieces, None)
+            if piece is None:
+                line, self._buffer = self._buffer, ""
+                return line
+            self._buffer += piece
+        line, self._buffer = self._buffer.split("\n", 1)
+        return line
+
+    def iter_read(self, length=None):
+        """Yields the next `length` characters, all remaining text if None, in pieces."""
+        while length is None or length > 0:
+            if not self._buffer:
+                self._buffer = next(self._pieces, None)
+                if self._buffer is None:
+                    self._buffer = ""
+                    if length is None:
+                        return
+                    raise ValueError("The pack is truncated")
+            size = len(self._buffer) if length is None else length
+            size = min(size, _BLOCK_SIZE)
+            piece, self._buffer = self._buffer[:size], self._buffer[size:]
+            if length is not None:
+                length -= len(piece)
+            yield piece
+
+
+def compress_stream(
+    pieces, algorithm, memory_limit=DEFAULT_MEMORY_LIMIT, record_algorithm=False
+):
+    """
+    Compresses text given in pieces, producing the same format as `compress_content`.
+
+    zlib, bz2, lzma and brotli compress incrementally and their output is base64 encoded as it is
+    produced, so neither the content nor its compressed form has to be in memory as a whole. The
+    other algorithms need the whole content.
+
+    Args:
+        pieces (iterable): The text, in pieces.
+        algorithm (str): The compression algorithm.
+        memory_limit (int, optional): Size up to which the output is kept in memory, in bytes;
+                                      larger output spills to a temporary file.
+        record_algorithm (bool, optional): Whether the output starts with a `CODEC_MAGIC` line
+                                           recording the algorithm, see `codec_header`.
+
+    Returns:
+        SpooledTemporaryFile: The compressed text, UTF-8 encoded, positioned at its start.
+    """
+    out = tempfile.SpooledTemporaryFile(max_size=memory_limit)
+    if record_algorithm:
+        out.write(codec_header(algorithm).encode("utf-8"))
+    name, level = split_algorithm(algorithm)
+    if name in _STREAM_COMPRESSORS:
+        compressor = _STREAM_COMPRESSORS[name](level)
+        if name == "brotli":
+            compress, finish = compressor.process, compressor.finish
+        else:
+            compress, finish = compressor.compress, compressor.flush
+        pending = b""
+        for block in _iter_blocks(pieces):
+            pending += compress(block.encode("utf-8"))
+            aligned = len(pending) - len(pending) % 3
+            out.write(base64.b64encode(pending[:aligned]))
+            pending = pending[aligned:]
+        out.write(base64.b64encode(pending + finish()))
+    elif algorithm in _BUFFERED_ALGORITHMS:
+        out.write(compress_content("".join(pieces), algorithm).encode("utf-8"))
+    else:
+        for block in _iter_blocks(pieces):
+            out.write(block.encode("utf-8"))
+    out.seek(0)
+    return out
+
+
+def decompress_stream(compressed_content, algorithm, executor=None):
+    """
+    Decompresses the output of `compress_content`, `compress_stream` or `compress_blocks`
+    incrementally.
+
+    Args:
+        compressed_content (str or file): The compressed text, or a seekable binary file holding it
+                                          UTF-8 encoded.
+        algorithm (str): The compression algorithm, if the text does not record it.
+        executor (Executor, optional): Decompresses the blocks of `compress_blocks` output.
+
+    Yields:
+        str: The decompressed text, in pieces.
+    """
+    compressed_content, algorithm = _read_codec_header(compressed_content, algorithm)
+    if not isinstance(compressed_content, str):
+        start = compressed_content.tell()
+        head = compressed_content.read(len(BLOCK_MAGIC) + 1)
+        compressed_content.seek(start)
+        if is_block_container(head.decode("utf-8", "replace")):
+            compressed_content = compressed_content.read().decode("utf-8")
+    if isinstance(compressed_content, str) and is_block_container(compressed_content):
+        yield from iter_decompressed_blocks(compressed_content, executor)
+        return
+    algorithm = split_algorithm(algorithm)[0]
+    if algorithm in _BUFFERED_ALGORITHMS:
+        if not isinstance(compressed_content, str):
+            compressed_content = compressed_content.read().decode("utf-8")
+        yield decompress_content(compressed_content, algorithm)
+        return
+    if isinstance(compressed_content, str):
+        blocks = (
+            compressed_content[start : start + _BLOCK_SIZE].encode("utf-8")
+            for start in range(0, len(compressed_content), _BLOCK_SIZE)
+        )
+    else:
+        blocks = iter(lambda: compressed_content.read(_BLOCK_SIZE), b"")
+    if algorithm in _STREAM_DECOMPRESSORS:
+        decompressor = _STREAM_DECOMPRESSORS[algorithm]()
+        if algorithm == "brotli":
+            decompress = decompressor.process
+        else:
+            decompress = decompressor.decompress
+        blocks = (decompress(base64.b64decode(block)) for block in blocks)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for block in blocks:
+        text = decoder.decode(block)
+        if text:
+            yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+
+def compress_blocks(
+    content,
+    algorithm,
+    block_size=DEFAULT_BLOCK_SIZE,
+    executor=None,
+    record_algorithm=False,
+):
+    """
+    Compresses text as independent blocks, so that the blocks can be compressed and decompressed in
+    parallel.
+
+    The content is cut every `block_size` characters and each block is compressed on its own with
+    `compress_content`. The result starts with a header line holding `BLOCK_MAGIC`, the algorithm and
+    a JSON list of the lengths of the compressed blocks, followed by the blocks back to back. Block
+    boundaries depend only on the content and the block size, so the output is the same whatever the
+    executor and however many workers it has. `decompress_content` reads it with any algorithm.
+
+    Args:
+        content (str): The text to compress.
+        algorithm (str): The compression algorithm.
+        block_size (int, optional): Size of a block, in characters.
+        executor (Executor, optional): Compresses the blocks, e.g. a process pool; they are
+                                       compressed in the calling thread if None.
+        record_algorithm (bool, optional): Whether the output starts with a `CODEC_MAGIC` line, see
+                                           `compress_stream`.
+
+    Returns:
+        str: The compressed text. Content is returned unchanged by algorithms that do not compress.
+    """
+    header = codec_header(algorithm) if record_algorithm else ""
+    name = split_algorithm(algorithm)[0]
+    if name not in _STREAM_COMPRESSORS and name not in _BUFFERED_ALGORITHMS:
+        return header + content
+    blocks = [
+        content[start : start + block_size]
+        for start in range(0, len(content), block_size)
+    ]
+    compressed = list(
+        (executor.map if executor is not None else map)(
+            compress_content, blocks, [algorithm] * len(blocks)
+        )
+    )
+    lengths = json.dumps([len(block) for block in compressed], separators=(",", ":"))
+    return header + f"{BLOCK_MAGIC} {algorithm} {lengths}\n" + "".join(compressed)
 
 
-def _write_file(local_path, file_path, content):
+def is_block_container(compressed_content):
+    return compressed_content.startswith(BLOCK_MAGIC + " ")
+
+
+def codec_header(algorithm):
+    """Returns the line recording the algorithm compressed text starts with, see `CODEC_MAGIC`."""
+    return f"{CODEC_MAGIC} {algorithm}\n"
+
+
+def _read_codec_header(compressed_content, algorithm):
+    # Returns the compressed text after its codec header and the algorithm recorded there, or the
+    # text and `algorithm` unchanged for text without a header, e.g. packs of earlier versions.
+    if isinstance(compressed_content, str):
+        if compressed_content.startswith(CODEC_MAGIC + " "):
+            header, compressed_content = compressed_content.split("\n", 1)
+            algorithm = header[len(CODEC_MAGIC) + 1 :]
+        return compressed_content, algorithm
+    start = compressed_content.tell()
+    if compressed_content.read(len(CODEC_MAGIC) + 1) == (CODEC_MAGIC + " ").encode():
+        algorithm = compressed_content.readline().decode("utf-8").rstrip("\n")
+    else:
+        compressed_content.seek(start)
+    return compressed_content, algorithm
+
+
+def iter_decompressed_blocks(compressed_content, executor=None):
+    """
+    Yields the decompressed blocks of the output of `compress_blocks`, in order.
+
+    Args:
+        compressed_content (str): The compressed text.
+        executor (Executor, optional): Decompresses the blocks, in the calling thread if None.
+    """
+    header_end = compressed_content.index("\n")
+    _, algorithm, lengths = compressed_content[:header_end].split(" ", 2)
+    blocks, offset = [], header_end + 1
+    for length in json.loads(lengths):
+        blocks.append(compressed_content[offset : offset + length])
+        offset += length
+    return (executor.map if executor is not None else map)(
+        decompress_content, blocks, [algorithm] * len(blocks)
+    )
+
+
+@contextmanager
+def block_executor(workers):
+    """
+    Yields an executor for `compress_blocks` and `iter_decompressed_blocks` with `workers` processes,
+    or threads where processes cannot be started. Yields None if `workers` is at most 1.
+    """
+    if workers <= 1:
+        yield None
+        return
+    try:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    except (OSError, NotImplementedError) as e:
+        logger.debug(f"Unable to compress in worker processes, using threads: {e}")
+        executor = ThreadPoolExecutor(max_workers=workers)
+    with executor:
+        yield executor
+
+
+def _iter_blocks(pieces):
+    for piece in pieces:
+        for start in range(0, len(piece), _BLOCK_SIZE):
+            yield piece[start : start + _BLOCK_SIZE]
+
+
+def _file_hash(local_path, file_path):
+    try:
+        with open(os.path.join(local_path, file_path), "r", encoding="utf-8") as f:
+            return hashlib.md5(f.read().encode("utf-8")).hexdigest()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def _write_file(local_path, file_path, pieces):
     full_path = os.path.join(local_path, file_path)
     os.makedirs(os.path.dirname(full_path), exist_ok=True)
     with open(full_path, "w", encoding="utf-8") as f:
-        f.write(content)
+        for piece in pieces:
+            f.write(piece)
+
+
+# Algorithms and levels `choose_algorithm` tries. The other algorithms are left out: they are slow on
+# large content and compress source code poorly.
+AUTO_CANDIDATES = (
+    "pack",
+    "zlib:1",
+    "zlib:6",
+    "zlib:9",
+    "bz2:1",
+    "bz2:9",
+    "lzma:0",
+    "lzma:6",
+    "brotli:4",
+    "brotli:9",
+    "brotli:11",
+)
+
+
+def split_algorithm(algorithm):
+    """
+    Splits a compression algorithm such as "zlib:9" into its name and level.
+
+    A level can be given for zlib, bz2, lzma (the preset) and brotli (the quality); it only matters
+    when compressing.
+
+    Returns:
+        tuple: (name, level), `level` being None if not given.
+    """
+    name, _, level = algorithm.partition(":")
+    if level and name in _STREAM_COMPRESSORS:
+        try:
+            return name, int(level)
+        except ValueError:
+            pass
+    return algorithm, None
+
+
+def content_profile(file_sizes):
+    """
+    Summarizes the content of a project, coarsely enough that everyday edits leave the summary
+    unchanged while growing or shrinking by half or changing the mix of file types does not.
+
+    Args:
+        file_sizes (dict): Relative file paths mapped to their sizes in bytes.
+
+    Returns:
+        str: The profile.
+    """
+    total = max(1, sum(file_sizes.values()))
+    by_type = Counter()
+    for file_path, size in file_sizes.items():
+        by_type[os.path.splitext(file_path)[1].lower()] += size
+    shares = sorted(
+        [extension, round(size * 10 / total)]
+        for extension, size in by_type.most_common(5)
+        if round(size * 10 / total)
+    )
+    return json.dumps({"size": total.bit_length(), "types": shares})
+
+
+def sample_content(file_paths, read, sample_size):
+    """
+    Takes a sample of a project's content for `choose_algorithm`.
+
+    The sample is made of the beginnings of files picked in a pseudo-random but stable order, so it
+    covers much of the project and is the same from one run to the next.
+
+    Args:
+        file_paths (iterable): Relative paths of the files.
+        read (callable): Called with a file path, returns the content of the file.
+        sample_size (int): Size of the sample, in characters.
+
+    Returns:
+        str: The sample.
+    """
+    per_file = max(1024, sample_size // 16)
+    pieces, remaining = [], sample_size
+    for file_path in sorted(
+        file_paths, key=lambda p: hashlib.md5(p.encode("utf-8")).hexdigest()
+    ):
+        if remaining <= 0:
+            break
+        piece = read(file_path)[: min(per_file, remaining)]
+        pieces.append(piece)
+        remaining -= len(piece)
+    return "".join(pieces)
+
+
+def choose_algorithm(sample, total_size, upload_rate, candidates=AUTO_CANDIDATES):
+    """
+    Picks the compression algorithm and level that make a packed sync cheapest.
+
+    Every candidate compresses the sample. Its cost is the time its output takes to upload at
+    `upload_rate` plus the CPU time it spent, both scaled from the sample to `total_size`.
+
+    Args:
+        sample (str): Content to try the candidates on, see `sample_content`.
+        total_size (int): Size of all the content to compress, in bytes.
+        upload_rate (float): Bytes per second uploads are budgeted at, e.g. the rate limit.
+        candidates (iterable, optional): The algorithms to try.
+
+    Returns:
+        str: The cheapest algorithm, e.g. "zlib:9".
+    """
+    candidates = list(candidates)
+    if not sample:
+        return candidates[0]
+    scale = total_size / len(sample.encode("utf-8"))
+    costs = {}
+    for candidate in candidates:
+        start = time.thread_time()
+        size = len(compress_content(sample, candidate))
+        cpu_time = time.thread_time() - start
+        costs[candidate] = scale * (size / upload_rate + cpu_time)
+        logger.debug(
+            f"{candidate}: {size} bytes in {cpu_time:.3f}s, cost {costs[candidate]:.3f}s"
+        )
+    return min(candidates, key=costs.get)
 
 
 def compress_content(content, algorithm):
+    algorithm, level = split_algorithm(algorithm)
     compressors = {
         "zlib": zlib_compress,
         "bz2": bz2_compress,
@@ -73,6 +737,8 @@ def compress_content(content, algorithm):
         "lzw": lzw_compress,
         "pack": no_compress,
     }
+    if level is not None:
+        return compressors[algorithm](content, level)
     if algorithm in compressors:
         return compressors[algorithm](content)
     else:
@@ -80,6 +746,10 @@ def compress_content(content, algorithm):
 
 
 def decompress_content(compressed_content, algorithm):
+    compressed_content, algorithm = _read_codec_header(compressed_content, algorithm)
+    if is_block_container(compressed_content):
+        return "".join(iter_decompressed_blocks(compressed_content))
+    algorithm = split_algorithm(algorithm)[0]
     decompressors = {
         "zlib": zlib_decompress,
         "bz2": bz2_decompress,
@@ -107,8 +777,8 @@ def no_decompress(compressed_text):
 
 
 # Brotli compression
-def brotli_compress(text):
-    compressed = brotli.compress(text.encode("utf-8"))
+def brotli_compress(text, level=11):
+    compressed = brotli.compress(text.encode("utf-8"), quality=level)
     return base64.b64encode(compressed).decode("ascii")
 
 
@@ -118,8 +788,8 @@ def brotli_decompress(compressed_text):
 
 
 # Zlib compression
-def zlib_compress(text):
-    compressed = zlib.compress(text.encode("utf-8"))
+def zlib_compress(text, level=-1):
+    compressed = zlib.compress(text.encode("utf-8"), level)
     return base64.b64encode(compressed).decode("ascii")
 
 
@@ -129,8 +799,8 @@ def zlib_decompress(compressed_text):
 
 
 # BZ2 compression
-def bz2_compress(text):
-    compressed = bz2.compress(text.encode("utf-8"))
+def bz2_compress(text, level=9):
+    compressed = bz2.compress(text.encode("utf-8"), level)
     return base64.b64encode(compressed).decode("ascii")
 
 
@@ -140,8 +810,8 @@ def bz2_decompress(compressed_text):
 
 
 # LZMA compression
-def lzma_compress(text):
-    compressed = lzma.compress(text.encode("utf-8"))
+def lzma_compress(text, level=None):
+    compressed = lzma.compress(text.encode("utf-8"), preset=level)
     return base64.b64encode(compressed).decode("ascii")
 
 
@@ -35,11 +35,35 @@ class BaseConfigManager(ABC):
         return {
             "log_level": "INFO",
             "upload_delay": 0.5,
+            "max_requests_per_second": 10,
+            "rate_limit_max_wait": 300,
+            "request_timeout": 60,
+            "http_pool_size": 10,
+            "retry_max_attempts": 4,
+            "retry_base_delay": 1.0,
+            "retry_max_delay": 30.0,
+            "retry_budget_ratio": 0.1,
+            "sync_jobs": 4,
+            "scan_jobs": 8,
+            "submodule_jobs": 4,
+            "hash_process_min_files": 2000,
+            "content_cache_size": 64 * 1024 * 1024,
+            "use_git_index": True,
+            "watch_debounce": 1.0,
+            "watch_max_delay": 10.0,
+            "watch_poll_interval": 2.0,
             "max_file_size": 32 * 1024,
             "two_way_sync": False,
             "prune_remote_files": True,
             "claude_api_url": "https://api.claude.ai/api",
             "compression_algorithm": "none",
+            "remote_check_interval": 600,
+            "pack_chunk_size": 256 * 1024,
+            "compression_memory_limit": 8 * 1024 * 1024,
+            "compression_workers": 0,
+            "compression_block_size": 1024 * 1024,
+            "compression_sample_size": 256 * 1024,
+            "compression_upload_rate": 1024 * 1024,
             "submodule_detect_filenames": [
                 "pom.xml",
                 "build.gradle",
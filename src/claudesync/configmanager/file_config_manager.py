@@ -3,10 +3,16 @@ import os
 from datetime import datetime
 from pathlib import Path
 import logging
+import threading
 
 from claudesync.configmanager.base_config_manager import BaseConfigManager
 from claudesync.session_key_manager import SessionKeyManager
 
+# Decrypted session keys by key file, kept for the lifetime of the process. Entries are only used
+# while the key file's modification time and size are unchanged.
+_session_key_cache = {}
+_session_key_cache_lock = threading.Lock()
+
 
 class FileConfigManager(BaseConfigManager):
     """
@@ -203,6 +209,8 @@ class FileConfigManager(BaseConfigManager):
                     },
                     f,
                 )
+            with _session_key_cache_lock:
+                _session_key_cache.pop(provider_key_file, None)
         except RuntimeError as e:
             logging.error(f"Failed to encrypt session key: {str(e)}")
             raise
@@ -211,6 +219,9 @@ class FileConfigManager(BaseConfigManager):
         """
         Retrieves the session key for the specified provider if it's still valid.
 
+        The decrypted key is cached for the lifetime of the process and read again only when the key
+        file changes, so repeated calls do not pay for key derivation and decryption.
+
         Args:
             provider (str): The name of the provider.
 
@@ -218,9 +229,29 @@ class FileConfigManager(BaseConfigManager):
             tuple: A tuple containing the session key and expiry if valid, (None, None) otherwise.
         """
         provider_key_file = self.global_config_dir / f"{provider}.key"
-        if not provider_key_file.exists():
+        try:
+            stat = provider_key_file.stat()
+        except FileNotFoundError:
+            return None, None
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with _session_key_cache_lock:
+            cached = _session_key_cache.get(provider_key_file)
+        if cached is not None and cached[0] == signature:
+            session_key, expiry = cached[1]
+        else:
+            session_key, expiry = self._read_session_key(provider, provider_key_file)
+            with _session_key_cache_lock:
+                _session_key_cache[provider_key_file] = (
+                    signature,
+                    (session_key, expiry),
+                )
+
+        if expiry is None or datetime.now() > expiry:
             return None, None
+        return session_key, expiry
 
+    def _read_session_key(self, provider, provider_key_file):
         with open(provider_key_file, "r") as f:
             data = json.load(f)
 
@@ -305,6 +336,8 @@ class FileConfigManager(BaseConfigManager):
         """
         for file in self.global_config_dir.glob("*.key"):
             os.remove(file)
+        with _session_key_cache_lock:
+            _session_key_cache.clear()
 
     def get_active_provider(self):
         """
@@ -325,7 +358,7 @@ class FileConfigManager(BaseConfigManager):
         providers = []
         for file in self.global_config_dir.glob("*.key"):
             provider = file.stem
-            session_key, expiry = self.get_session_key(provider)
-            if session_key and expiry > datetime.now():
+            session_key, _ = self.get_session_key(provider)
+            if session_key:
                 providers.append(provider)
         return providers
@@ -0,0 +1,111 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+
+class ContentCache:
+    """
+    A thread-safe, size-bounded cache of file contents for the duration of a sync.
+
+    Contents are the decoded text as `open(path, "r", encoding="utf-8")` returns it, keyed by the
+    file's path together with its modification time and size, so a file that changed on disk is read
+    again. The local scan fills the cache while hashing, and uploading, packing and token counting
+    then read from it instead of opening every file again. The least recently used contents are
+    evicted once their total size exceeds `max_bytes`.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        """
+        Args:
+            max_bytes (int, optional): Memory budget for the cached contents, in bytes. 0 disables
+                                       caching.
+        """
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        """Creates a cache with the `content_cache_size` budget."""
+        return cls(config.get("content_cache_size", 64 * 1024 * 1024))
+
+    @property
+    def size(self):
+        """The number of bytes currently held."""
+        return self._size
+
+    def get(self, path, stat_result):
+        """
+        Returns the cached content of a file if it was cached with the same signature.
+
+        Args:
+            path (str): Path of the file.
+            stat_result (os.stat_result): Current stat of the file.
+
+        Returns:
+            str or None: The content, or None on a miss.
+        """
+        key = os.path.normpath(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != _signature(stat_result):
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, path, stat_result, content):
+        """
+        Caches the content of a file read while it had the given stat.
+
+        Args:
+            path (str): Path of the file.
+            stat_result (os.stat_result): Stat of the file taken before or while it was read.
+            content (str): The decoded content, with newlines translated.
+        """
+        size = sys.getsizeof(content)
+        if size > self.max_bytes:
+            return
+        key = os.path.normpath(path)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[2]
+            self._entries[key] = (_signature(stat_result), content, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._size -= evicted
+
+    def read(self, path):
+        """
+        Returns the content of a text file, reading it only if it is not cached.
+
+        Args:
+            path (str): Path of the file.
+
+        Returns:
+            str: The content of the file.
+
+        Raises:
+            OSError: If the file cannot be read.
+            UnicodeDecodeError: If the file is not UTF-8 text.
+        """
+        stat_result = os.stat(path)
+        content = self.get(path, stat_result)
+        if content is None:
+            with open(path, "r", encoding="utf-8") as f:
+                content = f.read()
+            self.put(path, stat_result, content)
+        return content
+
+    def clear(self):
+        """Drops every cached content."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+def _signature(stat_result):
+    return stat_result.st_mtime_ns, stat_result.st_size
@@ -20,3 +20,55 @@ class ProviderError(Exception):
     """
 
     pass
+
+
+class RateLimitError(ProviderError):
+    """
+    Exception raised when a provider rejects a request because a rate limit was exceeded.
+
+    Attributes:
+        resets_at (float or None): Unix timestamp at which the limit resets, if the provider reported it.
+    """
+
+    def __init__(self, message, resets_at=None):
+        super().__init__(message)
+        self.resets_at = resets_at
+
+
+class ForbiddenError(ProviderError):
+    """
+    Exception raised when a provider answers a request with 403 Forbidden.
+
+    claude.ai occasionally rejects valid requests this way, so these are usually worth retrying.
+    """
+
+    pass
+
+
+class ServerError(ProviderError):
+    """
+    Exception raised when a provider answers a request with a 5xx status code.
+
+    Attributes:
+        status_code (int): The HTTP status code of the response.
+    """
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ConnectionFailedError(ProviderError):
+    """
+    Exception raised when a provider could not be reached or the connection broke off.
+    """
+
+    pass
+
+
+class RequestTimeoutError(ProviderError):
+    """
+    Exception raised when a provider did not answer a request in time.
+    """
+
+    pass
@@ -0,0 +1,30 @@
+import hashlib
+import os
+
+
+def tree_fingerprint(files):
+    """
+    Returns a signature of the state of a project's local files.
+
+    The signature hashes the path and signature of every file, where the signature is the file's
+    size, modification time and inode (or its git blob id), in path order. Adding, removing or
+    touching any file changes it, so if it is unchanged since the last sync, there is nothing to
+    sync. It only tells whether the whole tree changed, not where.
+
+    Only files that pass the scan filters are included, so changing an ignore file or the category
+    changes the fingerprint exactly when it changes the set of files to sync.
+
+    Args:
+        files (iterable): (rel_path, signature) pairs, `signature` being any value whose `repr`
+                          changes whenever the file may have changed.
+
+    Returns:
+        str: The fingerprint.
+    """
+    digest = hashlib.md5()
+    for rel_path, signature in sorted(
+        (rel_path.replace(os.sep, "/"), repr(signature))
+        for rel_path, signature in files
+    ):
+        digest.update(f"{rel_path}\0{signature}\n".encode("utf-8", "replace"))
+    return digest.hexdigest()
@@ -0,0 +1,362 @@
+import json
+import logging
+import os
+import posixpath
+import re
+import tempfile
+import threading
+
+import pathspec
+
+logger = logging.getLogger(__name__)
+
+IGNORE_CACHE_VERSION = 1
+
+# Extensions of files that are never UTF-8 text. They are skipped on their name alone, before any
+# stat or read call. Extensions also used by text formats, such as .obj for Wavefront models, are
+# left out and the files are checked by their content instead.
+BINARY_EXTENSIONS = frozenset(
+    {
+        # Images
+        ".png",
+        ".jpg",
+        ".jpeg",
+        ".gif",
+        ".bmp",
+        ".ico",
+        ".icns",
+        ".webp",
+        ".tif",
+        ".tiff",
+        ".psd",
+        # Archives and packages
+        ".zip",
+        ".gz",
+        ".tgz",
+        ".bz2",
+        ".xz",
+        ".zst",
+        ".7z",
+        ".rar",
+        ".tar",
+        ".jar",
+        ".war",
+        ".ear",
+        ".whl",
+        ".egg",
+        ".deb",
+        ".rpm",
+        ".dmg",
+        ".iso",
+        # Compiled code and libraries
+        ".pyc",
+        ".pyo",
+        ".pyd",
+        ".class",
+        ".o",
+        ".a",
+        ".lib",
+        ".so",
+        ".dylib",
+        ".dll",
+        ".exe",
+        ".wasm",
+        # Fonts
+        ".ttf",
+        ".otf",
+        ".woff",
+        ".woff2",
+        ".eot",
+        # Audio and video
+        ".mp3",
+        ".mp4",
+        ".m4a",
+        ".wav",
+        ".flac",
+        ".ogg",
+        ".avi",
+        ".mov",
+        ".mkv",
+        ".webm",
+        # Office documents and databases
+        ".pdf",
+        ".doc",
+        ".docx",
+        ".xls",
+        ".xlsx",
+        ".ppt",
+        ".pptx",
+        ".sqlite",
+        ".sqlite3",
+    }
+)
+
+_NAMED_GROUP = re.compile(r"\(\?P<\w+>")
+
+
+def _to_posix(path):
+    return path.replace(os.sep, "/") if os.sep != "/" else path
+
+
+class _RuleSet:
+    # The compiled patterns of one ignore file. Patterns are kept as (regex, include) pairs, the form
+    # that is persisted, and compiled once. Without negated patterns every pattern is merged into a
+    # single alternation, so a path is tested with one regex call.
+
+    def __init__(self, rules):
+        self.rules = rules
+        self._patterns = [(re.compile(regex), include) for regex, include in rules]
+        self._combined = None
+        if rules and all(include for _, include in rules):
+            self._combined = re.compile(
+                "|".join(f"(?:{_NAMED_GROUP.sub('(?:', regex)})" for regex, _ in rules)
+            )
+
+    @classmethod
+    def from_lines(cls, lines):
+        spec = pathspec.PathSpec.from_lines("gitwildmatch", lines)
+        return cls(
+            [
+                (pattern.regex.pattern, bool(pattern.include))
+                for pattern in spec.patterns
+                if pattern.include is not None
+            ]
+        )
+
+    def match(self, path):
+        """Returns True if the last matching pattern excludes the path, False if it re-includes it
+        and None if no pattern matches."""
+        if self._combined is not None:
+            return True if self._combined.match(path) else None
+        for regex, include in reversed(self._patterns):
+            if regex.match(path):
+                return include
+        return None
+
+
+class IgnoreMatcher:
+    """
+    Decides which paths of a project are skipped, merging every ignore rule source into one matcher.
+
+    The rules combined are, in order of evaluation:
+    - the directories that are never synced (version control and ClaudeSync metadata),
+    - excluded paths such as submodule directories,
+    - `.gitignore` files, both the root one and nested ones, each applying below its own directory
+      with the deeper file taking precedence as in git,
+    - `.claudeignore` in the project root, and in the root of each of `claudeignore_roots` for the
+      paths below it, where the deeper file takes precedence,
+    - files whose extension marks them as binary,
+    - the patterns of the selected file category, which files must match to be included.
+
+    The rules that apply within a directory are resolved once per directory and cached, and so are
+    the decisions for directories; a directory below an ignored directory is ignored without being
+    matched. The compiled form of every ignore file is persisted in `cache_file`, keyed by the file's
+    stat signature, so unchanged files are not parsed again on the next run.
+
+    Paths are relative to the project root. Directories have to be entered with `enter_directory`
+    before their entries are tested, parents before children, which a top-down walk does naturally;
+    directories that were not entered are loaded on demand.
+    """
+
+    def __init__(
+        self,
+        base_path,
+        category_patterns=None,
+        excluded_dirs=(),
+        excluded_paths=(),
+        cache_file=None,
+        use_gitignore=True,
+        claudeignore_roots=(),
+    ):
+        """
+        Args:
+            base_path (str): The project root.
+            category_patterns (list, optional): Patterns files must match to be included, None for
+                                                all files.
+            excluded_dirs (iterable, optional): Directory names that are skipped wherever they occur.
+            excluded_paths (iterable, optional): Relative paths of directories that are skipped.
+            cache_file (str, optional): JSON file the compiled ignore files are persisted in. It is
+                                        only written if its directory exists.
+            use_gitignore (bool, optional): Whether to apply `.gitignore` files, False when git has
+                                            already filtered the paths.
+            claudeignore_roots (iterable, optional): Relative paths of directories, such as submodules,
+                                                     whose own `.claudeignore` applies below them.
+        """
+        self.base_path = base_path
+        self.excluded_dirs = frozenset(excluded_dirs)
+        self.excluded_paths = frozenset(_to_posix(p) for p in excluded_paths)
+        self.cache_file = cache_file
+        self.use_gitignore = use_gitignore
+        self._lock = threading.Lock()
+        self._cache = self._load_cache()
+        self._cache_dirty = False
+
+        self._category = None
+        if category_patterns is not None and list(category_patterns) != ["*"]:
+            self._category = _RuleSet.from_lines(category_patterns)
+        self._claudeignores = []
+        for root in sorted(
+            {_to_posix(p) for p in claudeignore_roots}, key=len, reverse=True
+        ):
+            rules = self._load_rules(posixpath.join(root, ".claudeignore"))
+            if rules is not None:
+                self._claudeignores.append((f"{root}/", rules))
+        rules = self._load_rules(".claudeignore")
+        if rules is not None:
+            self._claudeignores.append(("", rules))
+        self._chains = {}
+        self._ignored_dirs = {}
+
+    def enter_directory(self, rel_dir, has_gitignore=None):
+        """
+        Resolves the `.gitignore` rules that apply to the entries of a directory.
+
+        Args:
+            rel_dir (str): The directory, "" for the project root.
+            has_gitignore (bool, optional): Whether the directory contains a `.gitignore` file, if the
+                                            caller already knows from listing it.
+        """
+        rel_dir = _to_posix(rel_dir)
+        if rel_dir:
+            chain = self._chain(posixpath.dirname(rel_dir))
+        else:
+            chain = ()
+        if not self.use_gitignore:
+            has_gitignore = False
+        elif has_gitignore is None:
+            has_gitignore = os.path.isfile(
+                os.path.join(self.base_path, rel_dir, ".gitignore")
+            )
+        if has_gitignore:
+            rules = self._load_rules(posixpath.join(rel_dir, ".gitignore"))
+            if rules is not None:
+                chain = ((f"{rel_dir}/" if rel_dir else "", rules),) + chain
+        self._chains[rel_dir] = chain
+        return chain
+
+    def is_ignored_dir(self, rel_path):
+        """
+        Returns True if a directory and everything below it is skipped.
+
+        Args:
+            rel_path (str): Path of the directory relative to the project root.
+        """
+        rel_path = _to_posix(rel_path)
+        ignored = self._ignored_dirs.get(rel_path)
+        if ignored is None:
+            parent, name = posixpath.split(rel_path)
+            ignored = (
+                name in self.excluded_dirs
+                or rel_path in self.excluded_paths
+                or (bool(parent) and self.is_ignored_dir(parent))
+                or self._matches_ignore_rules(parent, f"{rel_path}/")
+            )
+            self._ignored_dirs[rel_path] = ignored
+        return ignored
+
+    def is_ignored_file(self, rel_path, check_category=True):
+        """
+        Returns True if a file is skipped. Only the path is looked at, the file is never opened.
+
+        Args:
+            rel_path (str): Path of the file relative to the project root.
+            check_category (bool, optional): Whether files outside the category are skipped too.
+        """
+        rel_path = _to_posix(rel_path)
+        parent, name = posixpath.split(rel_path)
+        # Skip temporary editor files
+        if name.endswith("~"):
+            return True
+        if os.path.splitext(name)[1].lower() in BINARY_EXTENSIONS:
+            return True
+        if (
+            check_category
+            and self._category is not None
+            and not self._category.match(rel_path)
+        ):
+            return True
+        return self._matches_ignore_rules(parent, rel_path)
+
+    def save(self):
+        """Persists the compiled ignore files if any was parsed during this run."""
+        if not self._cache_dirty or not self.cache_file:
+            return
+        cache_dir = os.path.dirname(self.cache_file)
+        if not os.path.isdir(cache_dir):
+            return
+        with self._lock:
+            data = {
+                "version": IGNORE_CACHE_VERSION,
+                "pathspec": pathspec.__version__,
+                "files": dict(self._cache),
+            }
+            self._cache_dirty = False
+        try:
+            fd, tmp_file = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            logger.debug(f"Unable to save ignore cache {self.cache_file}: {e}")
+
+    def _chain(self, rel_dir):
+        chain = self._chains.get(rel_dir)
+        if chain is None:
+            chain = self.enter_directory(rel_dir)
+        return chain
+
+    def _matches_ignore_rules(self, parent, path):
+        for prefix, rules in self._chain(parent):
+            decision = rules.match(path[len(prefix) :])
+            if decision is not None:
+                if decision:
+                    return True
+                break
+        for prefix, rules in self._claudeignores:
+            if path.startswith(prefix):
+                decision = rules.match(path[len(prefix) :])
+                if decision is not None:
+                    return decision
+        return False
+
+    def _load_rules(self, rel_file):
+        path = os.path.join(self.base_path, rel_file)
+        try:
+            stat_result = os.stat(path)
+        except OSError:
+            return None
+        key = os.path.abspath(path)
+        signature = [stat_result.st_mtime_ns, stat_result.st_size]
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry is not None and entry["signature"] == signature:
+            return _RuleSet([tuple(rule) for rule in entry["rules"]])
+
+        try:
+            with open(path, "r") as f:
+                rules = _RuleSet.from_lines(f)
+        except (OSError, UnicodeDecodeError) as e:
+            logger.warning(f"Unable to read {path}: {e}")
+            return None
+        with self._lock:
+            self._cache[key] = {"signature": signature, "rules": rules.rules}
+            self._cache_dirty = True
+        return rules
+
+    def _load_cache(self):
+        if not self.cache_file:
+            return {}
+        try:
+            with open(self.cache_file, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.debug(f"Ignoring unreadable ignore cache {self.cache_file}: {e}")
+            return {}
+        if (
+            data.get("version") != IGNORE_CACHE_VERSION
+            or data.get("pathspec") != pathspec.__version__
+        ):
+            return {}
+        return data.get("files", {})
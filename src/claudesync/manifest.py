@@ -0,0 +1,407 @@
+import hashlib
+import json
+import logging
+import os
+import time
+
+from .syncplan import remote_size
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+class SyncManifest:
+    """
+    Persistent record of what ClaudeSync learned about each local file during previous syncs.
+
+    For every relative path the manifest stores the stat signature the file had when it was last
+    hashed (size, mtime_ns, inode), the resulting content hash, the uuid of the remote doc holding
+    that content and its token count. A file whose stat signature is unchanged can therefore be
+    reused without being opened again.
+
+    The manifest also keeps a snapshot of the remote docs as they were left by the last sync, which
+    lets a sync be planned without listing the remote project, and the fingerprint of the local
+    files as of the last scan and as of the last complete sync, which tells when there is nothing to
+    sync at all. The settings the scan and the sync were made with are recorded alongside, since
+    changing them can change what has to be synced even when the files did not change. With
+    automatic compression it also remembers the algorithm chosen for the project's content.
+
+    Manifests live in the root project's .claudesync directory, one file per remote project, so that
+    submodules never get a .claudesync directory of their own.
+    """
+
+    def __init__(self, manifest_file):
+        """
+        Initializes an empty manifest backed by the given file.
+
+        Args:
+            manifest_file (str): Path of the JSON file the manifest is loaded from and saved to.
+        """
+        self.manifest_file = manifest_file
+        self.files = {}
+        self.remote_files = {}
+        self.fingerprint = None
+        self.fingerprint_settings = None
+        self.synced_fingerprint = None
+        self.synced_settings = None
+        self.synced_at = None
+        self.compression = None
+        self._dirty = False
+
+    @classmethod
+    def for_project(cls, root_path, project_id):
+        """
+        Loads the manifest of a remote project stored under the given root project directory.
+
+        Args:
+            root_path (str): Directory containing the root project's .claudesync folder.
+            project_id (str): UUID of the remote project the manifest describes.
+
+        Returns:
+            SyncManifest: The loaded manifest, empty if none was saved yet.
+        """
+        manifest_file = os.path.join(
+            root_path or ".", ".claudesync", "manifests", f"{project_id}.json"
+        )
+        manifest = cls(manifest_file)
+        manifest.load()
+        return manifest
+
+    def state_file(self, name):
+        """
+        Returns the path of another state file kept in the same .claudesync directory as the manifest.
+
+        Args:
+            name (str): File name of the state file.
+
+        Returns:
+            str: The path of the state file.
+        """
+        return os.path.join(os.path.dirname(os.path.dirname(self.manifest_file)), name)
+
+    def load(self):
+        """
+        Loads the manifest from disk, silently starting empty if it is missing or unreadable.
+        """
+        try:
+            with open(self.manifest_file, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.debug(f"Ignoring unreadable manifest {self.manifest_file}: {e}")
+            return
+
+        if data.get("version") != MANIFEST_VERSION:
+            logger.debug(
+                f"Ignoring manifest with unsupported version: {self.manifest_file}"
+            )
+            return
+        self.files = data.get("files", {})
+        self.remote_files = data.get("remote_files", {})
+        self.fingerprint = data.get("fingerprint")
+        self.fingerprint_settings = data.get("fingerprint_settings")
+        self.synced_fingerprint = data.get("synced_fingerprint")
+        self.synced_settings = data.get("synced_settings")
+        self.synced_at = data.get("synced_at")
+        self.compression = data.get("compression")
+
+    def save(self):
+        """
+        Writes the manifest to disk if it changed since it was loaded.
+
+        The manifest is only written when the root project's .claudesync directory exists, and the
+        write goes through a temporary file so an interrupted sync never leaves a truncated manifest.
+        """
+        if not self._dirty:
+            return
+        manifests_dir = os.path.dirname(self.manifest_file)
+        if not os.path.isdir(os.path.dirname(manifests_dir)):
+            return
+
+        os.makedirs(manifests_dir, exist_ok=True)
+        tmp_file = f"{self.manifest_file}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(
+                {
+                    "version": MANIFEST_VERSION,
+                    "files": self.files,
+                    "remote_files": self.remote_files,
+                    "fingerprint": self.fingerprint,
+                    "fingerprint_settings": self.fingerprint_settings,
+                    "synced_fingerprint": self.synced_fingerprint,
+                    "synced_settings": self.synced_settings,
+                    "synced_at": self.synced_at,
+                    "compression": self.compression,
+                },
+                f,
+            )
+        os.replace(tmp_file, self.manifest_file)
+        self._dirty = False
+
+    def lookup(self, rel_path, stat_result):
+        """
+        Returns the recorded hash of a file if its stat signature is unchanged.
+
+        Args:
+            rel_path (str): Path of the file relative to the project root.
+            stat_result (os.stat_result): Current stat of the file.
+
+        Returns:
+            tuple: (known, file_hash). `known` is False when the file has to be read again; when it is
+                   True, `file_hash` is the recorded hash, or None if the file was found not to be
+                   UTF-8 text.
+        """
+        entry = self.files.get(rel_path)
+        if (
+            entry is None
+            or entry["size"] != stat_result.st_size
+            or entry["mtime_ns"] != stat_result.st_mtime_ns
+            or entry["inode"] != stat_result.st_ino
+        ):
+            return False, None
+        return True, entry["hash"]
+
+    def record_scan(self, rel_path, stat_result, file_hash):
+        """
+        Records the stat signature and content hash of a freshly read file.
+
+        The remote uuid and token count are kept only while the content hash is unchanged.
+
+        Args:
+            rel_path (str): Path of the file relative to the project root.
+            stat_result (os.stat_result): Stat of the file taken before it was read.
+            file_hash (str or None): Content hash, or None if the file is not UTF-8 text.
+        """
+        entry = self.files.get(rel_path)
+        if entry is None or entry["hash"] != file_hash:
+            entry = {"hash": file_hash, "uuid": None, "tokens": None}
+        entry.update(
+            {
+                "size": stat_result.st_size,
+                "mtime_ns": stat_result.st_mtime_ns,
+                "inode": stat_result.st_ino,
+            }
+        )
+        self.files[rel_path] = entry
+        self._dirty = True
+
+    def lookup_blob(self, rel_path, blob):
+        """
+        Returns the recorded hash of a file if it was last hashed while git stored it as `blob`.
+
+        Args:
+            rel_path (str): Path of the file relative to the project root.
+            blob (str): Object id of the file in the git index.
+
+        Returns:
+            tuple: (known, file_hash, size), see `lookup`. `size` is the file's recorded size.
+        """
+        entry = self.files.get(rel_path)
+        if entry is None or entry.get("blob") != blob:
+            return False, None, None
+        return True, entry["hash"], entry["size"]
+
+    def set_blob(self, rel_path, blob):
+        """Records the git object id matching the file's recorded content hash."""
+        entry = self.files.get(rel_path)
+        if entry is not None and entry.get("blob") != blob:
+            entry["blob"] = blob
+            self._dirty = True
+
+    def refresh_stat(self, rel_path, stat_result):
+        """
+        Updates the stat signature of a file whose content is known to be unchanged, e.g. after its
+        timestamps were adjusted to match the remote copy.
+        """
+        entry = self.files.get(rel_path)
+        if entry is not None:
+            entry.update(
+                {
+                    "size": stat_result.st_size,
+                    "mtime_ns": stat_result.st_mtime_ns,
+                    "inode": stat_result.st_ino,
+                }
+            )
+            self._dirty = True
+
+    def get_hash(self, rel_path):
+        """Returns the last recorded content hash of a file, or None."""
+        entry = self.files.get(rel_path)
+        return entry["hash"] if entry else None
+
+    def set_remote_uuid(self, rel_path, uuid):
+        """Records the uuid of the remote doc that holds the file's current content."""
+        entry = self.files.get(rel_path)
+        if entry is not None and entry["uuid"] != uuid:
+            entry["uuid"] = uuid
+            self._dirty = True
+
+    def get_token_count(self, rel_path, file_hash):
+        """Returns the cached token count of a file if it was computed for the given hash."""
+        entry = self.files.get(rel_path)
+        if entry is None or file_hash is None or entry["hash"] != file_hash:
+            return None
+        return entry["tokens"]
+
+    def set_token_count(self, rel_path, file_hash, tokens):
+        """Caches the token count of a file for the given content hash."""
+        entry = self.files.get(rel_path)
+        if entry is not None and entry["hash"] == file_hash:
+            entry["tokens"] = tokens
+            self._dirty = True
+
+    def paths_under(self, rel_dir):
+        """Returns the relative paths of the recorded files below a directory."""
+        prefix = os.path.join(rel_dir, "")
+        return [rel_path for rel_path in self.files if rel_path.startswith(prefix)]
+
+    def forget(self, rel_path):
+        """Drops everything known about a file, e.g. after it was removed on both sides."""
+        if self.files.pop(rel_path, None) is not None:
+            self._dirty = True
+
+    def set_remote_files(self, remote_files):
+        """
+        Replaces the snapshot of the remote project.
+
+        Args:
+            remote_files (dict): Remote doc uuids mapped to dicts with the doc's `file_name`,
+                                 content `hash`, content `size` and `created_at` timestamp.
+        """
+        if remote_files != self.remote_files:
+            self.remote_files = remote_files
+            self._dirty = True
+
+    def known_checksum(self, remote_file):
+        """
+        Returns the content hash recorded for a remote doc by a previous sync.
+
+        A doc's content never changes after it was uploaded, so its uuid identifies its hash. The
+        doc's name, creation time and size are compared too, so a reused uuid is never mistaken for
+        the doc it previously identified.
+
+        Args:
+            remote_file (dict): A remote doc from a listing.
+
+        Returns:
+            str or None: The recorded hash, or None if the doc is not known.
+        """
+        known = self.remote_files.get(remote_file["uuid"])
+        if not known or known.get("hash") is None:
+            return None
+        if known["file_name"] != remote_file["file_name"] or known[
+            "created_at"
+        ] != remote_file.get("created_at"):
+            return None
+        size = remote_size(remote_file)
+        if size is not None and known.get("size") not in (None, size):
+            return None
+        return known["hash"]
+
+    def remote_snapshot(self):
+        """
+        Returns the remote docs recorded at the end of the last sync.
+
+        The docs are shaped like the provider's `list_files` output, except that they carry a
+        precomputed `checksum` instead of their content.
+
+        Returns:
+            list: The recorded remote docs.
+        """
+        return [
+            {
+                "uuid": uuid,
+                "file_name": remote_file["file_name"],
+                "checksum": remote_file["hash"],
+                "size": remote_file.get("size"),
+                "created_at": remote_file["created_at"],
+            }
+            for uuid, remote_file in self.remote_files.items()
+        ]
+
+    def set_fingerprint(self, fingerprint, settings=None):
+        """
+        Records the fingerprint of the local files found by the latest scan.
+
+        Args:
+            fingerprint (str or None): The `tree_fingerprint`, None if the scan did not cover the
+                                       whole project.
+            settings (dict, optional): The settings that decided which files the scan included, such
+                                       as the category and the excluded submodules.
+        """
+        settings = _settings_digest(settings)
+        if fingerprint != self.fingerprint or settings != self.fingerprint_settings:
+            self.fingerprint = fingerprint
+            self.fingerprint_settings = settings
+            self._dirty = True
+
+    def mark_synced(self, complete=True, settings=None):
+        """
+        Records whether the remote project now matches the latest scan.
+
+        Args:
+            complete (bool, optional): False if some files could not be synced.
+            settings (dict, optional): The settings that decided how the files were synced, such as
+                                       the compression algorithm.
+        """
+        self.synced_fingerprint = self.fingerprint if complete else None
+        self.synced_settings = _settings_digest([self.fingerprint_settings, settings])
+        self.synced_at = time.time()
+        self._dirty = True
+
+    def compression_for(self, profile):
+        """
+        Returns the compression algorithm chosen for the project's content, see `set_compression`.
+
+        Args:
+            profile (str): The current content profile.
+
+        Returns:
+            str or None: The algorithm, None if none was chosen for this profile.
+        """
+        if self.compression and self.compression.get("profile") == profile:
+            return self.compression.get("algorithm")
+        return None
+
+    def set_compression(self, profile, algorithm):
+        """
+        Records the compression algorithm chosen automatically for the project's content.
+
+        Args:
+            profile (str): The content profile the algorithm was chosen for, see `content_profile`.
+            algorithm (str): The algorithm.
+        """
+        self.compression = {"profile": profile, "algorithm": algorithm}
+        self._dirty = True
+
+    def is_up_to_date(self, settings=None, max_age=None):
+        """
+        Returns True if the local files and the settings are unchanged since the last complete sync.
+
+        Args:
+            settings (dict, optional): The current sync settings, see `mark_synced`.
+            max_age (float, optional): Seconds after the last sync at which the remote project has to
+                                       be looked at again, to catch changes made on the remote side.
+                                       None to trust the last sync indefinitely.
+        """
+        return (
+            self.fingerprint is not None
+            and self.synced_fingerprint == self.fingerprint
+            and self.synced_settings
+            == _settings_digest([self.fingerprint_settings, settings])
+            and (
+                max_age is None
+                or (
+                    self.synced_at is not None
+                    and 0 <= time.time() - self.synced_at < max_age
+                )
+            )
+        )
+
+
+def _settings_digest(settings):
+    return hashlib.md5(
+        json.dumps(settings, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
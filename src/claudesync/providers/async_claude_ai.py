@@ -0,0 +1,184 @@
+import asyncio
+import json
+import time
+import weakref
+
+import httpx
+
+from .base_claude_ai import BaseClaudeAIProvider, _event_messages
+from .claude_ai import ClaudeAIProvider
+from .json_stream import JSONArrayDecoder
+from ..exceptions import (
+    ConnectionFailedError,
+    ProviderError,
+    RequestTimeoutError,
+)
+
+# httpx clients are bound to the event loop they were first used on, so connections are pooled per
+# loop. Clients are dropped together with their loop.
+_clients = weakref.WeakKeyDictionary()
+
+
+def _get_client(config):
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        limits = httpx.Limits(
+            max_connections=None,
+            max_keepalive_connections=config.get("http_pool_size", 10),
+        )
+        client = httpx.AsyncClient(limits=limits)
+        _clients[loop] = client
+    return client
+
+
+async def _iter_sse_events(lines):
+    event, data = "message", []
+    async for line in lines:
+        if not line:
+            if data:
+                yield event, "\n".join(data)
+            event, data = "message", []
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if field == "event":
+            event = value
+        elif field == "data":
+            data.append(value)
+    if data:
+        yield event, "\n".join(data)
+
+
+class AsyncClaudeAIProvider(BaseClaudeAIProvider):
+    """
+    An asyncio-native claude.ai provider with the same methods as `ClaudeAIProvider`.
+
+    Every endpoint method returns a coroutine, and `send_message` and `iter_files` async iterators,
+    so many requests can be in flight from a single thread. Requests are built and responses shaped
+    by `BaseClaudeAIProvider`; this class only sends them, sharing the rate limiter and retry budget
+    of `ClaudeAIProvider` for the same API, over connections kept alive in a pool per event loop.
+    """
+
+    def login(self):
+        # Logging in prompts on the terminal, which only makes sense synchronously.
+        return ClaudeAIProvider(self.config).login()
+
+    async def aclose(self):
+        """Closes the pooled connections of the running event loop."""
+        client = _clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    async def _call(self, request):
+        response = await self._make_request(
+            request.method, request.endpoint, request.data, request.idempotent
+        )
+        return request.shape(response) if request.shape else response
+
+    async def _map_stream(self, items, shape):
+        async for item in items:
+            yield shape(item)
+
+    async def _iter_request(self, method, endpoint):
+        response = await self._send_with_retries(
+            self._open_json_stream, method, endpoint, None
+        )
+        decoder = JSONArrayDecoder()
+        try:
+            async for chunk in response.aiter_bytes():
+                for item in decoder.feed(chunk):
+                    yield item
+            for item in decoder.close():
+                yield item
+        except ValueError as e:
+            raise ProviderError(f"Invalid JSON response from API: {str(e)}")
+        except httpx.TransportError as e:
+            raise ConnectionFailedError(f"API request failed: {str(e)}")
+        finally:
+            await response.aclose()
+
+    async def _stream_messages(self, request):
+        response = await self._make_request_stream(
+            request.method, request.endpoint, request.data
+        )
+        try:
+            async for event, data in _iter_sse_events(response.aiter_lines()):
+                for message in _event_messages(event, data):
+                    yield message
+                if event == "done":
+                    break
+        finally:
+            await response.aclose()
+
+    async def _make_request(self, method, endpoint, data=None, idempotent=None):
+        return await self._send_with_retries(
+            self._send_request, method, endpoint, data, idempotent
+        )
+
+    async def _make_request_stream(self, method, endpoint, data=None):
+        return await self._send_with_retries(self._open_stream, method, endpoint, data)
+
+    async def _send_with_retries(self, send, method, endpoint, data, idempotent=None):
+        # Mirrors ClaudeAIProvider._send_with_retries, waiting without blocking the event loop.
+        attempt = 0
+        while True:
+            attempt += 1
+            await asyncio.sleep(self.rate_limiter.reserve())
+            start = time.monotonic()
+            try:
+                result = await send(method, endpoint, data)
+            except ProviderError as e:
+                await asyncio.sleep(self._retry_delay(e, method, attempt, idempotent))
+                continue
+            self._record_success(start)
+            return result
+
+    def _build_request(self, client, method, endpoint, data, accept):
+        return client.build_request(
+            method,
+            f"{self.base_url}{endpoint}",
+            headers=self._request_headers({"Accept": accept}),
+            content=self._request_body(data),
+            timeout=self.config.get("request_timeout", 60),
+        )
+
+    async def _send(self, method, endpoint, data, accept, stream):
+        client = _get_client(self.config)
+        request = self._build_request(client, method, endpoint, data, accept)
+        self.logger.debug(f"Making {method} request to {request.url}")
+        try:
+            response = await client.send(request, stream=stream)
+            if response.status_code >= 400:
+                await response.aread()
+                await response.aclose()
+                self._raise_for_status(response.status_code, response.text)
+            return response
+        except httpx.TimeoutException as e:
+            raise RequestTimeoutError(f"API request timed out: {str(e)}")
+        except httpx.TransportError as e:
+            raise ConnectionFailedError(f"API request failed: {str(e)}")
+
+    async def _send_request(self, method, endpoint, data=None):
+        response = await self._send(
+            method, endpoint, data, "application/json", stream=False
+        )
+        self.logger.debug(f"Response status code: {response.status_code}")
+        if not response.content:
+            return None
+        try:
+            return response.json()
+        except json.JSONDecodeError as json_err:
+            self.logger.error(f"Failed to parse JSON response: {str(json_err)}")
+            raise ProviderError(f"Invalid JSON response from API: {str(json_err)}")
+
+    async def _open_stream(self, method, endpoint, data=None):
+        return await self._send(
+            method, endpoint, data, "text/event-stream", stream=True
+        )
+
+    async def _open_json_stream(self, method, endpoint, data=None):
+        return await self._send(method, endpoint, data, "application/json", stream=True)
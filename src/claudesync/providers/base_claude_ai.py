@@ -1,13 +1,23 @@
 import datetime
 import json
 import logging
+import time
 import urllib
+from functools import partial
+
 import sseclient
 
 import click
 from .base_provider import BaseProvider
 from ..configmanager import FileConfigManager, InMemoryConfigManager
-from ..exceptions import ProviderError
+from ..exceptions import ForbiddenError, ProviderError, RateLimitError, ServerError
+from ..rate_limiter import get_shared_rate_limiter
+from ..retry import get_shared_retry_policy
+from .transport import get_shared_transport
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:129.0) Gecko/20100101 Firefox/129.0"
+)
 
 
 def is_url_encoded(s):
@@ -36,6 +46,111 @@ def _get_session_key_expiry():
             )
 
 
+def file_record(file, include_content=True, known_checksum=None):
+    """
+    Builds the compact record describing a remote doc.
+
+    Records carry the doc's uuid, name, creation time, content checksum and size in characters. The
+    content itself is only kept if requested, so callers can process large projects without holding
+    every doc in memory. Content is only hashed if `known_checksum` does not know the doc already.
+    """
+    from ..utils import compute_md5_hash
+
+    content = file["content"]
+    record = {
+        "uuid": file["uuid"],
+        "file_name": file["file_name"],
+        "created_at": file["created_at"],
+        "size": len(content),
+    }
+    checksum = known_checksum(record) if known_checksum is not None else None
+    record["checksum"] = checksum or compute_md5_hash(content)
+    if include_content:
+        record["content"] = content
+    return record
+
+
+class ApiRequest:
+    """
+    A request to the claude.ai API, independent of the transport it is sent with.
+
+    The endpoint methods of `BaseClaudeAIProvider` build a request and hand it to `_call`, so
+    providers only differ in how they send it: a synchronous provider returns the shaped response,
+    an asynchronous one a coroutine resolving to it.
+
+    Attributes:
+        method (str): The HTTP method.
+        endpoint (str): The path of the endpoint below the API's base URL.
+        data (dict or None): The JSON body, if any.
+        idempotent (bool or None): Whether the request may be sent twice, None to decide by its
+                                   method, see `RetryPolicy.should_retry`.
+        shape (callable or None): Turns the decoded response into the result of the endpoint
+                                  method, None to return it unchanged.
+    """
+
+    def __init__(self, method, endpoint, data=None, idempotent=None, shape=None):
+        self.method = method
+        self.endpoint = endpoint
+        self.data = data
+        self.idempotent = idempotent
+        self.shape = shape
+
+
+def _organizations(response):
+    if not response:
+        raise ProviderError("Unable to retrieve organization information")
+    return [
+        {"id": org["uuid"], "name": org["name"]}
+        for org in response
+        if (
+            {"chat", "claude_pro"}.issubset(set(org.get("capabilities", [])))
+            or {"chat", "raven"}.issubset(set(org.get("capabilities", [])))
+        )
+    ]
+
+
+def _projects(response, include_archived):
+    return [
+        {
+            "id": project["uuid"],
+            "name": project["name"],
+            "archived_at": project.get("archived_at"),
+        }
+        for project in response
+        if include_archived or project.get("archived_at") is None
+    ]
+
+
+def _files(response):
+    return [
+        {
+            "uuid": file["uuid"],
+            "file_name": file["file_name"],
+            "content": file["content"],
+            "created_at": file["created_at"],
+        }
+        for file in response
+    ]
+
+
+def _artifact_content(artifacts, artifact_uuid):
+    for artifact in artifacts:
+        if artifact["published_artifact_uuid"] == artifact_uuid:
+            return artifact.get("artifact_content", "")
+    raise ProviderError(f"Artifact with UUID {artifact_uuid} not found")
+
+
+def _event_messages(event, data):
+    # The messages a server-sent event of a completion stream carries.
+    if data:
+        try:
+            yield json.loads(data)
+        except json.JSONDecodeError:
+            yield {"error": "Failed to parse JSON"}
+    if event == "error":
+        yield {"error": data}
+
+
 class BaseClaudeAIProvider(BaseProvider):
     def __init__(self, config=None):
         self.config = config
@@ -51,6 +166,18 @@ class BaseClaudeAIProvider(BaseProvider):
     def base_url(self):
         return self.config.get("claude_api_url", "https://api.claude.ai/api")
 
+    @property
+    def rate_limiter(self):
+        return get_shared_rate_limiter(self.base_url, self.config)
+
+    @property
+    def retry_policy(self):
+        return get_shared_retry_policy(self.base_url, self.config)
+
+    @property
+    def transport(self):
+        return get_shared_transport(self.config)
+
     def _configure_logging(self):
         log_level = self.config.get("log_level", "INFO")
         logging.basicConfig(level=getattr(logging, log_level))
@@ -111,104 +238,215 @@ class BaseClaudeAIProvider(BaseProvider):
         raise ProviderError("Failed to authenticate after multiple attempts")
 
     def get_organizations(self):
-        response = self._make_request("GET", "/organizations")
-        if not response:
-            raise ProviderError("Unable to retrieve organization information")
-        return [
-            {"id": org["uuid"], "name": org["name"]}
-            for org in response
-            if (
-                {"chat", "claude_pro"}.issubset(set(org.get("capabilities", [])))
-                or {"chat", "raven"}.issubset(set(org.get("capabilities", [])))
-            )
-        ]
+        return self._call(ApiRequest("GET", "/organizations", shape=_organizations))
 
     def get_projects(self, organization_id, include_archived=False):
-        response = self._make_request(
-            "GET", f"/organizations/{organization_id}/projects"
+        return self._call(
+            ApiRequest(
+                "GET",
+                f"/organizations/{organization_id}/projects",
+                shape=partial(_projects, include_archived=include_archived),
+            )
         )
-        projects = [
-            {
-                "id": project["uuid"],
-                "name": project["name"],
-                "archived_at": project.get("archived_at"),
-            }
-            for project in response
-            if include_archived or project.get("archived_at") is None
-        ]
-        return projects
 
     def list_files(self, organization_id, project_id):
-        response = self._make_request(
-            "GET", f"/organizations/{organization_id}/projects/{project_id}/docs"
+        return self._call(
+            ApiRequest(
+                "GET",
+                f"/organizations/{organization_id}/projects/{project_id}/docs",
+                shape=_files,
+            )
+        )
+
+    def iter_files(
+        self, organization_id, project_id, include_content=True, known_checksum=None
+    ):
+        """
+        Yields the docs of a project one at a time, as the listing is received.
+
+        Args:
+            organization_id (str): The UUID of the organization.
+            project_id (str): The UUID of the project.
+            include_content (bool, optional): Whether records keep the docs' content. Without it
+                                              records only carry the content's checksum and size.
+            known_checksum (callable, optional): Returns the already known checksum of a doc, or
+                                                 None, to skip hashing docs seen before.
+
+        Yields:
+            dict: One record per doc, see `file_record`.
+        """
+        return self._map_stream(
+            self._iter_request(
+                "GET", f"/organizations/{organization_id}/projects/{project_id}/docs"
+            ),
+            partial(
+                file_record,
+                include_content=include_content,
+                known_checksum=known_checksum,
+            ),
         )
-        return [
-            {
-                "uuid": file["uuid"],
-                "file_name": file["file_name"],
-                "content": file["content"],
-                "created_at": file["created_at"],
-            }
-            for file in response
-        ]
 
     def upload_file(self, organization_id, project_id, file_name, content):
         data = {"file_name": file_name, "content": content}
-        return self._make_request(
-            "POST", f"/organizations/{organization_id}/projects/{project_id}/docs", data
+        return self._call(
+            ApiRequest(
+                "POST",
+                f"/organizations/{organization_id}/projects/{project_id}/docs",
+                data,
+            )
         )
 
     def delete_file(self, organization_id, project_id, file_uuid):
-        return self._make_request(
-            "DELETE",
-            f"/organizations/{organization_id}/projects/{project_id}/docs/{file_uuid}",
+        return self._call(
+            ApiRequest(
+                "DELETE",
+                f"/organizations/{organization_id}/projects/{project_id}/docs/{file_uuid}",
+            )
         )
 
     def archive_project(self, organization_id, project_id):
         data = {"is_archived": True}
-        return self._make_request(
-            "PUT", f"/organizations/{organization_id}/projects/{project_id}", data
+        return self._call(
+            ApiRequest(
+                "PUT", f"/organizations/{organization_id}/projects/{project_id}", data
+            )
         )
 
     def create_project(self, organization_id, name, description=""):
         data = {"name": name, "description": description, "is_private": True}
-        return self._make_request(
-            "POST", f"/organizations/{organization_id}/projects", data
+        return self._call(
+            ApiRequest("POST", f"/organizations/{organization_id}/projects", data)
         )
 
     def get_chat_conversations(self, organization_id):
-        return self._make_request(
-            "GET", f"/organizations/{organization_id}/chat_conversations"
+        return self._call(
+            ApiRequest("GET", f"/organizations/{organization_id}/chat_conversations")
         )
 
     def get_published_artifacts(self, organization_id):
-        return self._make_request(
-            "GET", f"/organizations/{organization_id}/published_artifacts"
+        return self._call(
+            ApiRequest("GET", f"/organizations/{organization_id}/published_artifacts")
         )
 
     def get_chat_conversation(self, organization_id, conversation_id):
-        return self._make_request(
-            "GET",
-            f"/organizations/{organization_id}/chat_conversations/{conversation_id}?rendering_mode=raw",
+        return self._call(
+            ApiRequest(
+                "GET",
+                f"/organizations/{organization_id}/chat_conversations/{conversation_id}?rendering_mode=raw",
+            )
         )
 
     def get_artifact_content(self, organization_id, artifact_uuid):
-        artifacts = self._make_request(
-            "GET", f"/organizations/{organization_id}/published_artifacts"
+        return self._call(
+            ApiRequest(
+                "GET",
+                f"/organizations/{organization_id}/published_artifacts",
+                shape=partial(_artifact_content, artifact_uuid=artifact_uuid),
+            )
         )
-        for artifact in artifacts:
-            if artifact["published_artifact_uuid"] == artifact_uuid:
-                return artifact.get("artifact_content", "")
-        raise ProviderError(f"Artifact with UUID {artifact_uuid} not found")
 
     def delete_chat(self, organization_id, conversation_uuids):
         endpoint = f"/organizations/{organization_id}/chat_conversations/delete_many"
         data = {"conversation_uuids": conversation_uuids}
-        return self._make_request("POST", endpoint, data)
+        # Deleting the same conversations twice is harmless, so this POST may be retried.
+        return self._call(ApiRequest("POST", endpoint, data, idempotent=True))
 
-    def _make_request(self, method, endpoint, data=None):
+    def _call(self, request):
+        # Sends a request and shapes its response. Asynchronous providers return a coroutine.
+        response = self._make_request(
+            request.method, request.endpoint, request.data, request.idempotent
+        )
+        return request.shape(response) if request.shape else response
+
+    def _map_stream(self, items, shape):
+        # Shapes the elements of a streamed response as they arrive, see `_iter_request`.
+        return map(shape, items)
+
+    def _make_request(self, method, endpoint, data=None, idempotent=None):
         raise NotImplementedError("This method should be implemented by subclasses")
 
+    def _iter_request(self, method, endpoint):
+        # Yields the elements of a JSON array response. Subclasses that can parse responses as they
+        # arrive override this; the fallback decodes the whole response first.
+        return iter(self._make_request(method, endpoint) or [])
+
+    def _retry_delay(self, error, method, attempt, idempotent=None):
+        # Returns how long to wait before sending a failed request again, or raises `error` if it is
+        # not retried. Throttled requests wait in the limiter shared by all providers for this API,
+        # unless the limit resets later than the configured maximum wait; other failures are retried
+        # as the retry policy allows.
+        policy = self.retry_policy
+        if isinstance(error, RateLimitError):
+            wait = self.rate_limiter.on_throttle(error.resets_at)
+            if wait > self.config.get(
+                "rate_limit_max_wait", 300
+            ) or not policy.should_retry(error, method, attempt, idempotent):
+                raise error
+            self.logger.warning(
+                f"Rate limited by the API, retrying in {wait:.1f} seconds..."
+            )
+            return 0
+        if not policy.should_retry(error, method, attempt, idempotent):
+            raise error
+        delay = policy.backoff(attempt)
+        self.logger.warning(
+            f"{error} Retrying in {delay:.1f} seconds... (Attempt {attempt + 1}/{policy.max_attempts})"
+        )
+        return delay
+
+    def _record_success(self, start):
+        # Reports a request sent at `start`, a `time.monotonic` value, that succeeded.
+        self.rate_limiter.on_success(time.monotonic() - start)
+        self.retry_policy.budget.record_success()
+
+    def _request_headers(self, extra=None):
+        """Returns the headers of a request authenticated with the session key."""
+        session_key, _ = self.config.get_session_key("claude.ai")
+        headers = {
+            "User-Agent": USER_AGENT,
+            "Content-Type": "application/json",
+            "Cookie": f"sessionKey={session_key}",
+        }
+        headers.update(extra or {})
+        return headers
+
+    @staticmethod
+    def _request_body(data):
+        return json.dumps(data).encode("utf-8") if data else None
+
+    def _raise_for_status(self, status_code, content_str):
+        # Turns an error response into the matching ProviderError subclass, so that every transport
+        # reports failures the same way.
+        if status_code == 403:
+            error_msg = "Received a 403 Forbidden error."
+            raise ForbiddenError(error_msg)
+        elif status_code == 429:
+            resets_at_unix = None
+            try:
+                error_data = json.loads(content_str)
+                resets_at_unix = json.loads(error_data["error"]["message"])["resetsAt"]
+                resets_at_local = datetime.datetime.fromtimestamp(
+                    resets_at_unix, tz=datetime.timezone.utc
+                ).astimezone()
+                formatted_time = resets_at_local.strftime("%a %b %d %Y %H:%M:%S %Z%z")
+                error_msg = f"Message limit exceeded. Try again after {formatted_time}"
+            except (KeyError, json.JSONDecodeError) as parse_error:
+                error_msg = f"HTTP 429: Too Many Requests. Failed to parse error response: {parse_error}"
+            self.logger.debug(error_msg)
+            raise RateLimitError(error_msg, resets_at_unix)
+        elif status_code >= 500:
+            error_msg = (
+                f"API request failed with status code {status_code}: {content_str}"
+            )
+            self.logger.debug(error_msg)
+            raise ServerError(error_msg, status_code)
+        else:
+            error_msg = (
+                f"API request failed with status code {status_code}: {content_str}"
+            )
+            self.logger.error(error_msg)
+            raise ProviderError(error_msg)
+
     def create_chat(self, organization_id, chat_name="", project_uuid=None):
         """
         Create a new chat conversation in the specified organization.
@@ -229,8 +467,10 @@ class BaseClaudeAIProvider(BaseProvider):
             "name": chat_name,
             "project_uuid": project_uuid,
         }
-        return self._make_request(
-            "POST", f"/organizations/{organization_id}/chat_conversations", data
+        return self._call(
+            ApiRequest(
+                "POST", f"/organizations/{organization_id}/chat_conversations", data
+            )
         )
 
     def _generate_uuid(self):
@@ -254,15 +494,14 @@ class BaseClaudeAIProvider(BaseProvider):
             "attachments": [],
             "files": [],
         }
-        response = self._make_request_stream("POST", endpoint, data)
+        return self._stream_messages(ApiRequest("POST", endpoint, data))
+
+    def _stream_messages(self, request):
+        response = self._make_request_stream(
+            request.method, request.endpoint, request.data
+        )
         client = sseclient.SSEClient(response)
         for event in client.events():
-            if event.data:
-                try:
-                    yield json.loads(event.data)
-                except json.JSONDecodeError:
-                    yield {"error": "Failed to parse JSON"}
-            if event.event == "error":
-                yield {"error": event.data}
+            yield from _event_messages(event.event, event.data)
             if event.event == "done":
                 break
@@ -24,6 +24,13 @@ class BaseProvider(ABC):
         """List all files within a specified project and organization."""
         pass
 
+    @abstractmethod
+    def iter_files(
+        self, organization_id, project_id, include_content=True, known_checksum=None
+    ):
+        """Yield the files of a project one at a time as compact records."""
+        pass
+
     @abstractmethod
     def upload_file(self, organization_id, project_id, file_name, content):
         """Upload a file to a specified project within an organization."""
@@ -1,53 +1,75 @@
-import urllib.request
 import urllib.error
-import urllib.parse
 import json
 import gzip
-from datetime import datetime, timezone
+import socket
+import time
+import zlib
 from .base_claude_ai import BaseClaudeAIProvider
-from ..exceptions import ProviderError
+from .json_stream import iter_json_array
+from ..exceptions import (
+    ConnectionFailedError,
+    ProviderError,
+    RequestTimeoutError,
+)
 
 
 class ClaudeAIProvider(BaseClaudeAIProvider):
     def __init__(self, config=None):
         super().__init__(config)
 
-    def _make_request(self, method, endpoint, data=None):
-        url = f"{self.base_url}{endpoint}"
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:129.0) Gecko/20100101 Firefox/129.0",
-            "Content-Type": "application/json",
-            "Accept-Encoding": "gzip",
-        }
+    def _make_request(self, method, endpoint, data=None, idempotent=None):
+        return self._send_with_retries(
+            self._send_request, method, endpoint, data, idempotent
+        )
 
-        session_key, expiry = self.config.get_session_key("claude.ai")
-        cookies = {
-            "sessionKey": session_key,
-        }
+    def _iter_request(self, method, endpoint):
+        response = self._send_with_retries(
+            self._open_json_stream, method, endpoint, None
+        )
+        try:
+            with response:
+                yield from iter_json_array(self._iter_body(response))
+        except ValueError as e:
+            raise ProviderError(f"Invalid JSON response from API: {str(e)}")
+        except (OSError, zlib.error) as e:
+            raise ConnectionFailedError(f"API request failed: {str(e)}")
+
+    def _make_request_stream(self, method, endpoint, data=None):
+        return self._send_with_retries(self._open_stream, method, endpoint, data)
+
+    def _send_with_retries(self, send, method, endpoint, data, idempotent=None):
+        # Every attempt goes through the limiter shared by all providers for this API, see
+        # `_retry_delay`.
+        attempt = 0
+        while True:
+            attempt += 1
+            self.rate_limiter.acquire()
+            start = time.monotonic()
+            try:
+                result = send(method, endpoint, data)
+            except ProviderError as e:
+                time.sleep(self._retry_delay(e, method, attempt, idempotent))
+                continue
+            self._record_success(start)
+            return result
+
+    def _send_request(self, method, endpoint, data=None):
+        url = f"{self.base_url}{endpoint}"
+        headers = self._request_headers({"Accept-Encoding": "gzip"})
 
         try:
             self.logger.debug(f"Making {method} request to {url}")
             self.logger.debug(f"Headers: {headers}")
-            self.logger.debug(f"Cookies: {cookies}")
             if data:
                 self.logger.debug(f"Request data: {data}")
 
-            # Prepare the request
-            req = urllib.request.Request(url, method=method)
-            for key, value in headers.items():
-                req.add_header(key, value)
-
-            # Add cookies
-            cookie_string = "; ".join([f"{k}={v}" for k, v in cookies.items()])
-            req.add_header("Cookie", cookie_string)
-
-            # Add data if present
-            if data:
-                json_data = json.dumps(data).encode("utf-8")
-                req.data = json_data
+            json_data = self._request_body(data)
 
-            # Make the request
-            with urllib.request.urlopen(req) as response:
+            # Make the request over a pooled keep-alive connection
+            timeout = self.config.get("request_timeout", 60)
+            with self.transport.request(
+                method, url, headers=headers, body=json_data, timeout=timeout
+            ) as response:
                 self.logger.debug(f"Response status code: {response.status}")
                 self.logger.debug(f"Response headers: {response.headers}")
 
@@ -68,8 +90,12 @@ class ClaudeAIProvider(BaseClaudeAIProvider):
         except urllib.error.HTTPError as e:
             self.handle_http_error(e)
         except urllib.error.URLError as e:
-            self.logger.error(f"URL Error: {str(e)}")
-            raise ProviderError(f"API request failed: {str(e)}")
+            self.logger.debug(f"URL Error: {str(e)}")
+            if isinstance(e.reason, socket.timeout):
+                raise RequestTimeoutError(f"API request timed out: {str(e)}")
+            raise ConnectionFailedError(f"API request failed: {str(e)}")
+        except socket.timeout as e:
+            raise RequestTimeoutError(f"API request timed out: {str(e)}")
         except json.JSONDecodeError as json_err:
             self.logger.error(f"Failed to parse JSON response: {str(json_err)}")
             self.logger.error(f"Response content: {content_str}")
@@ -95,44 +121,49 @@ class ClaudeAIProvider(BaseClaudeAIProvider):
 
         self.logger.debug(f"Response content: {content_str}")
 
-        if e.code == 403:
-            error_msg = "Received a 403 Forbidden error."
-            raise ProviderError(error_msg)
-        elif e.code == 429:
-            try:
-                error_data = json.loads(content_str)
-                resets_at_unix = json.loads(error_data["error"]["message"])["resetsAt"]
-                resets_at_local = datetime.fromtimestamp(
-                    resets_at_unix, tz=timezone.utc
-                ).astimezone()
-                formatted_time = resets_at_local.strftime("%a %b %d %Y %H:%M:%S %Z%z")
-                error_msg = f"Message limit exceeded. Try again after {formatted_time}"
-            except (KeyError, json.JSONDecodeError) as parse_error:
-                error_msg = f"HTTP 429: Too Many Requests. Failed to parse error response: {parse_error}"
-            self.logger.error(error_msg)
-            raise ProviderError(error_msg)
-        else:
-            error_msg = f"API request failed with status code {e.code}: {content_str}"
-            self.logger.error(error_msg)
-            raise ProviderError(error_msg)
+        self._raise_for_status(e.code, content_str)
 
-    def _make_request_stream(self, method, endpoint, data=None):
+    def _open_stream(self, method, endpoint, data=None):
+        url = f"{self.base_url}{endpoint}"
+        headers = self._request_headers({"Accept": "text/event-stream"})
+
+        try:
+            return self.transport.request(
+                method, url, headers=headers, body=self._request_body(data)
+            )
+        except urllib.error.HTTPError as e:
+            self.handle_http_error(e)
+        except urllib.error.URLError as e:
+            raise ConnectionFailedError(f"API request failed: {str(e)}")
+
+    def _open_json_stream(self, method, endpoint, data=None):
         url = f"{self.base_url}{endpoint}"
-        session_key, _ = self.config.get_session_key("claude.ai")
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:129.0) Gecko/20100101 Firefox/129.0",
-            "Content-Type": "application/json",
-            "Accept": "text/event-stream",
-            "Cookie": f"sessionKey={session_key}",
-        }
-
-        req = urllib.request.Request(url, method=method, headers=headers)
-        if data:
-            req.data = json.dumps(data).encode("utf-8")
+        headers = self._request_headers({"Accept-Encoding": "gzip"})
+        self.logger.debug(f"Streaming {method} request to {url}")
 
         try:
-            return urllib.request.urlopen(req)
+            return self.transport.request(
+                method,
+                url,
+                headers=headers,
+                timeout=self.config.get("request_timeout", 60),
+            )
         except urllib.error.HTTPError as e:
             self.handle_http_error(e)
         except urllib.error.URLError as e:
-            raise ProviderError(f"API request failed: {str(e)}")
+            if isinstance(e.reason, socket.timeout):
+                raise RequestTimeoutError(f"API request timed out: {str(e)}")
+            raise ConnectionFailedError(f"API request failed: {str(e)}")
+
+    def _iter_body(self, response, chunk_size=64 * 1024):
+        # Decompresses the body chunk by chunk instead of reading it whole.
+        decompressor = None
+        if response.headers.get("Content-Encoding") == "gzip":
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        while True:
+            chunk = response.read(chunk_size)
+            if not chunk:
+                break
+            yield decompressor.decompress(chunk) if decompressor else chunk
+        if decompressor:
+            yield decompressor.flush()
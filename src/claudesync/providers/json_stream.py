@@ -0,0 +1,116 @@
+import codecs
+import json
+
+
+class JSONArrayDecoder:
+    """
+    Incrementally decodes a JSON array, yielding its elements as soon as they are complete.
+
+    Bytes are fed in arbitrary chunks as they arrive. Only the unparsed tail of the input is kept in
+    memory, so a large response never has to be held as a whole, neither as bytes nor as text.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._state = "start"
+        # Length the buffer must reach before parsing an incomplete element is attempted again, so
+        # that an element spread over many chunks is not re-parsed from the start for every chunk.
+        self._retry_at = 0
+
+    def feed(self, data):
+        """
+        Adds the next chunk of input.
+
+        Args:
+            data (bytes): The next chunk of the UTF-8 encoded array.
+
+        Returns:
+            list: The elements completed by this chunk.
+        """
+        self._buffer += self._text_decoder.decode(data)
+        return self._parse(final=False)
+
+    def close(self):
+        """
+        Signals the end of the input.
+
+        Returns:
+            list: The elements completed by the remaining input.
+
+        Raises:
+            ValueError: If the input is not a complete JSON array.
+        """
+        self._buffer += self._text_decoder.decode(b"", final=True)
+        items = self._parse(final=True)
+        if self._state not in ("start", "end"):
+            raise ValueError("Incomplete JSON array")
+        return items
+
+    def _parse(self, final):
+        items = []
+        buffer = self._buffer
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos == len(buffer):
+                break
+            char = buffer[pos]
+            if self._state == "start":
+                if char != "[":
+                    raise ValueError("Expected a JSON array")
+                self._state = "first"
+                pos += 1
+            elif self._state in ("first", "after_value") and char == "]":
+                self._state = "end"
+                pos += 1
+            elif self._state == "after_value":
+                if char != ",":
+                    raise ValueError(f"Expected ',' or ']' at offset {pos}")
+                self._state = "value"
+                pos += 1
+            elif self._state in ("first", "value"):
+                if not final and len(buffer) < self._retry_at:
+                    break
+                try:
+                    item, end = self._decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    self._retry_at = 2 * (len(buffer) - pos) + pos
+                    break
+                if end == len(buffer) and not final:
+                    # A number at the end of the input may still continue in the next chunk.
+                    break
+                items.append(item)
+                self._state = "after_value"
+                self._retry_at = 0
+                pos = end
+            else:
+                raise ValueError(
+                    f"Unexpected data after the JSON array at offset {pos}"
+                )
+        self._retry_at = max(0, self._retry_at - pos)
+        self._buffer = buffer[pos:]
+        return items
+
+
+def iter_json_array(chunks):
+    """
+    Yields the elements of a JSON array read from an iterable of byte chunks.
+
+    Args:
+        chunks (iterable): The UTF-8 encoded array, in chunks of any size.
+
+    Yields:
+        The decoded elements, in order.
+
+    Raises:
+        ValueError: If the input is not a valid JSON array.
+    """
+    decoder = JSONArrayDecoder()
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
+    yield from decoder.close()
@@ -0,0 +1,245 @@
+import http.client
+import io
+import logging
+import queue
+import ssl
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+
+logger = logging.getLogger(__name__)
+
+# Errors showing that the server closed a kept-alive connection while it sat idle in the pool.
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+
+class PooledResponse:
+    """
+    An HTTP response whose connection goes back to the pool once the body has been read.
+
+    Responses behave like the ones returned by `urllib.request.urlopen`: they expose `status` and
+    `headers`, support `read`, line iteration and use as a context manager. A response that is
+    closed before its body was read completely closes its connection instead of returning it.
+    """
+
+    def __init__(self, response, release):
+        self._response = response
+        self._release = release
+        self._released = False
+
+    @property
+    def status(self):
+        return self._response.status
+
+    @property
+    def headers(self):
+        return self._response.headers
+
+    def read(self, amt=None):
+        data = self._response.read(amt)
+        if self._response.isclosed():
+            self._finish(reusable=True)
+        return data
+
+    def __iter__(self):
+        for line in self._response:
+            yield line
+        self._finish(reusable=True)
+
+    def close(self):
+        if not self._response.isclosed():
+            self._response.close()
+            self._finish(reusable=False)
+        else:
+            self._finish(reusable=True)
+
+    def _finish(self, reusable):
+        if not self._released:
+            self._released = True
+            self._release(reusable and not self._response.will_close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class _HostPool:
+    def __init__(self, scheme, host, port, maxsize):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.idle = queue.LifoQueue(maxsize)
+
+    def new_connection(self, timeout):
+        proxy = _proxy_for(self.scheme, self.host)
+        target_host, target_port = self.host, self.port
+        if proxy:
+            target_host, target_port = proxy
+        if self.scheme == "https":
+            conn = http.client.HTTPSConnection(
+                target_host,
+                target_port,
+                timeout=timeout,
+                context=ssl.create_default_context(),
+            )
+        else:
+            conn = http.client.HTTPConnection(target_host, target_port, timeout=timeout)
+        if proxy:
+            conn.set_tunnel(self.host, self.port)
+        return conn
+
+
+def _proxy_for(scheme, host):
+    proxy_url = urllib.request.getproxies().get(scheme)
+    if not proxy_url or urllib.request.proxy_bypass(host):
+        return None
+    parsed = urllib.parse.urlsplit(proxy_url)
+    return parsed.hostname, parsed.port or (443 if parsed.scheme == "https" else 80)
+
+
+class HTTPTransport:
+    """
+    A thread-safe pool of persistent HTTP and HTTPS connections.
+
+    Connections are kept alive between requests and reused, one pool per host. A request never waits
+    for a pooled connection: if none is idle a new one is opened, and connections beyond `pool_size`
+    are closed instead of being kept. Connections the server closed while idle are reopened
+    transparently.
+
+    Errors are reported the way `urllib.request.urlopen` reports them, as `urllib.error.HTTPError`
+    for error statuses and `urllib.error.URLError` for connection failures.
+    """
+
+    def __init__(self, pool_size=10):
+        """
+        Args:
+            pool_size (int, optional): Maximum number of idle connections kept per host.
+        """
+        self.pool_size = pool_size
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def request(self, method, url, headers=None, body=None, timeout=None):
+        """
+        Sends a request and returns its response.
+
+        Args:
+            method (str): The HTTP method.
+            url (str): The absolute URL to request.
+            headers (dict, optional): Request headers.
+            body (bytes, optional): Request body.
+            timeout (float, optional): Socket timeout in seconds, None to block.
+
+        Returns:
+            PooledResponse: The response. Its body has to be read or the response closed to release
+                            the connection.
+
+        Raises:
+            urllib.error.HTTPError: If the server answered with a status of 400 or above.
+            urllib.error.URLError: If the server could not be reached.
+        """
+        parsed = urllib.parse.urlsplit(url)
+        pool = self._get_pool(parsed)
+        path = urllib.parse.urlunsplit(("", "", parsed.path or "/", parsed.query, ""))
+        headers = dict(headers or {})
+
+        while True:
+            conn, reused = self._checkout(pool, timeout)
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                break
+            except _STALE_CONNECTION_ERRORS as e:
+                conn.close()
+                if not reused:
+                    raise urllib.error.URLError(e)
+                logger.debug(f"Reconnecting to {parsed.netloc}: {e}")
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                raise urllib.error.URLError(e)
+
+        def release(reusable):
+            self._checkin(pool, conn, reusable)
+
+        if response.status >= 400:
+            try:
+                content = response.read()
+            finally:
+                release(not response.will_close)
+            raise urllib.error.HTTPError(
+                url,
+                response.status,
+                response.reason,
+                response.headers,
+                io.BytesIO(content),
+            )
+        return PooledResponse(response, release)
+
+    def close(self):
+        """Closes all idle connections."""
+        with self._lock:
+            pools = list(self._pools.values())
+        for pool in pools:
+            while True:
+                try:
+                    pool.idle.get_nowait().close()
+                except queue.Empty:
+                    break
+
+    def _get_pool(self, parsed):
+        scheme = parsed.scheme.lower()
+        port = parsed.port or (443 if scheme == "https" else 80)
+        key = (scheme, parsed.hostname, port)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = _HostPool(scheme, parsed.hostname, port, self.pool_size)
+                self._pools[key] = pool
+            return pool
+
+    def _checkout(self, pool, timeout):
+        try:
+            conn = pool.idle.get_nowait()
+        except queue.Empty:
+            return pool.new_connection(timeout), False
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+
+    def _checkin(self, pool, conn, reusable):
+        if not reusable:
+            conn.close()
+            return
+        try:
+            pool.idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
+_shared_transport = None
+_shared_transport_lock = threading.Lock()
+
+
+def get_shared_transport(config):
+    """
+    Returns the process-wide HTTP transport, creating it on first use.
+
+    Args:
+        config: Config manager providing `http_pool_size` when the transport is created.
+
+    Returns:
+        HTTPTransport: The shared transport.
+    """
+    global _shared_transport
+    with _shared_transport_lock:
+        if _shared_transport is None:
+            _shared_transport = HTTPTransport(config.get("http_pool_size", 10))
+        return _shared_transport
@@ -0,0 +1,180 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    A thread-safe token bucket limiting how often provider calls may start.
+
+    Every call to `acquire` takes one token; tokens are refilled at `rate` per second up to `burst`.
+    Callers that find the bucket empty are assigned consecutive future start times, so concurrent
+    workers are spread out evenly instead of waking up together.
+    """
+
+    def __init__(self, rate, burst=1):
+        """
+        Args:
+            rate (float or None): Sustained number of calls per second. None or 0 disables limiting.
+            burst (int, optional): Number of calls that may start back to back. Defaults to 1.
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_delay(cls, delay, burst=1):
+        """Creates a limiter allowing one call per `delay` seconds."""
+        return cls(1.0 / delay if delay and delay > 0 else None, burst)
+
+    def reserve(self):
+        """
+        Takes a token and returns how long the caller has to wait before using it.
+
+        Returns:
+            float: The number of seconds to wait, 0 if the call may start immediately.
+        """
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """Blocks until the caller may start its call."""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """
+    A token bucket whose rate adapts to how the provider responds (additive increase, multiplicative
+    decrease).
+
+    Every successful call raises the rate by a small constant step up to `max_rate`. Throttling
+    responses and calls that are much slower than usual halve it, down to `min_rate`. When the
+    provider announces when its limit resets, no call starts before that moment.
+    """
+
+    def __init__(
+        self,
+        rate,
+        min_rate=0.1,
+        max_rate=10.0,
+        increase_step=0.05,
+        decrease_factor=0.5,
+        latency_factor=3.0,
+    ):
+        """
+        Args:
+            rate (float): Initial number of calls per second.
+            min_rate (float, optional): Lowest rate the limiter backs off to.
+            max_rate (float, optional): Highest rate the limiter speeds up to.
+            increase_step (float, optional): Calls per second added after every successful call.
+            decrease_factor (float, optional): Factor applied to the rate when backing off.
+            latency_factor (float, optional): How many times slower than the running average a call
+                                              has to be to count as a sign of overload.
+        """
+        super().__init__(min(max(rate, min_rate), max_rate))
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.latency_factor = latency_factor
+        self._average_latency = None
+        self._last_decrease = 0.0
+        self._blocked_until = 0.0
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Creates a limiter from the `upload_delay` and `max_requests_per_second` settings.
+        """
+        max_rate = config.get("max_requests_per_second", 10.0)
+        upload_delay = config.get("upload_delay", 0.5)
+        rate = 1.0 / upload_delay if upload_delay and upload_delay > 0 else max_rate
+        return cls(rate, max_rate=max_rate)
+
+    def reserve(self):
+        delay = super().reserve()
+        with self._lock:
+            return max(delay, self._blocked_until - time.monotonic())
+
+    def on_success(self, latency):
+        """
+        Records a successful call and speeds up, unless the call was unusually slow.
+
+        Args:
+            latency (float): How long the call took, in seconds.
+        """
+        with self._lock:
+            if self._average_latency is None:
+                self._average_latency = latency
+            overloaded = latency > self._average_latency * self.latency_factor
+            self._average_latency = 0.8 * self._average_latency + 0.2 * latency
+            if overloaded:
+                self._decrease()
+            else:
+                self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def on_throttle(self, resets_at=None):
+        """
+        Records a throttling response and backs off.
+
+        Args:
+            resets_at (float, optional): Unix timestamp at which the provider's limit resets.
+
+        Returns:
+            float: The number of seconds until calls may start again.
+        """
+        with self._lock:
+            self._decrease(force=True)
+            wait = 1.0 / self.rate
+            if resets_at is not None:
+                wait = max(wait, resets_at - time.time())
+            self._blocked_until = max(self._blocked_until, time.monotonic() + wait)
+            return self._blocked_until - time.monotonic()
+
+    def _decrease(self, force=False):
+        # Back off at most once per second for latency spikes, so that one slow burst of concurrent
+        # calls does not collapse the rate to the minimum.
+        now = time.monotonic()
+        if force or now - self._last_decrease >= 1.0:
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self._tokens = min(self._tokens, 0.0)
+            self._last_decrease = now
+
+
+_shared_limiters = {}
+_shared_limiters_lock = threading.Lock()
+
+
+def get_shared_rate_limiter(key, config):
+    """
+    Returns the process-wide adaptive limiter for an API endpoint, creating it on first use.
+
+    Every provider instance talking to the same endpoint shares one limiter, so concurrent syncs,
+    chat pulls and API server requests all back off together.
+
+    Args:
+        key (str): Identifies the endpoint, usually the provider's base URL.
+        config: Config manager used to create the limiter on first use.
+
+    Returns:
+        AdaptiveRateLimiter: The shared limiter.
+    """
+    with _shared_limiters_lock:
+        limiter = _shared_limiters.get(key)
+        if limiter is None:
+            limiter = AdaptiveRateLimiter.from_config(config)
+            _shared_limiters[key] = limiter
+        return limiter
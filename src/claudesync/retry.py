@@ -0,0 +1,158 @@
+import random
+import threading
+
+from .exceptions import (
+    ConnectionFailedError,
+    ForbiddenError,
+    RateLimitError,
+    RequestTimeoutError,
+    ServerError,
+)
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+# Errors telling that the server did not act on the request. Retrying these is safe even for requests
+# that are not idempotent.
+REJECTED_ERRORS = (ForbiddenError, RateLimitError)
+
+# Errors after which the request may or may not have been processed. Only idempotent requests are
+# retried after these.
+TRANSIENT_ERRORS = (ServerError, ConnectionFailedError, RequestTimeoutError)
+
+
+class RetryBudget:
+    """
+    Caps retries at a fraction of the requests that succeed, shared by all requests to one API.
+
+    The budget starts with `max_tokens` retries. Every retry spends one token and every successful
+    request earns back `ratio` tokens, so a persistently failing request cannot keep retrying at the
+    expense of the rest of a sync.
+    """
+
+    def __init__(self, ratio=0.1, max_tokens=10):
+        """
+        Args:
+            ratio (float, optional): Tokens earned per successful request.
+            max_tokens (int, optional): Upper bound on the number of saved-up retries.
+        """
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = float(max_tokens)
+        self._lock = threading.Lock()
+
+    def record_success(self):
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_spend(self):
+        """
+        Takes one retry from the budget.
+
+        Returns:
+            bool: True if the retry may go ahead, False if the budget is exhausted.
+        """
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class RetryPolicy:
+    """
+    Decides whether a failed provider request is retried and how long to wait before doing so.
+
+    403 and 429 responses mean the request was rejected before being processed and are retried for
+    every request. Server errors, connection failures and timeouts are only retried for idempotent
+    requests, so an upload is never sent twice. Waits grow exponentially with full jitter.
+    """
+
+    def __init__(self, max_attempts=4, base_delay=1.0, max_delay=30.0, budget=None):
+        """
+        Args:
+            max_attempts (int, optional): Maximum number of attempts per request, including the first.
+            base_delay (float, optional): Upper bound of the wait before the first retry, in seconds.
+            max_delay (float, optional): Upper bound of any single wait, in seconds.
+            budget (RetryBudget, optional): Budget limiting retries across requests.
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget or RetryBudget()
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Creates a policy from the `retry_*` settings.
+        """
+        return cls(
+            max_attempts=config.get("retry_max_attempts", 4),
+            base_delay=config.get("retry_base_delay", 1.0),
+            max_delay=config.get("retry_max_delay", 30.0),
+            budget=RetryBudget(ratio=config.get("retry_budget_ratio", 0.1)),
+        )
+
+    def is_retryable(self, error, method, idempotent=None):
+        """
+        Tells whether an error class may be retried for a request.
+
+        Args:
+            error (Exception): The error the request failed with.
+            method (str): The HTTP method of the request.
+            idempotent (bool, optional): Overrides the idempotency implied by the method, for
+                                         operations like bulk deletes that are sent as POST.
+
+        Returns:
+            bool: True if repeating the request is safe and may help.
+        """
+        if isinstance(error, REJECTED_ERRORS):
+            return True
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        return idempotent and isinstance(error, TRANSIENT_ERRORS)
+
+    def should_retry(self, error, method, attempt, idempotent=None):
+        """
+        Tells whether a request that failed on its `attempt`-th try is tried again.
+
+        Rate limit errors are waited out by the rate limiter and do not draw on the retry budget.
+        """
+        if attempt >= self.max_attempts:
+            return False
+        if not self.is_retryable(error, method, idempotent):
+            return False
+        return isinstance(error, RateLimitError) or self.budget.try_spend()
+
+    def backoff(self, attempt):
+        """
+        Returns the number of seconds to wait after the `attempt`-th failed try.
+        """
+        return random.uniform(
+            0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        )
+
+
+_shared_policies = {}
+_shared_policies_lock = threading.Lock()
+
+
+def get_shared_retry_policy(key, config):
+    """
+    Returns the process-wide retry policy for an API endpoint, creating it on first use.
+
+    Sharing the policy shares its retry budget between every provider instance talking to the
+    endpoint.
+
+    Args:
+        key (str): Identifies the endpoint, usually the provider's base URL.
+        config: Config manager used to create the policy on first use.
+
+    Returns:
+        RetryPolicy: The shared policy.
+    """
+    with _shared_policies_lock:
+        policy = _shared_policies.get(key)
+        if policy is None:
+            policy = RetryPolicy.from_config(config)
+            _shared_policies[key] = policy
+        return policy
@@ -1,343 +1,556 @@
-import functools
 import os
-import time
 import logging
-from datetime import datetime, timezone
-import io
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime
 from anthropic import Anthropic
 
 from tqdm import tqdm
 
-from claudesync.utils import compute_md5_hash
 from claudesync.exceptions import ProviderError
-from .compression import compress_content, decompress_content
+from .compression import (
+    DEFAULT_BLOCK_SIZE,
+    DEFAULT_MEMORY_LIMIT,
+    block_executor,
+    choose_algorithm,
+    compress_blocks,
+    compress_stream,
+    content_profile,
+    decompress_files,
+    is_pack_file,
+    iter_pack,
+    pack_file_name,
+    pack_index,
+    sample_content,
+    split_chunks,
+)
+from .content_cache import ContentCache
+from .manifest import SyncManifest
+from .syncplan import (
+    SyncAction,
+    SyncActionType,
+    build_sync_plan,
+    remote_checksum,
+    remote_size,
+)
+from .utils import compute_md5_hash
 
 logger = logging.getLogger(__name__)
 
 
-def retry_on_403(max_retries=3, delay=1):
-    def decorator(func):
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            self = args[0] if len(args) > 0 else None
-            for attempt in range(max_retries):
-                try:
-                    return func(*args, **kwargs)
-                except ProviderError as e:
-                    if "403 Forbidden" in str(e) and attempt < max_retries - 1:
-                        if self and hasattr(self, "logger"):
-                            self.logger.warning(
-                                f"Received 403 error. Retrying in {delay} seconds... (Attempt {attempt + 1}/{max_retries})"
-                            )
-                        else:
-                            logger.warning(
-                                f"Received 403 error. Retrying in {delay} seconds... (Attempt {attempt + 1}/{max_retries})"
-                            )
-                        time.sleep(delay)
-                    else:
-                        raise
-
-        return wrapper
-
-    return decorator
-
-
 class SyncManager:
-    def __init__(self, provider, config, local_path):
+    def __init__(
+        self,
+        provider,
+        config,
+        local_path,
+        manifest=None,
+        jobs=None,
+        content_cache=None,
+        progress=None,
+    ):
         self.provider = provider
         self.config = config
         self.active_organization_id = config.get("active_organization_id")
         self.active_project_id = config.get("active_project_id")
         self.local_path = local_path
-        self.upload_delay = config.get("upload_delay", 0.5)
+        self.jobs = max(1, jobs or config.get("sync_jobs", 1))
         self.two_way_sync = config.get("two_way_sync", False)
-        self.max_retries = 3
-        self.retry_delay = 1
         self.compression_algorithm = config.get("compression_algorithm", "none")
         self.synced_files = {}
+        self.local_checksums = {}
+        self._remote_state = {}
+        # The algorithm packs are compressed with, resolved from "auto" on each sync.
+        self._pack_algorithm = self.compression_algorithm
+        self._compression_workers = 0
+        self._compression_executor = None
+        self.failures = []
+        self.manifest = manifest or SyncManifest.for_project(
+            config.get_local_path(), self.active_project_id
+        )
+        # Contents read by the local scan are reused by uploads, packing and token counting.
+        self.content_cache = content_cache or ContentCache.from_config(config)
+        # A progress bar shared with other syncs running at the same time, if any.
+        self.progress = progress
         self.anthropic_client = Anthropic()
 
-    def sync(self, local_files, remote_files):
+    def sync(self, local_files, remote_files, deleted_files=None):
+        """
+        Brings the remote project in line with the local files.
+
+        Args:
+            local_files (dict): Relative file paths mapped to the hashes of their content.
+            remote_files (list): The remote docs, see `fetch_remote_files`.
+            deleted_files (set, optional): Relative paths of deleted files. When given, only the
+                                           paths in `local_files` and `deleted_files` are synced, see
+                                           `plan`. Packed syncs always send every file.
+        """
         self.synced_files = {}  # Reset synced files at the start of sync
-        if self.compression_algorithm == "none":
-            self._sync_without_compression(local_files, remote_files)
-        else:
-            self._sync_with_compression(local_files, remote_files)
+        self.failures = []
+        self.local_checksums = local_files
+        complete = False
+        try:
+            if self.compression_algorithm == "none":
+                self.execute_plan(
+                    self.plan(local_files, remote_files, deleted_files), remote_files
+                )
+            else:
+                self._pack_algorithm = self._resolve_compression(local_files)
+                self._sync_with_compression(local_files, remote_files)
+            complete = not self.failures
+        finally:
+            self.manifest.mark_synced(complete, self._sync_settings())
+            self.manifest.save()
         self.log_token_count()
 
-    def _sync_without_compression(self, local_files, remote_files):
-        remote_files_to_delete = set(rf["file_name"] for rf in remote_files)
-        synced_files = set()
-
-        with tqdm(total=len(local_files), desc="Local → Remote") as pbar:
-            for local_file, local_checksum in local_files.items():
-                remote_file = next(
-                    (rf for rf in remote_files if rf["file_name"] == local_file), None
-                )
-                if remote_file:
-                    self.update_existing_file(
-                        local_file,
-                        local_checksum,
-                        remote_file,
-                        remote_files_to_delete,
-                        synced_files,
-                    )
-                else:
-                    self.upload_new_file(local_file, synced_files)
-                pbar.update(1)
+    def is_up_to_date(self, check_remote=True):
+        """
+        Returns True if the local files scanned and the sync settings are unchanged since the last
+        complete sync, so there is nothing to push. Two-way syncs always have to look at the remote
+        project.
+
+        Args:
+            check_remote (bool, optional): Whether the remote project is looked at again once
+                                           remote_check_interval seconds have passed since the last
+                                           sync, to catch docs changed on the remote side.
+        """
+        max_age = (
+            self.config.get("remote_check_interval", 600) if check_remote else None
+        )
+        return not self.two_way_sync and self.manifest.is_up_to_date(
+            self._sync_settings(), max_age
+        )
 
-        self.update_local_timestamps(remote_files, synced_files)
+    def _sync_settings(self):
+        # The settings that change what a sync does with the same local files.
+        return {
+            "compression_algorithm": self.compression_algorithm,
+            "prune_remote_files": bool(self.config.get("prune_remote_files")),
+            "compression_workers": bool(self.config.get("compression_workers", 0)),
+        }
+
+    def fetch_remote_files(self):
+        """
+        Lists the project's remote docs as compact records, see `BaseClaudeAIProvider.iter_files`.
+
+        Doc contents are only kept when a two-way sync may have to pull them, so listing a large
+        project does not require holding all of it in memory.
+        """
+        return list(
+            self.provider.iter_files(
+                self.active_organization_id,
+                self.active_project_id,
+                include_content=self.two_way_sync,
+                known_checksum=self.manifest.known_checksum,
+            )
+        )
 
-        if self.two_way_sync:
-            with tqdm(total=len(remote_files), desc="Local ← Remote") as pbar:
-                for remote_file in remote_files:
-                    self.sync_remote_to_local(
-                        remote_file, remote_files_to_delete, synced_files
-                    )
-                    pbar.update(1)
+    def plan(self, local_files, remote_files, deleted_files=None):
+        """
+        Plans a sync, see `build_sync_plan`.
+
+        When `deleted_files` is given, `local_files` is taken to be a change set: only the remote docs
+        named like a changed or deleted file are considered, and nothing is pulled.
+        """
+        two_way_sync = self.two_way_sync
+        if deleted_files is not None:
+            paths = set(local_files) | set(deleted_files)
+            remote_files = [rf for rf in remote_files if rf["file_name"] in paths]
+            two_way_sync = False
+        return build_sync_plan(
+            local_files,
+            remote_files,
+            self.local_path,
+            two_way_sync=two_way_sync,
+            prune_remote_files=self.config.get("prune_remote_files"),
+            known_checksum=self.manifest.known_checksum,
+        )
 
-        self.prune_remote_files(remote_files, remote_files_to_delete)
+    def preview(self, local_files, deleted_files=None):
+        """
+        Plans a sync against the remote state recorded by the last sync, without any network access.
+        """
+        return self.plan(local_files, self.manifest.remote_snapshot(), deleted_files)
+
+    def execute_plan(self, plan, remote_files):
+        self._remote_state = {
+            rf["uuid"]: {
+                "file_name": rf["file_name"],
+                "hash": plan.remote_checksums.get(rf["uuid"]),
+                "size": remote_size(rf),
+                "created_at": rf["created_at"],
+            }
+            for rf in remote_files
+        }
 
-        # Count tokens for synced files
-        for local_file in synced_files:
-            self.count_tokens_for_file(local_file)
+        for action in plan.get(SyncActionType.UNCHANGED):
+            self.manifest.set_remote_uuid(action.file_name, action.remote_file["uuid"])
 
-    def _sync_with_compression(self, local_files, remote_files):
-        packed_content = self._pack_files(local_files)
-        compressed_content = compress_content(
-            packed_content, self.compression_algorithm
+        if not self.config.get("prune_remote_files"):
+            logger.info("Remote pruning is not enabled.")
+        completed = self._run_remote_actions(
+            plan.get(
+                SyncActionType.UPLOAD, SyncActionType.REPLACE, SyncActionType.DELETE
+            )
         )
 
-        remote_file_name = (
-            f"claudesync_packed_{datetime.now().strftime('%Y%m%d%H%M%S')}.dat"
+        self.update_local_timestamps(
+            [
+                action.remote_file
+                for action in completed
+                if action.action_type is SyncActionType.REPLACE
+            ]
         )
-        self._upload_compressed_file(compressed_content, remote_file_name)
 
-        if self.two_way_sync:
-            remote_compressed_content = self._download_compressed_file()
-            if remote_compressed_content:
-                remote_packed_content = decompress_content(
-                    remote_compressed_content, self.compression_algorithm
+        pulls = plan.get(SyncActionType.PULL)
+        if pulls:
+            with tqdm(total=len(pulls), desc="Local ← Remote") as pbar:
+                for action in pulls:
+                    self.pull_remote_file(action.remote_file)
+                    pbar.update(1)
+
+        self._save_remote_state(remote_files)
+
+    def _run_remote_actions(self, actions, handlers=None):
+        """
+        Runs uploads, replacements and deletions on a pool of `self.jobs` workers.
+
+        Each action touches a single remote doc, so actions are independent of each other; the pace of
+        provider calls is governed by the shared rate limiter. Failed actions are collected in
+        `self.failures` instead of aborting the sync.
+
+        Args:
+            actions (list): The actions to run.
+            handlers (dict, optional): Functions running an action, by action type. Defaults to
+                                       syncing the local file the action names.
+
+        Returns:
+            list: The actions that completed successfully.
+        """
+        handlers = handlers or {
+            SyncActionType.UPLOAD: lambda action: self.upload_new_file(
+                action.file_name
+            ),
+            SyncActionType.REPLACE: lambda action: self.replace_remote_file(
+                action.file_name, action.remote_file
+            ),
+            SyncActionType.DELETE: lambda action: self.delete_remote_file(
+                action.remote_file
+            ),
+        }
+        completed = []
+        with self._progress_bar(len(actions)) as pbar:
+            with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+                futures = {
+                    executor.submit(handlers[action.action_type], action): action
+                    for action in actions
+                }
+                for future in as_completed(futures):
+                    action = futures[future]
+                    try:
+                        future.result()
+                        completed.append(action)
+                    except (ProviderError, OSError) as e:
+                        logger.debug(
+                            f"Failed to {action.action_type.value} {action.file_name}: {e}"
+                        )
+                        self.failures.append((action, e))
+                    pbar.set_postfix_str(action.file_name, refresh=False)
+                    pbar.update(1)
+        return completed
+
+    @contextmanager
+    def _progress_bar(self, total):
+        if self.progress is None:
+            with tqdm(total=total, desc="Local → Remote") as pbar:
+                yield pbar
+            return
+        with self.progress.get_lock():
+            self.progress.total += total
+        self.progress.refresh()
+        yield self.progress
+
+    def _save_remote_state(self, remote_files):
+        remote_by_uuid = {rf["uuid"]: rf for rf in remote_files}
+        for uuid, remote_file in self._remote_state.items():
+            if remote_file["hash"] is None:
+                remote_file["hash"] = remote_checksum(
+                    remote_by_uuid[uuid], self.manifest.known_checksum
                 )
-                self._unpack_files(remote_packed_content)
+        self.manifest.set_remote_files(self._remote_state)
+
+    def _resolve_compression(self, local_files):
+        """
+        Returns the algorithm to compress packs with.
+
+        For compression_algorithm "auto" the algorithm is chosen by `choose_algorithm` and recorded in
+        the manifest, and it is chosen again only once the content profile of the project changes.
+        """
+        if self.compression_algorithm != "auto":
+            return self.compression_algorithm
+        file_sizes = {}
+        for file_path in local_files:
+            entry = self.manifest.files.get(file_path)
+            if entry and entry.get("size") is not None:
+                file_sizes[file_path] = entry["size"]
+            else:
+                try:
+                    file_sizes[file_path] = os.path.getsize(
+                        os.path.join(self.local_path, file_path)
+                    )
+                except OSError:
+                    file_sizes[file_path] = 0
+        profile = content_profile(file_sizes)
+        algorithm = self.manifest.compression_for(profile)
+        if algorithm is None:
+            sample = sample_content(
+                local_files,
+                self._read_local_file,
+                self.config.get("compression_sample_size", 256 * 1024),
+            )
+            algorithm = choose_algorithm(
+                sample,
+                sum(file_sizes.values()),
+                self.config.get("compression_upload_rate", 1024 * 1024),
+            )
+            logger.debug(f"Chose {algorithm} compression for {profile}")
+            self.manifest.set_compression(profile, algorithm)
+        return algorithm
 
-        self._cleanup_old_remote_files(remote_files)
+    def _sync_with_compression(self, local_files, remote_files):
+        # With compression_workers set, packs are compressed as blocks on a pool of that many
+        # processes, see `compress_blocks`.
+        self._compression_workers = self.config.get("compression_workers", 0)
+        with block_executor(self._compression_workers) as executor:
+            self._compression_executor = executor
+            try:
+                self._sync_packs(local_files, remote_files)
+            finally:
+                self._compression_executor = None
+
+    def _sync_packs(self, local_files, remote_files):
+        """
+        Syncs the files as content-addressed packs, see `split_chunks`.
+
+        Only the chunks missing on the remote are compressed and uploaded, and the pack docs no
+        longer part of the project are deleted. In two-way mode, pack docs that were not uploaded by
+        this project's syncs are unpacked first and the files written join the local files, so their
+        contents are packed again before the foreign packs are deleted; the first sync with packs
+        only establishes which packs those are.
+        """
+        remote_packs = [rf for rf in remote_files if is_pack_file(rf["file_name"])]
+        own_packs = {
+            uuid
+            for uuid, remote_file in self.manifest.remote_files.items()
+            if is_pack_file(remote_file["file_name"])
+        }
+        if self.two_way_sync and own_packs:
+            local_files = dict(local_files)
+            self.local_checksums = local_files
+            for remote_file in remote_packs:
+                if remote_file["uuid"] not in own_packs and remote_file.get("content"):
+                    for file_path in decompress_files(
+                        self.local_path,
+                        remote_file["content"],
+                        self._pack_algorithm,
+                        local_files,
+                        self._compression_executor,
+                    ):
+                        self._record_unpacked_file(file_path)
+
+        chunks = {}
+        for entries in split_chunks(
+            self._pack_entries(local_files),
+            self.config.get("pack_chunk_size", 256 * 1024),
+        ):
+            # Only the index of a chunk is kept; its files are read again to upload it.
+            index = pack_index(entries)
+            name = pack_file_name(
+                iter_pack(index, {p: c for p, c, _ in entries}.__getitem__),
+                self._pack_algorithm,
+            )
+            chunks[name] = index
+
+        self._remote_state = {
+            rf["uuid"]: {
+                "file_name": rf["file_name"],
+                "hash": None,
+                "size": remote_size(rf),
+                "created_at": rf["created_at"],
+            }
+            for rf in remote_packs
+            if rf["file_name"] in chunks
+        }
+        remote_names = {rf["file_name"] for rf in remote_packs}
+        actions = [
+            SyncAction(SyncActionType.UPLOAD, name)
+            for name in chunks
+            if name not in remote_names
+        ] + [
+            SyncAction(SyncActionType.DELETE, rf["file_name"], remote_file=rf)
+            for rf in remote_packs
+            if rf["file_name"] not in chunks
+        ]
+        logger.debug(f"{len(chunks)} packs, {len(actions)} to upload or delete")
+        self._run_remote_actions(
+            actions,
+            {
+                SyncActionType.UPLOAD: lambda action: self._upload_pack(
+                    action.file_name, chunks[action.file_name]
+                ),
+                SyncActionType.DELETE: lambda action: self._delete_pack(
+                    action.remote_file
+                ),
+            },
+        )
+        self.manifest.set_remote_files(self._remote_state)
 
-        # Count tokens for all local files (since they're all included in the compressed file)
+        # Count tokens for all local files (since they're all included in the packs)
         for local_file in local_files:
             self.count_tokens_for_file(local_file)
 
-    def _pack_files(self, local_files):
-        packed_content = io.StringIO()
-        for file_path, file_hash in local_files.items():
-            full_path = os.path.join(self.local_path, file_path)
-            with open(full_path, "r", encoding="utf-8") as f:
-                content = f.read()
-            packed_content.write(f"--- BEGIN FILE: {file_path} ---\n")
-            packed_content.write(content)
-            packed_content.write(f"\n--- END FILE: {file_path} ---\n")
-        return packed_content.getvalue()
-
-    @retry_on_403()
-    def _upload_compressed_file(self, compressed_content, file_name):
-        logger.debug(f"Uploading compressed file {file_name} to remote...")
-        self.provider.upload_file(
+    def _record_unpacked_file(self, file_path):
+        full_path = os.path.join(self.local_path, file_path)
+        stat_result = os.stat(full_path)
+        file_hash = compute_md5_hash(self._read_local_file(file_path))
+        self.local_checksums[file_path] = file_hash
+        self.manifest.record_scan(file_path, stat_result, file_hash)
+
+    def _pack_entries(self, local_files):
+        for file_path in sorted(local_files):
+            yield file_path, self._read_local_file(file_path), local_files[file_path]
+
+    def _upload_pack(self, file_name, index):
+        logger.debug(f"Uploading pack {file_name} to remote...")
+        if self._compression_workers:
+            compressed_content = compress_blocks(
+                "".join(iter_pack(index, self._read_local_file)),
+                self._pack_algorithm,
+                self.config.get("compression_block_size", DEFAULT_BLOCK_SIZE),
+                self._compression_executor,
+                record_algorithm=True,
+            )
+        else:
+            with compress_stream(
+                iter_pack(index, self._read_local_file),
+                self._pack_algorithm,
+                self.config.get("compression_memory_limit", DEFAULT_MEMORY_LIMIT),
+                record_algorithm=True,
+            ) as compressed:
+                compressed_content = compressed.read().decode("utf-8")
+        response = self.provider.upload_file(
             self.active_organization_id,
             self.active_project_id,
             file_name,
             compressed_content,
         )
-        time.sleep(self.upload_delay)
-
-    @retry_on_403()
-    def _download_compressed_file(self):
-        logger.debug("Downloading latest compressed file from remote...")
-        remote_files = self.provider.list_files(
-            self.active_organization_id, self.active_project_id
+        if isinstance(response, dict) and response.get("uuid"):
+            self._remote_state[response["uuid"]] = {
+                "file_name": file_name,
+                "hash": None,
+                "size": len(compressed_content),
+                "created_at": response.get("created_at"),
+            }
+
+    def _delete_pack(self, remote_file):
+        logger.debug(f"Deleting pack {remote_file['file_name']} from remote...")
+        self.provider.delete_file(
+            self.active_organization_id, self.active_project_id, remote_file["uuid"]
         )
-        compressed_files = [
-            rf
-            for rf in remote_files
-            if rf["file_name"].startswith("claudesync_packed_")
-        ]
-        if compressed_files:
-            latest_file = max(compressed_files, key=lambda x: x["file_name"])
-            return latest_file["content"]
-        return None
-
-    def _unpack_files(self, packed_content):
-        current_file = None
-        current_content = io.StringIO()
-
-        for line in packed_content.splitlines():
-            if line.startswith("--- BEGIN FILE:"):
-                if current_file:
-                    self._write_file(current_file, current_content.getvalue())
-                    current_content = io.StringIO()
-                current_file = line.split("--- BEGIN FILE:")[1].strip()
-            elif line.startswith("--- END FILE:"):
-                if current_file:
-                    self._write_file(current_file, current_content.getvalue())
-                    current_file = None
-                    current_content = io.StringIO()
-            else:
-                current_content.write(line + "\n")
-
-        if current_file:
-            self._write_file(current_file, current_content.getvalue())
 
-    def _write_file(self, file_path, content):
-        full_path = os.path.join(self.local_path, file_path)
-        os.makedirs(os.path.dirname(full_path), exist_ok=True)
-        with open(full_path, "w", encoding="utf-8") as f:
-            f.write(content)
-
-    def _cleanup_old_remote_files(self, remote_files):
-        for remote_file in remote_files:
-            if remote_file["file_name"].startswith("claudesync_packed_"):
-                self.provider.delete_file(
-                    self.active_organization_id,
-                    self.active_project_id,
-                    remote_file["uuid"],
-                )
-
-    @retry_on_403()
-    def update_existing_file(
-        self,
-        local_file,
-        local_checksum,
-        remote_file,
-        remote_files_to_delete,
-        synced_files,
-    ):
-        remote_content = remote_file["content"]
-        remote_checksum = compute_md5_hash(remote_content)
-        if local_checksum != remote_checksum:
-            logger.debug(f"Updating {local_file} on remote...")
-            with tqdm(total=2, desc=f"Updating {local_file}", leave=False) as pbar:
-                self.provider.delete_file(
-                    self.active_organization_id,
-                    self.active_project_id,
-                    remote_file["uuid"],
-                )
-                pbar.update(1)
-                with open(
-                    os.path.join(self.local_path, local_file), "r", encoding="utf-8"
-                ) as file:
-                    content = file.read()
-                self.provider.upload_file(
-                    self.active_organization_id,
-                    self.active_project_id,
-                    local_file,
-                    content,
-                )
-                pbar.update(1)
-            time.sleep(self.upload_delay)
-            synced_files.add(local_file)
-        remote_files_to_delete.remove(local_file)
+    def replace_remote_file(self, local_file, remote_file):
+        logger.debug(f"Updating {local_file} on remote...")
+        self.provider.delete_file(
+            self.active_organization_id,
+            self.active_project_id,
+            remote_file["uuid"],
+        )
+        self._remote_state.pop(remote_file["uuid"], None)
+        content = self._read_local_file(local_file)
+        response = self.provider.upload_file(
+            self.active_organization_id,
+            self.active_project_id,
+            local_file,
+            content,
+        )
+        self._record_upload(local_file, response, content)
 
-    @retry_on_403()
-    def upload_new_file(self, local_file, synced_files):
+    def upload_new_file(self, local_file):
         logger.debug(f"Uploading new file {local_file} to remote...")
-        with open(
-            os.path.join(self.local_path, local_file), "r", encoding="utf-8"
-        ) as file:
-            content = file.read()
-        with tqdm(total=1, desc=f"Uploading {local_file}", leave=False) as pbar:
-            self.provider.upload_file(
-                self.active_organization_id, self.active_project_id, local_file, content
-            )
-            pbar.update(1)
-        time.sleep(self.upload_delay)
-        synced_files.add(local_file)
-
-    def update_local_timestamps(self, remote_files, synced_files):
+        content = self._read_local_file(local_file)
+        response = self.provider.upload_file(
+            self.active_organization_id, self.active_project_id, local_file, content
+        )
+        self._record_upload(local_file, response, content)
+
+    def _read_local_file(self, local_file):
+        return self.content_cache.read(os.path.join(self.local_path, local_file))
+
+    def _record_upload(self, local_file, response, content):
+        if isinstance(response, dict) and response.get("uuid"):
+            self.manifest.set_remote_uuid(local_file, response["uuid"])
+            self._remote_state[response["uuid"]] = {
+                "file_name": local_file,
+                "hash": self.local_checksums.get(local_file),
+                "size": len(content),
+                "created_at": response.get("created_at"),
+            }
+        self.count_tokens_for_file(local_file, content)
+
+    def update_local_timestamps(self, remote_files):
         for remote_file in remote_files:
-            if remote_file["file_name"] in synced_files:
-                local_file_path = os.path.join(
-                    self.local_path, remote_file["file_name"]
+            local_file_path = os.path.join(self.local_path, remote_file["file_name"])
+            if os.path.exists(local_file_path):
+                remote_timestamp = datetime.fromisoformat(
+                    remote_file["created_at"].replace("Z", "+00:00")
+                ).timestamp()
+                os.utime(local_file_path, (remote_timestamp, remote_timestamp))
+                self.manifest.refresh_stat(
+                    remote_file["file_name"], os.stat(local_file_path)
                 )
-                if os.path.exists(local_file_path):
-                    remote_timestamp = datetime.fromisoformat(
-                        remote_file["created_at"].replace("Z", "+00:00")
-                    ).timestamp()
-                    os.utime(local_file_path, (remote_timestamp, remote_timestamp))
-                    logger.debug(f"Updated timestamp on local file {local_file_path}")
-
-    def sync_remote_to_local(self, remote_file, remote_files_to_delete, synced_files):
+                logger.debug(f"Updated timestamp on local file {local_file_path}")
+
+    def pull_remote_file(self, remote_file):
         local_file_path = os.path.join(self.local_path, remote_file["file_name"])
         if os.path.exists(local_file_path):
-            self.update_existing_local_file(
-                local_file_path, remote_file, remote_files_to_delete, synced_files
+            logger.debug(
+                f"Updating local file {remote_file['file_name']} from remote..."
             )
         else:
-            self.create_new_local_file(
-                local_file_path, remote_file, remote_files_to_delete, synced_files
-            )
-
-    def update_existing_local_file(
-        self, local_file_path, remote_file, remote_files_to_delete, synced_files
-    ):
-        local_mtime = datetime.fromtimestamp(
-            os.path.getmtime(local_file_path), tz=timezone.utc
-        )
-        remote_mtime = datetime.fromisoformat(
-            remote_file["created_at"].replace("Z", "+00:00")
-        )
-        if remote_mtime > local_mtime:
             logger.debug(
-                f"Updating local file {remote_file['file_name']} from remote..."
+                f"Creating new local file {remote_file['file_name']} from remote..."
             )
-            content = remote_file["content"]
-            with open(local_file_path, "w", encoding="utf-8") as file:
-                file.write(content)
-            synced_files.add(remote_file["file_name"])
-            if remote_file["file_name"] in remote_files_to_delete:
-                remote_files_to_delete.remove(remote_file["file_name"])
-
-    def create_new_local_file(
-        self, local_file_path, remote_file, remote_files_to_delete, synced_files
-    ):
-        logger.debug(
-            f"Creating new local file {remote_file['file_name']} from remote..."
-        )
         content = remote_file["content"]
-        with tqdm(
-            total=1, desc=f"Creating {remote_file['file_name']}", leave=False
-        ) as pbar:
-            with open(local_file_path, "w", encoding="utf-8") as file:
-                file.write(content)
-            pbar.update(1)
-        synced_files.add(remote_file["file_name"])
-        if remote_file["file_name"] in remote_files_to_delete:
-            remote_files_to_delete.remove(remote_file["file_name"])
-
-    def prune_remote_files(self, remote_files, remote_files_to_delete):
-        if not self.config.get("prune_remote_files"):
-            logger.info("Remote pruning is not enabled.")
-            return
+        os.makedirs(os.path.dirname(local_file_path), exist_ok=True)
+        with open(local_file_path, "w", encoding="utf-8") as file:
+            file.write(content)
+        self.count_tokens_for_file(remote_file["file_name"], content)
 
-        for file_to_delete in list(remote_files_to_delete):
-            self.delete_remote_files(file_to_delete, remote_files)
-
-    @retry_on_403()
-    def delete_remote_files(self, file_to_delete, remote_files):
+    def delete_remote_file(self, remote_file):
+        file_to_delete = remote_file["file_name"]
         logger.debug(f"Deleting {file_to_delete} from remote...")
-        remote_file = next(
-            rf for rf in remote_files if rf["file_name"] == file_to_delete
+        self.provider.delete_file(
+            self.active_organization_id, self.active_project_id, remote_file["uuid"]
         )
-        with tqdm(total=1, desc=f"Deleting {file_to_delete}", leave=False) as pbar:
-            self.provider.delete_file(
-                self.active_organization_id, self.active_project_id, remote_file["uuid"]
-            )
-            pbar.update(1)
-        time.sleep(self.upload_delay)
-
-    def count_tokens_for_file(self, file_path):
-        full_path = os.path.join(self.local_path, file_path)
-        with open(full_path, "r", encoding="utf-8", errors="ignore") as file:
-            content = file.read()
-        token_count = self.anthropic_client.count_tokens(content)
+        self._remote_state.pop(remote_file["uuid"], None)
+        if file_to_delete not in self.local_checksums:
+            self.manifest.forget(file_to_delete)
+
+    def count_tokens_for_file(self, file_path, content=None):
+        file_hash = self.local_checksums.get(file_path)
+        token_count = self.manifest.get_token_count(file_path, file_hash)
+        if token_count is None:
+            if content is None:
+                try:
+                    content = self._read_local_file(file_path)
+                except UnicodeDecodeError:
+                    full_path = os.path.join(self.local_path, file_path)
+                    with open(
+                        full_path, "r", encoding="utf-8", errors="ignore"
+                    ) as file:
+                        content = file.read()
+            token_count = self.anthropic_client.count_tokens(content)
+            self.manifest.set_token_count(file_path, file_hash, token_count)
         self.synced_files[file_path] = token_count
 
     def get_total_token_count(self):
@@ -0,0 +1,193 @@
+import os
+from datetime import datetime, timezone
+from enum import Enum
+
+from claudesync.utils import compute_md5_hash
+
+
+class SyncActionType(Enum):
+    UPLOAD = "upload"
+    REPLACE = "replace"
+    DELETE = "delete"
+    PULL = "pull"
+    UNCHANGED = "unchanged"
+
+
+class SyncAction:
+    """
+    A single step of a sync plan.
+
+    Attributes:
+        action_type (SyncActionType): What has to happen to the file.
+        file_name (str): Path of the file relative to the project root.
+        local_checksum (str or None): Hash of the local content, if the file exists locally.
+        remote_file (dict or None): The remote doc the action applies to, if any.
+    """
+
+    def __init__(self, action_type, file_name, local_checksum=None, remote_file=None):
+        self.action_type = action_type
+        self.file_name = file_name
+        self.local_checksum = local_checksum
+        self.remote_file = remote_file
+
+    def __repr__(self):
+        return f"SyncAction({self.action_type.value}, {self.file_name!r})"
+
+
+class SyncPlan:
+    """
+    The complete set of actions needed to bring a remote project in line with the local files.
+
+    A plan is built without any network access and is then handed to `SyncManager.execute_plan`,
+    which performs the provider calls.
+    """
+
+    def __init__(self):
+        self.actions = []
+        self.remote_checksums = {}
+
+    def add(self, action_type, file_name, local_checksum=None, remote_file=None):
+        action = SyncAction(action_type, file_name, local_checksum, remote_file)
+        self.actions.append(action)
+        return action
+
+    def get(self, *action_types):
+        """Returns the actions of the given types, in plan order."""
+        return [a for a in self.actions if a.action_type in action_types]
+
+    def counts(self):
+        """Returns the number of actions per action type."""
+        counts = {action_type: 0 for action_type in SyncActionType}
+        for action in self.actions:
+            counts[action.action_type] += 1
+        return counts
+
+    def has_changes(self):
+        return any(a.action_type is not SyncActionType.UNCHANGED for a in self.actions)
+
+    def describe(self):
+        """
+        Renders the plan as human-readable lines, one per changed file followed by a summary.
+
+        Returns:
+            list: The lines describing the plan.
+        """
+        lines = [
+            f"  {action.action_type.value:<8} {action.file_name}"
+            for action in self.actions
+            if action.action_type is not SyncActionType.UNCHANGED
+        ]
+        counts = self.counts()
+        lines.append(
+            ", ".join(
+                f"{counts[action_type]} to {action_type.value}"
+                for action_type in SyncActionType
+                if action_type is not SyncActionType.UNCHANGED
+            )
+            + f", {counts[SyncActionType.UNCHANGED]} unchanged"
+        )
+        return lines
+
+
+def remote_checksum(remote_file, known_checksum=None):
+    """
+    Returns the content hash of a remote doc.
+
+    Listings that already carry a precomputed `checksum` are used as is. Otherwise the hash is looked
+    up with `known_checksum`, if given, and only computed from the doc's content as a last resort.
+    """
+    checksum = remote_file.get("checksum")
+    if checksum is None and known_checksum is not None:
+        checksum = known_checksum(remote_file)
+    if checksum is None:
+        checksum = compute_md5_hash(remote_file["content"])
+    return checksum
+
+
+def remote_size(remote_file):
+    """Returns the size of a remote doc's content in characters, or None if it is not known."""
+    if "size" in remote_file:
+        return remote_file["size"]
+    if "content" in remote_file:
+        return len(remote_file["content"])
+    return None
+
+
+def _remote_is_newer(remote_file, local_file_path):
+    if not remote_file.get("created_at"):
+        return False
+    remote_mtime = datetime.fromisoformat(
+        remote_file["created_at"].replace("Z", "+00:00")
+    )
+    local_mtime = datetime.fromtimestamp(
+        os.path.getmtime(local_file_path), tz=timezone.utc
+    )
+    return remote_mtime > local_mtime
+
+
+def build_sync_plan(
+    local_files,
+    remote_files,
+    local_path,
+    two_way_sync=False,
+    prune_remote_files=False,
+    known_checksum=None,
+):
+    """
+    Compares local and remote files and decides what has to be uploaded, replaced, pulled or deleted.
+
+    Remote docs are indexed by file name once, so planning runs in time linear in the number of local
+    and remote files. Remote content is only hashed for files that exist on both sides.
+
+    Args:
+        local_files (dict): Relative file paths mapped to the hashes of their local content.
+        remote_files (list): Remote docs as returned by the provider's `iter_files`.
+        local_path (str): The base directory of the local project, used for two-way sync decisions.
+        two_way_sync (bool, optional): Whether remote-only files should be pulled to the local project.
+        prune_remote_files (bool, optional): Whether remote files without a local counterpart are deleted.
+        known_checksum (callable, optional): Returns the memoized hash of a remote doc, or None, so
+                                             that remote content is not hashed again on every sync.
+
+    Returns:
+        SyncPlan: The plan describing every file involved in the sync.
+    """
+    plan = SyncPlan()
+    remote_by_name = {}
+    duplicates = []
+    for remote_file in remote_files:
+        if remote_file["file_name"] in remote_by_name:
+            duplicates.append(remote_file)
+        else:
+            remote_by_name[remote_file["file_name"]] = remote_file
+
+    for file_name, local_checksum in local_files.items():
+        remote_file = remote_by_name.pop(file_name, None)
+        if remote_file is None:
+            plan.add(SyncActionType.UPLOAD, file_name, local_checksum)
+            continue
+
+        checksum = remote_checksum(remote_file, known_checksum)
+        plan.remote_checksums[remote_file["uuid"]] = checksum
+        if checksum == local_checksum:
+            plan.add(SyncActionType.UNCHANGED, file_name, local_checksum, remote_file)
+        else:
+            plan.add(SyncActionType.REPLACE, file_name, local_checksum, remote_file)
+
+    for file_name, remote_file in remote_by_name.items():
+        if two_way_sync:
+            local_file_path = os.path.join(local_path, file_name)
+            if not os.path.exists(local_file_path) or _remote_is_newer(
+                remote_file, local_file_path
+            ):
+                plan.add(SyncActionType.PULL, file_name, remote_file=remote_file)
+                continue
+        if prune_remote_files:
+            plan.add(SyncActionType.DELETE, file_name, remote_file=remote_file)
+
+    if prune_remote_files:
+        for remote_file in duplicates:
+            plan.add(
+                SyncActionType.DELETE, remote_file["file_name"], remote_file=remote_file
+            )
+
+    return plan
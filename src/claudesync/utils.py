@@ -1,13 +1,27 @@
 import os
+import codecs
+import stat
+import subprocess
 import hashlib
-from functools import wraps
+import mmap
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial, wraps
 from pathlib import Path
 
 import click
 import pathspec
 import logging
 
+from claudesync.configmanager import InMemoryConfigManager
 from claudesync.exceptions import ConfigurationError, ProviderError
+from claudesync.fingerprint import tree_fingerprint
+from claudesync.ignore import IgnoreMatcher
 from claudesync.provider_factory import get_provider
 
 logger = logging.getLogger(__name__)
@@ -96,7 +110,13 @@ def compute_md5_hash(content):
 
 
 def should_process_file(
-    config_manager, file_path, filename, gitignore, base_path, claudeignore
+    config_manager,
+    file_path,
+    filename,
+    gitignore,
+    base_path,
+    claudeignore,
+    check_content=True,
 ):
     """
     Determines whether a file should be processed based on various criteria.
@@ -114,6 +134,8 @@ def should_process_file(
         gitignore (pathspec.PathSpec or None): A PathSpec object containing .gitignore patterns, if available.
         base_path (str): The base directory path of the project.
         claudeignore (pathspec.PathSpec or None): A PathSpec object containing .claudeignore patterns, if available.
+        check_content (bool, optional): Whether to open the file to verify it is a text file. Callers that read
+                                        the file anyway pass False and check the content themselves.
 
     Returns:
         bool: True if the file should be processed, False otherwise.
@@ -138,7 +160,7 @@ def should_process_file(
         return False
 
     # Check if it's a text file
-    return is_text_file(file_path)
+    return not check_content or is_text_file(file_path)
 
 
 def process_file(file_path):
@@ -166,33 +188,847 @@ def process_file(file_path):
     return None
 
 
-def get_local_files(config, local_path, category=None, include_submodules=False):
+# Files at least this large are memory-mapped instead of read into a buffer.
+_MMAP_MIN_SIZE = 1024 * 1024
+# Size of the slices text detection decodes at a time, bounding the memory it needs.
+_DECODE_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_text_file(file_path, sample_size=8192, content_cache=None):
+    """
+    Reads a file once, checks that it is UTF-8 text and computes the MD5 hash of its content.
+
+    This combines `is_text_file` and `process_file` so that each file is opened a single time. The
+    content is hashed exactly as `process_file` would hash it, i.e. after universal newline translation.
+    Text detection and hashing work on the same buffer; files of 1 MiB or more are memory-mapped rather
+    than copied into memory, and are validated in slices so that no full decoded copy is built.
+
+    Args:
+        file_path (str): The path to the file to be hashed.
+        sample_size (int, optional): The number of leading bytes checked for null bytes. Defaults to 8192.
+        content_cache (ContentCache, optional): Cache the decoded content of text files below 1 MiB is
+                                                stored in, so later stages of a sync need not read them.
+
+    Returns:
+        str or None: The MD5 hash of the file's content, or None if the file is binary or not UTF-8 text.
+    """
+    try:
+        with open(file_path, "rb") as file:
+            stat_result = os.fstat(file.fileno())
+            if stat_result.st_size >= _MMAP_MIN_SIZE:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    return _hash_text_bytes(file_path, data, sample_size)[0]
+            file_hash, content = _hash_text_bytes(
+                file_path, file.read(), sample_size, decode=content_cache is not None
+            )
+    except (IOError, ValueError) as e:
+        logger.error(f"Error reading file {file_path}: {str(e)}")
+        return None
+    if content is not None:
+        content_cache.put(file_path, stat_result, content)
+    return file_hash
+
+
+def _hash_text_bytes(file_path, data, sample_size, decode=False):
+    # Returns the hash and, if `decode` is set, the decoded content with newlines translated.
+    if data.find(b"\x00", 0, sample_size) != -1:
+        return None, None
+    content = None
+    try:
+        if decode:
+            content = str(data, "utf-8")
+        else:
+            decoder = codecs.getincrementaldecoder("utf-8")()
+            with memoryview(data) as view:
+                for offset in range(0, len(data), _DECODE_CHUNK_SIZE):
+                    decoder.decode(view[offset : offset + _DECODE_CHUNK_SIZE])
+            decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        logger.debug(f"Unable to read {file_path} as UTF-8 text. Skipping.")
+        return None, None
+    # CR and LF never occur inside multi-byte UTF-8 sequences, so translating newlines on the raw
+    # bytes hashes the same as translating the decoded text.
+    if data.find(b"\r") != -1:
+        data = bytes(data).replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+        if content is not None:
+            content = content.replace("\r\n", "\n").replace("\r", "\n")
+    return hashlib.md5(data).hexdigest(), content
+
+
+def hash_files(file_paths, jobs=None, use_processes=False, content_cache=None):
+    """
+    Hashes many files concurrently with `hash_text_file`.
+
+    MD5 releases the GIL while hashing, so a thread pool keeps several cores busy for small and
+    medium workloads. For large trees a process pool also parallelizes the text detection, which
+    holds the GIL; if processes cannot be started, threads are used instead.
+
+    Args:
+        file_paths (list): The paths of the files to hash.
+        jobs (int, optional): Number of workers. Defaults to the number of CPUs.
+        use_processes (bool, optional): Whether to hash in worker processes instead of threads.
+        content_cache (ContentCache, optional): Cache filled with the contents read. Contents read in
+                                                worker processes are not cached.
+
+    Returns:
+        list: The hash of every file, or None for files that are not UTF-8 text, in the order of
+              `file_paths`.
+    """
+    file_paths = list(file_paths)
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(file_paths) or 1))
+    hash_file = partial(hash_text_file, content_cache=content_cache)
+    if jobs == 1:
+        return [hash_file(path) for path in file_paths]
+    if use_processes:
+        try:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                # Batch the paths so that inter-process overhead stays small next to the hashing.
+                chunksize = max(1, len(file_paths) // (jobs * 4))
+                return list(
+                    executor.map(hash_text_file, file_paths, chunksize=chunksize)
+                )
+        except (OSError, NotImplementedError, BrokenProcessPool) as e:
+            logger.debug(f"Unable to hash in worker processes, using threads: {e}")
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(hash_file, file_paths))
+
+
+_EXCLUDE_DIRS = {
+    ".git",
+    ".svn",
+    ".hg",
+    ".bzr",
+    "_darcs",
+    "CVS",
+    "claude_chats",
+    ".claudesync",
+}
+
+
+class _DirectoryScanner:
+    """
+    Scans one directory of a project per call, so that directories can be scanned concurrently.
+
+    Entries are filtered by the `IgnoreMatcher` on their path alone, then by size using the stat
+    information cached on their `os.DirEntry`. Ignored subdirectories are pruned before they are
+    handed back for scanning. Accepted files are looked up in the manifest; hashing the others is left
+    to `hash_files`. Files named like one of `detect_filenames` that are not ignored are recorded in
+    `markers` as (rel_dir, filename) pairs, whatever the category, for `detect_submodules`.
+    """
+
+    def __init__(
+        self,
+        local_path,
+        max_file_size,
+        matcher,
+        manifest,
+        detect_filenames=(),
+        collect_files=True,
+    ):
+        self.local_path = local_path
+        self.max_file_size = max_file_size
+        self.matcher = matcher
+        self.manifest = manifest
+        self.detect_filenames = frozenset(detect_filenames)
+        self.collect_files = collect_files
+        self.markers = []
+
+    def scan(self, rel_root):
+        """
+        Lists a directory and collects the files in it that pass the filters.
+
+        Args:
+            rel_root (str): Path of the directory relative to the project root, "" for the root.
+
+        Returns:
+            tuple: (subdirs, results). `subdirs` lists the relative paths of the subdirectories to scan
+                   next; `results` lists (rel_path, full_path, stat_result, file_hash, known)
+                   tuples, where `known` tells whether `file_hash` was found in the manifest.
+        """
+        subdirs, results = [], []
+        try:
+            with os.scandir(os.path.join(self.local_path, rel_root)) as it:
+                entries = list(it)
+        except OSError as e:
+            logger.warning(f"Unable to scan {rel_root or self.local_path}: {str(e)}")
+            return subdirs, results
+
+        self.matcher.enter_directory(
+            rel_root, has_gitignore=any(e.name == ".gitignore" for e in entries)
+        )
+        for entry in entries:
+            rel_path = os.path.join(rel_root, entry.name)
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                continue
+            if is_dir:
+                # Like os.walk, do not follow symlinks to directories.
+                if not entry.is_symlink() and not self.matcher.is_ignored_dir(rel_path):
+                    subdirs.append(rel_path)
+                continue
+
+            if entry.name in self.detect_filenames:
+                self._detect(rel_root, entry.name)
+            if not self.collect_files or self.matcher.is_ignored_file(rel_path):
+                continue
+            try:
+                stat_result = entry.stat()
+            except OSError as e:
+                logger.debug(f"Unable to stat {entry.path}: {str(e)}")
+                continue
+            if stat_result.st_size > self.max_file_size:
+                continue
+            results.append(self._lookup(rel_path, entry.path, stat_result))
+        return subdirs, results
+
+    def check_git_file(self, git_entry):
+        """
+        Filters a file listed by git, the counterpart of `scan` for `_list_git_files` entries.
+
+        Args:
+            git_entry (tuple): (rel_path, blob) as returned by `_list_git_files`.
+
+        Returns:
+            tuple or None: A result as listed by `scan`, or None if the file is skipped. The stat is
+                           None for files whose hash was found in the manifest by their blob.
+        """
+        rel_path, blob = git_entry
+        parent, name = os.path.split(rel_path)
+        if parent and self.matcher.is_ignored_dir(parent):
+            return None
+        if name in self.detect_filenames:
+            self._detect(parent, name)
+        if not self.collect_files or self.matcher.is_ignored_file(rel_path):
+            return None
+        full_path = os.path.join(self.local_path, rel_path)
+        if blob is not None and self.manifest is not None:
+            known, file_hash, size = self.manifest.lookup_blob(rel_path, blob)
+            if known:
+                if size > self.max_file_size:
+                    return None
+                return rel_path, full_path, None, file_hash, True
+        try:
+            stat_result = os.stat(full_path)
+        except OSError:
+            # Deleted from the working tree but still in the index.
+            return None
+        if not stat.S_ISREG(stat_result.st_mode):
+            return None
+        if stat_result.st_size > self.max_file_size:
+            return None
+        return self._lookup(rel_path, full_path, stat_result)
+
+    def _detect(self, rel_dir, name):
+        if not self.matcher.is_ignored_file(
+            os.path.join(rel_dir, name), check_category=False
+        ):
+            self.markers.append((rel_dir, name))
+
+    def _lookup(self, rel_path, full_path, stat_result):
+        if self.manifest is not None:
+            known, file_hash = self.manifest.lookup(rel_path, stat_result)
+            if known:
+                return rel_path, full_path, stat_result, file_hash, True
+        return rel_path, full_path, stat_result, None, False
+
+
+def _scan_tree(scanner, jobs, roots=("",)):
+    # Breadth-first walk: every directory is scanned as a separate task, and the subdirectories it
+    # reports are submitted as soon as it completes.
+    results = []
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        pending = {executor.submit(scanner.scan, root) for root in roots}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                subdirs, dir_results = future.result()
+                results.extend(dir_results)
+                pending.update(executor.submit(scanner.scan, d) for d in subdirs)
+    return results
+
+
+def _run_git(local_path, *args):
+    return subprocess.run(
+        ["git", "-C", local_path, *args],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        check=True,
+    ).stdout
+
+
+def _list_git_files(local_path):
+    """
+    Lists the files of a git working tree from its index, without walking the tree.
+
+    Only local git commands are run: tracked files come from `git ls-files -s`, untracked files that
+    are not ignored from `git ls-files --others --exclude-standard`, and the tracked files whose
+    working tree copy differs from the index from `git diff-files`. Tracked files that match a
+    `.gitignore` are left out, listed by `git ls-files --cached --ignored --exclude-standard`, as a
+    walk of the tree would skip them. The files of nested repositories, whether git submodules or
+    untracked, are not in the index; their directories are returned to be walked instead.
+
+    Args:
+        local_path (str): The project root.
+
+    Returns:
+        tuple or None: (files, nested_repos). `files` lists (rel_path, blob) tuples, where `blob` is
+                       the object id of the indexed content if the file is tracked and unmodified,
+                       else None; `nested_repos` lists the relative paths of the directories of
+                       nested repositories. None if `local_path` is not the root of a git working
+                       tree or git is not available.
+    """
+    try:
+        toplevel = _run_git(local_path, "rev-parse", "--show-toplevel").decode().strip()
+        if not toplevel or not os.path.samefile(toplevel, local_path):
+            return None
+        cached = _run_git(local_path, "ls-files", "-s", "-z")
+        others = _run_git(
+            local_path, "ls-files", "-z", "--others", "--exclude-standard"
+        )
+        modified = _run_git(local_path, "diff-files", "--name-only", "-z")
+        ignored = _ignored_tracked_files(local_path)
+    except (OSError, subprocess.CalledProcessError) as e:
+        logger.debug(f"Not using the git index of {local_path}: {e}")
+        return None
+
+    def paths(output):
+        return [os.fsdecode(p).replace("/", os.sep) for p in output.split(b"\0") if p]
+
+    modified = set(paths(modified))
+    entries, nested_repos = {}, set()
+    for record in cached.split(b"\0"):
+        if not record:
+            continue
+        info, _, path = record.partition(b"\t")
+        mode, blob, stage = info.split(b" ")
+        rel_path = os.fsdecode(path).replace("/", os.sep)
+        if mode == b"160000":
+            # Nested repositories are tracked as a commit, not as files.
+            nested_repos.add(rel_path)
+            continue
+        if rel_path in ignored:
+            continue
+        if stage != b"0" or rel_path in modified or rel_path in entries:
+            entries[rel_path] = None
+        else:
+            entries[rel_path] = blob.decode()
+    for rel_path in paths(others):
+        # Untracked nested repositories are listed as directories.
+        if rel_path.endswith(os.sep):
+            nested_repos.add(rel_path.rstrip(os.sep))
+        else:
+            entries.setdefault(rel_path, None)
+    return list(entries.items()), sorted(nested_repos)
+
+
+def _ignored_tracked_files(local_path):
+    # Tracked files that match a .gitignore, which git lists even though they are ignored.
+    ignored = _run_git(
+        local_path, "ls-files", "-z", "--cached", "--ignored", "--exclude-standard"
+    )
+    return {os.fsdecode(p).replace("/", os.sep) for p in ignored.split(b"\0") if p}
+
+
+def get_local_files(
+    config,
+    local_path,
+    category=None,
+    include_submodules=False,
+    manifest=None,
+    content_cache=None,
+):
     """
     Retrieves a dictionary of local files within a specified path, applying various filters.
 
+    Directories are listed with `os.scandir` by a pool of `scan_jobs` threads, walking the tree
+    breadth-first so that the latency of listing and stat calls overlaps, which matters most on
+    network filesystems and large checkouts. Paths are filtered by an `IgnoreMatcher` combining the
+    category patterns with every .gitignore and the .claudeignore, and ignored directories are pruned
+    before they are listed.
+    In the root of a git working tree the file list is taken from the git index instead, unless
+    `use_git_index` is disabled, and tracked files git reports as unmodified are matched to their
+    recorded hash by blob id. The directories of nested repositories, which the index does not
+    cover, are walked.
+    The `tree_fingerprint` of the files found is recorded in the manifest, which lets a sync that
+    has nothing to do stop before any network access.
+    Files that have to be read are then hashed by `hash_files` with `hash_jobs` workers (all CPUs by
+    default), in worker processes once there are at least `hash_process_min_files` of them.
+
     Args:
         config: config manager to use
         local_path (str): The base directory path to search for files.
         category (str, optional): The file category to filter by.
         include_submodules (bool, optional): Whether to include files from submodules.
+        manifest (SyncManifest, optional): Manifest of previous syncs. Files whose stat signature is
+                                           unchanged are not opened; freshly hashed files are recorded.
+        content_cache (ContentCache, optional): Cache the contents of the files read are kept in for the
+                                                rest of the sync.
 
     Returns:
-        dict: A dictionary where keys are relative file paths, and values are MD5 hashes of the file contents.
+        dict: A dictionary where keys are relative file paths, and values are MD5 hashes of the file contents,
+              ordered by path.
     """
-    gitignore = load_gitignore(local_path)
-    claudeignore = load_claudeignore(local_path)
-    files = {}
-    exclude_dirs = {
-        ".git",
-        ".svn",
-        ".hg",
-        ".bzr",
-        "_darcs",
-        "CVS",
-        "claude_chats",
-        ".claudesync",
+    results, _, blobs = _scan(
+        config,
+        local_path,
+        partial(
+            _make_scanner, config, local_path, category, include_submodules, manifest
+        ),
+    )
+    if manifest is not None:
+        manifest.set_fingerprint(
+            _fingerprint(results, blobs),
+            _scan_settings(
+                config,
+                category,
+                (
+                    ()
+                    if include_submodules
+                    else [sm["relative_path"] for sm in config.get("submodules", [])]
+                ),
+            ),
+        )
+    return _hash_results(config, results, manifest, content_cache, blobs)
+
+
+def _file_signature(stat_result):
+    if stat_result is None:
+        return None
+    return stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino
+
+
+def get_changed_files(
+    config,
+    local_path,
+    since,
+    category=None,
+    include_submodules=False,
+    manifest=None,
+    content_cache=None,
+):
+    """
+    Retrieves the local files that changed since a git revision, without scanning the rest of the tree.
+
+    The changes are those of `git diff --name-status <since>`, which compares the revision with the
+    working tree and so includes committed, staged and unstaged changes, plus the untracked files
+    that are not ignored. A renamed file counts as the deletion of its old path and a change of its
+    new path. Changed files go through the same filters as in `get_local_files`; with
+    `prune_remote_files`, those the filters exclude count as deleted, so that their remote copies are
+    removed like in a full sync.
+
+    Args:
+        config: config manager to use
+        local_path (str): The base directory of the project, anywhere inside a git working tree.
+        since (str): The git revision to compare with, e.g. a commit, branch or tag.
+        category (str, optional): The file category to filter by.
+        include_submodules (bool, optional): Whether to include files from submodules.
+        manifest (SyncManifest, optional): Manifest of previous syncs, see `get_local_files`.
+        content_cache (ContentCache, optional): Cache for the contents read, see `get_local_files`.
+
+    Returns:
+        tuple: (changed_files, deleted_files). `changed_files` maps the relative paths of the changed
+               files to their hashes like `get_local_files`; `deleted_files` is the set of relative
+               paths that are no longer part of the project.
+
+    Raises:
+        ConfigurationError: If `local_path` is not in a git working tree or `since` is not a revision.
+    """
+    try:
+        _run_git(local_path, "rev-parse", "--verify", "--quiet", f"{since}^{{commit}}")
+    except OSError as e:
+        raise ConfigurationError(f"Unable to run git: {str(e)}")
+    except subprocess.CalledProcessError:
+        raise ConfigurationError(
+            f"'{since}' is not a revision of a git repository containing {local_path}"
+        )
+    try:
+        diff = _run_git(
+            local_path, "diff", "--name-status", "-z", "-M", "--relative", since, "--"
+        )
+        others = _run_git(
+            local_path, "ls-files", "-z", "--others", "--exclude-standard"
+        )
+        ignored = _ignored_tracked_files(local_path)
+    except subprocess.CalledProcessError as e:
+        raise ConfigurationError(f"Unable to list the changes since '{since}': {e}")
+
+    changed, deleted = set(), set()
+    fields = iter(os.fsdecode(p).replace("/", os.sep) for p in diff.split(b"\0") if p)
+    for status in fields:
+        if status[0] == "R":
+            deleted.add(next(fields))
+            changed.add(next(fields))
+        elif status[0] == "D":
+            deleted.add(next(fields))
+        else:
+            changed.add(next(fields))
+    changed.update(
+        p
+        for p in (os.fsdecode(p).replace("/", os.sep) for p in others.split(b"\0"))
+        if p and not p.endswith(os.sep)
+    )
+    deleted -= changed
+
+    scanner = _make_scanner(
+        config, local_path, category, include_submodules, manifest, use_gitignore=False
+    )
+    results = _check_git_files(config, scanner, [(p, None) for p in changed - ignored])
+    scanner.matcher.save()
+    if manifest is not None:
+        # The fingerprint of the whole project is not known after a partial scan.
+        manifest.set_fingerprint(None)
+    files = _hash_results(config, results, manifest, content_cache)
+    if config.get("prune_remote_files"):
+        deleted |= changed - set(files)
+    return files, deleted
+
+
+def get_files_at(
+    config,
+    local_path,
+    paths,
+    category=None,
+    include_submodules=False,
+    manifest=None,
+    content_cache=None,
+):
+    """
+    Retrieves the local files at the given paths, e.g. those reported changed by a file watcher.
+
+    Each path is resolved against the project as it is now: a file is filtered and hashed like in
+    `get_local_files`, a directory is scanned with everything below it, and a path that no longer
+    exists is reported deleted, together with the files recorded in the manifest below it.
+
+    Args:
+        config: config manager to use
+        local_path (str): The base directory of the project.
+        paths (iterable): Paths relative to `local_path`, of files or directories.
+        category (str, optional): The file category to filter by.
+        include_submodules (bool, optional): Whether to include files from submodules.
+        manifest (SyncManifest, optional): Manifest of previous syncs, see `get_local_files`.
+        content_cache (ContentCache, optional): Cache for the contents read, see `get_local_files`.
+
+    Returns:
+        tuple: (files, deleted_files), like `get_changed_files`.
+    """
+    scanner = _make_scanner(
+        config, local_path, category, include_submodules, manifest, use_gitignore=True
+    )
+    roots, entries, deleted = [], [], set()
+    for rel_path in sorted(set(paths)):
+        full_path = os.path.join(local_path, rel_path)
+        if os.path.isdir(full_path) and not os.path.islink(full_path):
+            if not rel_path or not scanner.matcher.is_ignored_dir(rel_path):
+                roots.append(rel_path)
+        elif os.path.lexists(full_path):
+            entries.append((rel_path, None))
+        else:
+            deleted.add(rel_path)
+            if manifest is not None:
+                deleted.update(manifest.paths_under(rel_path))
+
+    results = _check_git_files(config, scanner, entries)
+    if roots:
+        results.extend(_scan_tree(scanner, max(1, config.get("scan_jobs", 8)), roots))
+    # A file can be listed both on its own and below a directory that was scanned.
+    results = list({result[0]: result for result in results}.values())
+    scanner.matcher.save()
+    if manifest is not None:
+        manifest.set_fingerprint(None)
+    files = _hash_results(config, results, manifest, content_cache)
+    return files, deleted - set(files)
+
+
+def get_ignore_matcher(config, local_path, category=None, include_submodules=False):
+    """
+    Returns the `IgnoreMatcher` `get_local_files` filters the paths of a project with.
+
+    Args:
+        config: config manager to use
+        local_path (str): The base directory of the project.
+        category (str, optional): The file category to filter by.
+        include_submodules (bool, optional): Whether submodule directories are included.
+
+    Returns:
+        IgnoreMatcher: The matcher.
+    """
+    return _make_scanner(
+        config, local_path, category, include_submodules, None, use_gitignore=True
+    ).matcher
+
+
+class ProjectIndex:
+    """
+    The local files of a project and of each of its submodules, collected by a single scan.
+
+    Syncing a project and its submodules scans every submodule twice if each is scanned on its own,
+    and three times with `--uberproject`. The index instead scans the whole tree once, submodule
+    directories included, hashes every file at most once and partitions the result: files below the
+    directory of a configured submodule belong to that submodule, with paths relative to it, and all
+    other files to the root project, which with `include_submodules` gets every file. The
+    `.claudeignore` of a submodule applies to the files below it, taking precedence over the root's.
+
+    Each file is looked up in the manifest of its partition, and its hash and the partition's
+    `tree_fingerprint` are recorded there. Directories containing one of `detect_filenames` are
+    recorded along the way, see `detect_submodules`.
+
+    Submodule files are filtered by the ignore rules of the whole project, so a .gitignore above a
+    submodule applies to it as it does in git.
+
+    Attributes:
+        files (dict): The files of the root project, like `get_local_files` returns them.
+        submodule_files (dict): The relative paths of the submodules mapped to their files.
+        detected (list): (relative_path, detected_filename) tuples, like `detect_submodules`
+                         returns them.
+    """
+
+    def __init__(self, files, submodule_files, detected=()):
+        self.files = files
+        self.submodule_files = submodule_files
+        self.detected = list(detected)
+
+    @classmethod
+    def build(
+        cls,
+        config,
+        local_path,
+        category=None,
+        include_submodules=False,
+        manifest=None,
+        submodule_manifests=None,
+        content_cache=None,
+        detect_filenames=(),
+    ):
+        """
+        Scans a project and its submodules.
+
+        Args:
+            config: config manager to use, whose `submodules` setting lists the submodules.
+            local_path (str): The base directory of the root project.
+            category (str, optional): The file category to filter by.
+            include_submodules (bool, optional): Whether the root project includes the submodule files.
+            manifest (SyncManifest, optional): Manifest of the root project, see `get_local_files`.
+            submodule_manifests (dict, optional): Relative paths of submodules mapped to their
+                                                  manifests.
+            content_cache (ContentCache, optional): Cache for the contents read, see `get_local_files`.
+            detect_filenames (iterable, optional): Filenames that mark a directory as a submodule.
+
+        Returns:
+            ProjectIndex: The index.
+        """
+        submodule_paths = [sm["relative_path"] for sm in config.get("submodules", [])]
+        router = _ManifestRouter(
+            manifest, submodule_paths, submodule_manifests or {}, include_submodules
+        )
+        results, markers, blobs = _scan_project(
+            config,
+            local_path,
+            category,
+            router,
+            submodule_paths,
+            detect_filenames=detect_filenames,
+        )
+        results.sort(key=lambda result: result[0])
+        fresh_hashes = _hash_unknown(config, results, content_cache)
+
+        root_results = results if include_submodules else []
+        partitions = {path: ([], {}) for path in submodule_paths}
+        for result in results:
+            rel_path = result[0]
+            submodule_path = router.partition(rel_path)
+            if submodule_path is None:
+                if not include_submodules:
+                    root_results.append(result)
+                continue
+            sub_rel_path = rel_path[len(submodule_path) + 1 :]
+            sub_results, sub_blobs = partitions[submodule_path]
+            sub_results.append((sub_rel_path,) + result[1:])
+            if rel_path in blobs:
+                sub_blobs[sub_rel_path] = blobs[rel_path]
+
+        if manifest is not None:
+            manifest.set_fingerprint(
+                _fingerprint(root_results, blobs),
+                _scan_settings(
+                    config, category, () if include_submodules else submodule_paths
+                ),
+            )
+        files = _record_results(root_results, fresh_hashes, manifest, blobs)
+        submodule_files = {}
+        for submodule_path, (sub_results, sub_blobs) in partitions.items():
+            sub_manifest = router.submodule_manifests.get(submodule_path)
+            if sub_manifest is not None:
+                sub_manifest.set_fingerprint(
+                    _fingerprint(sub_results, sub_blobs),
+                    _scan_settings(config, category),
+                )
+            submodule_files[submodule_path] = _record_results(
+                sub_results, fresh_hashes, sub_manifest, sub_blobs
+            )
+        return cls(
+            files, submodule_files, _detected_submodules(markers, detect_filenames)
+        )
+
+
+class _ManifestRouter:
+    # Stands in for the manifest of a scan covering a project and its submodules: lookups go to the
+    # manifest of the partition a path belongs to, see `ProjectIndex`. With `include_submodules`,
+    # submodule files that the submodule's manifest does not know are looked up in the root's too.
+
+    def __init__(
+        self, manifest, submodule_paths, submodule_manifests, include_submodules
+    ):
+        self.manifest = manifest
+        self.submodule_manifests = submodule_manifests
+        self.include_submodules = include_submodules
+        # Nested submodules take precedence over the submodules containing them.
+        self._paths = sorted(submodule_paths, key=len, reverse=True)
+
+    def partition(self, rel_path):
+        """Returns the relative path of the submodule a path belongs to, or None for the root."""
+        for path in self._paths:
+            if (
+                rel_path.startswith(path)
+                and rel_path[len(path) : len(path) + 1] == os.sep
+            ):
+                return path
+        return None
+
+    def lookup(self, rel_path, stat_result):
+        for manifest, path in self._manifests(rel_path):
+            known, file_hash = manifest.lookup(path, stat_result)
+            if known:
+                return known, file_hash
+        return False, None
+
+    def lookup_blob(self, rel_path, blob):
+        for manifest, path in self._manifests(rel_path):
+            known, file_hash, size = manifest.lookup_blob(path, blob)
+            if known:
+                return known, file_hash, size
+        return False, None, None
+
+    def state_file(self, name):
+        return self.manifest.state_file(name) if self.manifest else None
+
+    def _manifests(self, rel_path):
+        submodule_path = self.partition(rel_path)
+        if submodule_path is not None:
+            manifest = self.submodule_manifests.get(submodule_path)
+            if manifest is not None:
+                yield manifest, rel_path[len(submodule_path) + 1 :]
+            if not self.include_submodules:
+                return
+        if self.manifest is not None:
+            yield self.manifest, rel_path
+
+
+def _scan_project(
+    config,
+    local_path,
+    category,
+    manifest,
+    submodule_paths,
+    detect_filenames=(),
+    collect_files=True,
+):
+    # Scans a whole project, submodule directories included, see `_scan`.
+    return _scan(
+        config,
+        local_path,
+        partial(
+            _make_scanner,
+            config,
+            local_path,
+            category,
+            True,
+            manifest,
+            detect_filenames=detect_filenames,
+            collect_files=collect_files,
+            claudeignore_roots=submodule_paths,
+        ),
+        submodule_paths,
+    )
+
+
+def _scan(config, local_path, make_scanner, extra_roots=()):
+    # Scans a project from its git index if possible, else by walking it. The directories the index
+    # does not cover are walked: nested repositories, and those of `extra_roots` without any file in
+    # the index. `make_scanner` is called with `use_gitignore`. Returns (results, markers, blobs),
+    # see `_DirectoryScanner`.
+    jobs = max(1, config.get("scan_jobs", 8))
+    listing = None
+    if config.get("use_git_index", True):
+        listing = _list_git_files(local_path)
+    if listing is None:
+        scanner = make_scanner(use_gitignore=True)
+        results = _scan_tree(scanner, jobs)
+        scanner.matcher.save()
+        return results, scanner.markers, {}
+
+    git_files, nested_repos = listing
+    # git has applied the .gitignore files already
+    scanner = make_scanner(use_gitignore=False)
+    results = _check_git_files(config, scanner, git_files)
+    listed = {os.path.dirname(rel_path) for rel_path, _ in git_files}
+    roots = set(nested_repos) | {
+        path
+        for path in extra_roots
+        if not any(d == path or d.startswith(path + os.sep) for d in listed)
+        and os.path.isdir(os.path.join(local_path, path))
+    }
+    # A directory below another one is walked with it.
+    roots = [
+        root
+        for root in sorted(roots)
+        if not any(root.startswith(other + os.sep) for other in roots)
+    ]
+    if roots:
+        walker = make_scanner(use_gitignore=True)
+        roots = [root for root in roots if not walker.matcher.is_ignored_dir(root)]
+        results.extend(_scan_tree(walker, jobs, roots))
+        scanner.markers.extend(walker.markers)
+        walker.matcher.save()
+    scanner.matcher.save()
+    return results, scanner.markers, dict(git_files)
+
+
+def _detected_submodules(markers, detect_filenames):
+    # A directory is reported once, with the first of `detect_filenames` it contains. The project
+    # root is not a submodule.
+    order = {name: i for i, name in enumerate(detect_filenames)}
+    found = {}
+    for rel_dir, name in markers:
+        if rel_dir and (rel_dir not in found or order[name] < order[found[rel_dir]]):
+            found[rel_dir] = name
+    return sorted(found.items())
+
+
+def _scan_settings(config, category, excluded_paths=()):
+    # The settings that decide which files a scan includes, recorded with its fingerprint.
+    patterns = None
+    if category:
+        patterns = config.get("file_categories", {}).get(category, {}).get("patterns")
+    return {
+        "category": category,
+        "patterns": patterns,
+        "excluded_paths": sorted(excluded_paths),
+        "max_file_size": config.get("max_file_size", 32 * 1024),
     }
 
+
+def _make_scanner(
+    config,
+    local_path,
+    category,
+    include_submodules,
+    manifest,
+    use_gitignore,
+    detect_filenames=(),
+    collect_files=True,
+    claudeignore_roots=(),
+):
     categories = config.get("file_categories", {})
     if category and category not in categories:
         raise ValueError(f"Invalid category: {category}")
@@ -201,45 +1037,87 @@ def get_local_files(config, local_path, category=None, include_submodules=False)
     if category:
         patterns = categories[category]["patterns"]
 
-    spec = pathspec.PathSpec.from_lines("gitwildmatch", patterns)
+    excluded_paths = set()
+    if not include_submodules:
+        # Skip submodule directories if not including submodules
+        excluded_paths = {sm["relative_path"] for sm in config.get("submodules", [])}
+
+    matcher = IgnoreMatcher(
+        local_path,
+        category_patterns=patterns,
+        excluded_dirs=_EXCLUDE_DIRS,
+        excluded_paths=excluded_paths,
+        cache_file=manifest.state_file("ignore_cache.json") if manifest else None,
+        use_gitignore=use_gitignore,
+        claudeignore_roots=claudeignore_roots,
+    )
+    return _DirectoryScanner(
+        local_path,
+        config.get("max_file_size", 32 * 1024),
+        matcher,
+        manifest,
+        detect_filenames=detect_filenames,
+        collect_files=collect_files,
+    )
+
+
+def _check_git_files(config, scanner, git_files):
+    with ThreadPoolExecutor(max_workers=max(1, config.get("scan_jobs", 8))) as executor:
+        return [
+            result
+            for result in executor.map(scanner.check_git_file, git_files, chunksize=256)
+            if result is not None
+        ]
 
-    submodules = config.get("submodules", [])
-    submodule_paths = [sm["relative_path"] for sm in submodules]
 
-    for root, dirs, filenames in os.walk(local_path, topdown=True):
-        rel_root = os.path.relpath(root, local_path)
-        rel_root = "" if rel_root == "." else rel_root
+def _hash_results(config, results, manifest, content_cache, blobs=None):
+    results = sorted(results, key=lambda result: result[0])
+    return _record_results(
+        results, _hash_unknown(config, results, content_cache), manifest, blobs
+    )
 
-        # Skip submodule directories if not including submodules
-        if not include_submodules:
-            dirs[:] = [
-                d for d in dirs if os.path.join(rel_root, d) not in submodule_paths
-            ]
-
-        dirs[:] = [
-            d
-            for d in dirs
-            if d not in exclude_dirs
-            and not (gitignore and gitignore.match_file(os.path.join(rel_root, d)))
-            and not (
-                claudeignore and claudeignore.match_file(os.path.join(rel_root, d))
-            )
-        ]
 
-        for filename in filenames:
-            rel_path = os.path.join(rel_root, filename)
-            full_path = os.path.join(root, filename)
+def _hash_unknown(config, results, content_cache):
+    # Hashes the files that were not found in the manifest, keyed by full path.
+    unknown = [full_path for _, full_path, _, _, known in results if not known]
+    hashes = hash_files(
+        unknown,
+        config.get("hash_jobs"),
+        use_processes=len(unknown) >= config.get("hash_process_min_files", 2000),
+        content_cache=content_cache,
+    )
+    return dict(zip(unknown, hashes))
 
-            if spec.match_file(rel_path) and should_process_file(
-                config, full_path, filename, gitignore, local_path, claudeignore
-            ):
-                file_hash = process_file(full_path)
-                if file_hash:
-                    files[rel_path] = file_hash
 
+def _record_results(results, fresh_hashes, manifest, blobs=None):
+    files = {}
+    for rel_path, full_path, stat_result, file_hash, known in results:
+        if not known:
+            file_hash = fresh_hashes[full_path]
+        if (
+            manifest is not None
+            and stat_result is not None
+            # Files can be known from another manifest, see `ProjectIndex`.
+            and (
+                not known or manifest.lookup(rel_path, stat_result) != (True, file_hash)
+            )
+        ):
+            manifest.record_scan(rel_path, stat_result, file_hash)
+        if manifest is not None and blobs and blobs.get(rel_path) is not None:
+            # Unmodified tracked files are found by their blob next time, without a stat call.
+            manifest.set_blob(rel_path, blobs[rel_path])
+        if file_hash:
+            files[rel_path] = file_hash
     return files
 
 
+def _fingerprint(results, blobs=None):
+    return tree_fingerprint(
+        (rel_path, _file_signature(stat_result) or blobs[rel_path])
+        for rel_path, _, stat_result, _, _ in results
+    )
+
+
 def handle_errors(func):
     """
     A decorator that wraps a function to catch and handle specific exceptions.
@@ -370,46 +1248,32 @@ def load_claudeignore(base_path):
     return None
 
 
-def detect_submodules(base_path, submodule_detect_filenames):
+def detect_submodules(base_path, submodule_detect_filenames, config=None):
     """
     Detects submodules within a project based on specific filenames, respecting .gitignore and .claudeignore.
 
+    The project is listed like `ProjectIndex` scans it, from the git index when possible, without
+    reading or hashing any file.
+
     Args:
         base_path (str): The base directory path to start the search from.
-        submodule_detect_filenames (list): List of filenames that indicate a submodule.
+        submodule_detect_filenames (list): List of filenames that indicate a submodule, in order of
+                                           preference.
+        config (optional): config manager whose scan settings are used, defaults otherwise.
 
     Returns:
         list: A list of tuples (relative_path, detected_filename) for detected submodules,
-              excluding the root directory and respecting ignore files.
+              excluding the root directory and respecting ignore files, ordered by path.
     """
-    submodules = []
-    base_path = Path(base_path)
-    gitignore = load_gitignore(base_path)
-    claudeignore = load_claudeignore(base_path)
-
-    for root, dirs, files in os.walk(base_path):
-        rel_root = Path(root).relative_to(base_path)
-
-        # Check if the current directory should be ignored
-        if gitignore and gitignore.match_file(str(rel_root)):
-            dirs[:] = []  # Don't descend into this directory
-            continue
-        if claudeignore and claudeignore.match_file(str(rel_root)):
-            dirs[:] = []  # Don't descend into this directory
-            continue
-
-        for filename in submodule_detect_filenames:
-            if filename in files:
-                relative_path = str(rel_root)
-                # Exclude the root directory (represented by an empty string or '.')
-                if relative_path not in ("", "."):
-                    # Check if the file itself should be ignored
-                    file_path = rel_root / filename
-                    if (gitignore and gitignore.match_file(str(file_path))) or (
-                        claudeignore and claudeignore.match_file(str(file_path))
-                    ):
-                        continue
-                    submodules.append((relative_path, filename))
-                break  # Stop searching this directory once a submodule is found
-
-    return submodules
+    if config is None:
+        config = InMemoryConfigManager()
+    _, markers, _ = _scan_project(
+        config,
+        str(base_path),
+        None,
+        None,
+        [],
+        detect_filenames=submodule_detect_filenames,
+        collect_files=False,
+    )
+    return _detected_submodules(markers, submodule_detect_filenames)
@@ -0,0 +1,282 @@
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+# Reported in a batch of changes when the watcher lost track of events, e.g. after an inotify queue
+# overflow: the whole project has to be synced.
+RESCAN = ""
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONTFOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (
+    IN_MODIFY
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+    | IN_DONTFOLLOW
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """
+    Reports the paths changed below a directory, using Linux inotify through ctypes.
+
+    Every directory of the tree that is not ignored gets a watch, and directories created or moved
+    into the tree are watched as soon as they appear. Paths are reported relative to the base
+    directory; a new directory is reported as a whole, since files may have been written into it
+    before it was watched.
+    """
+
+    def __init__(self, base_path, is_ignored_dir=None):
+        """
+        Args:
+            base_path (str): The directory to watch.
+            is_ignored_dir (callable, optional): Called with a relative directory path, returns True
+                                                 if the directory is not watched.
+
+        Raises:
+            OSError: If inotify is not available or the tree cannot be watched, e.g. because the
+                     watch limit (fs.inotify.max_user_watches) is reached.
+        """
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        self.base_path = base_path
+        self.is_ignored_dir = is_ignored_dir or (lambda rel_path: False)
+        self._libc = ctypes.CDLL(
+            ctypes.util.find_library("c") or "libc.so.6", use_errno=True
+        )
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 failed: {os.strerror(err)}")
+        self._dirs = {}
+        try:
+            self._watch_tree("")
+        except OSError:
+            self.close()
+            raise
+
+    def wait(self, timeout=None):
+        """
+        Waits for changes and returns the paths they affect.
+
+        Args:
+            timeout (float, optional): Seconds to wait, None to wait until something changes.
+
+        Returns:
+            set: Relative paths of the changed files and directories, empty if nothing changed within
+                 the timeout. Contains `RESCAN` if events were lost.
+        """
+        changes = set()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not changes:
+            remaining = None
+            if deadline is not None:
+                remaining = max(0.0, deadline - time.monotonic())
+            readable, _, _ = select.select([self._fd], [], [], remaining)
+            if not readable:
+                break
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            changes.update(self._parse(data))
+        return changes
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def _parse(self, data):
+        changes = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                logger.warning("File change events were lost, rescanning the project")
+                changes.add(RESCAN)
+                continue
+            rel_dir = self._dirs.get(wd)
+            if rel_dir is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._dirs[wd]
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                # Reported by the parent directory too, unless this is the watched root.
+                if not rel_dir:
+                    changes.add(RESCAN)
+                continue
+            rel_path = os.path.join(rel_dir, name)
+            if mask & IN_ISDIR:
+                if self.is_ignored_dir(rel_path):
+                    continue
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    try:
+                        self._watch_tree(rel_path)
+                    except OSError as e:
+                        logger.warning(f"Unable to watch {rel_path}: {str(e)}")
+            changes.add(rel_path)
+        return changes
+
+    def _watch_tree(self, rel_root):
+        for dir_path, dir_names, _ in os.walk(os.path.join(self.base_path, rel_root)):
+            rel_dir = os.path.relpath(dir_path, self.base_path)
+            rel_dir = "" if rel_dir == os.curdir else rel_dir
+            wd = self._libc.inotify_add_watch(
+                self._fd, os.fsencode(dir_path), _WATCH_MASK
+            )
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err in (errno.ENOENT, errno.ENOTDIR):
+                    # Removed while walking; its removal is reported by its parent.
+                    dir_names[:] = []
+                    continue
+                raise OSError(err, f"Unable to watch {dir_path}: {os.strerror(err)}")
+            self._dirs[wd] = rel_dir
+            dir_names[:] = [
+                d
+                for d in dir_names
+                if not self.is_ignored_dir(os.path.join(rel_dir, d))
+                and not os.path.islink(os.path.join(dir_path, d))
+            ]
+
+
+class PollingWatcher:
+    """
+    Reports the paths changed below a directory by comparing stat snapshots of the tree.
+
+    Used where inotify is not available. Each poll walks the directories that are not ignored and
+    compares the size, modification time and inode of every file with the previous poll.
+    """
+
+    def __init__(self, base_path, is_ignored_dir=None, interval=2.0):
+        """
+        Args:
+            base_path (str): The directory to watch.
+            is_ignored_dir (callable, optional): See `InotifyWatcher`.
+            interval (float, optional): Seconds between polls while waiting for changes.
+        """
+        self.base_path = base_path
+        self.is_ignored_dir = is_ignored_dir or (lambda rel_path: False)
+        self.interval = interval
+        self._snapshot = self._take_snapshot()
+
+    def wait(self, timeout=None):
+        """Waits for changes and returns the paths they affect, see `InotifyWatcher.wait`."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            delay = self.interval
+            if deadline is not None:
+                delay = min(delay, max(0.0, deadline - time.monotonic()))
+            time.sleep(delay)
+            snapshot = self._take_snapshot()
+            changes = {
+                rel_path
+                for rel_path in snapshot.keys() | self._snapshot.keys()
+                if snapshot.get(rel_path) != self._snapshot.get(rel_path)
+            }
+            self._snapshot = snapshot
+            if changes or (deadline is not None and time.monotonic() >= deadline):
+                return changes
+
+    def close(self):
+        self._snapshot = {}
+
+    def _take_snapshot(self):
+        snapshot = {}
+        for dir_path, dir_names, file_names in os.walk(self.base_path):
+            rel_dir = os.path.relpath(dir_path, self.base_path)
+            rel_dir = "" if rel_dir == os.curdir else rel_dir
+            dir_names[:] = [
+                d
+                for d in dir_names
+                if not self.is_ignored_dir(os.path.join(rel_dir, d))
+            ]
+            for file_name in file_names:
+                rel_path = os.path.join(rel_dir, file_name)
+                try:
+                    st = os.stat(os.path.join(dir_path, file_name))
+                except OSError:
+                    continue
+                snapshot[rel_path] = (st.st_size, st.st_mtime_ns, st.st_ino)
+        return snapshot
+
+
+def create_watcher(base_path, is_ignored_dir=None, poll=False, poll_interval=2.0):
+    """
+    Returns an `InotifyWatcher` for a directory, or a `PollingWatcher` if `poll` is set or inotify
+    cannot be used.
+    """
+    if not poll:
+        try:
+            return InotifyWatcher(base_path, is_ignored_dir)
+        except (OSError, AttributeError) as e:
+            logger.info(f"inotify is not available, polling for changes: {str(e)}")
+    return PollingWatcher(base_path, is_ignored_dir, poll_interval)
+
+
+def iter_changes(watcher, debounce=1.0, max_delay=10.0):
+    """
+    Yields the paths changed below the watched directory, in batches.
+
+    A batch is yielded once no further change arrived for `debounce` seconds, so that a burst of
+    edits, a checkout or a build is synced once, but at the latest `max_delay` seconds after its first
+    change.
+
+    Args:
+        watcher: An `InotifyWatcher` or `PollingWatcher`.
+        debounce (float, optional): Quiet period that ends a batch, in seconds.
+        max_delay (float, optional): Longest time a change waits for its batch to end, in seconds.
+
+    Yields:
+        set: The relative paths changed, see `InotifyWatcher.wait`.
+    """
+    while True:
+        batch = watcher.wait()
+        if not batch:
+            continue
+        deadline = time.monotonic() + max_delay
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            changes = watcher.wait(min(debounce, remaining))
+            if not changes:
+                break
+            batch |= changes
+        yield batch
@@ -6,7 +6,7 @@ from datetime import datetime
 import uvicorn
 
 from claudesync.configmanager import InMemoryConfigManager
-from claudesync.providers.claude_ai import ClaudeAIProvider
+from claudesync.providers.async_claude_ai import AsyncClaudeAIProvider
 from claudesync.exceptions import ProviderError, ConfigurationError
 
 app = FastAPI(title="ClaudeSync API")
@@ -76,7 +76,7 @@ async def login(login_data: LoginRequest):
     global provider
     try:
         config.set("claude_api_url", "https://api.claude.ai/api")
-        provider = ClaudeAIProvider(config)
+        provider = AsyncClaudeAIProvider(config)
         
         # Set default expiry to 1 year from now if not provided
         if login_data.expires:
@@ -90,7 +90,7 @@ async def login(login_data: LoginRequest):
         
         # Verify the session key works by making a test request
         try:
-            orgs = provider.get_organizations()
+            orgs = await provider.get_organizations()
             if not orgs:
                 raise HTTPException(status_code=401, detail="Invalid session key")
         except ProviderError:
@@ -105,9 +105,9 @@ async def login(login_data: LoginRequest):
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/organizations", response_model=List[Organization])
-async def get_organizations(provider: ClaudeAIProvider = Depends(get_provider)):
+async def get_organizations(provider: AsyncClaudeAIProvider = Depends(get_provider)):
     try:
-        orgs = provider.get_organizations()
+        orgs = await provider.get_organizations()
         return orgs
     except ProviderError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -116,10 +116,10 @@ async def get_organizations(provider: ClaudeAIProvider = Depends(get_provider)):
 async def get_projects(
     org_id: str,
     include_archived: bool = False,
-    provider: ClaudeAIProvider = Depends(get_provider)
+    provider: AsyncClaudeAIProvider = Depends(get_provider)
 ):
     try:
-        projects = provider.get_projects(org_id, include_archived)
+        projects = await provider.get_projects(org_id, include_archived)
         return projects
     except ProviderError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -128,10 +128,10 @@ async def get_projects(
 async def create_project(
     org_id: str,
     project_data: ProjectCreate,
-    provider: ClaudeAIProvider = Depends(get_provider)
+    provider: AsyncClaudeAIProvider = Depends(get_provider)
 ):
     try:
-        project = provider.create_project(
+        project = await provider.create_project(
             org_id,
             project_data.name,
             project_data.description
@@ -144,10 +144,10 @@ async def create_project(
 async def create_chat(
     org_id: str,
     chat_data: ChatCreate,
-    provider: ClaudeAIProvider = Depends(get_provider)
+    provider: AsyncClaudeAIProvider = Depends(get_provider)
 ):
     try:
-        chat = provider.create_chat(
+        chat = await provider.create_chat(
             org_id,
             chat_data.chat_name,
             chat_data.project_uuid
@@ -159,10 +159,10 @@ async def create_chat(
 @app.get("/organizations/{org_id}/chats")
 async def get_chats(
     org_id: str,
-    provider: ClaudeAIProvider = Depends(get_provider)
+    provider: AsyncClaudeAIProvider = Depends(get_provider)
 ):
     try:
-        chats = provider.get_chat_conversations(org_id)
+        chats = await provider.get_chat_conversations(org_id)
         return chats
     except ProviderError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -171,10 +171,10 @@ async def get_chats(
 async def get_chat(
     org_id: str,
     chat_id: str,
-    provider: ClaudeAIProvider = Depends(get_provider)
+    provider: AsyncClaudeAIProvider = Depends(get_provider)
 ):
     try:
-        chat = provider.get_chat_conversation(org_id, chat_id)
+        chat = await provider.get_chat_conversation(org_id, chat_id)
         return chat
     except ProviderError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -184,16 +184,16 @@ async def get_chat(
 async def quick_chat(
     org_id: str,
     message: ChatMessage,
-    provider: ClaudeAIProvider = Depends(get_provider)
+    provider: AsyncClaudeAIProvider = Depends(get_provider)
 ):
     try:
         # Create a new chat first
-        chat = provider.create_chat(org_id)
+        chat = await provider.create_chat(org_id)
         chat_id = chat["uuid"]
         
         # Then send the message
         async def message_stream():
-            for event in provider.send_message(org_id, chat_id, message.prompt, message.timezone):
+            async for event in provider.send_message(org_id, chat_id, message.prompt, message.timezone):
                 yield f"data: {json.dumps(event)}\n\n"
                 
         return StreamingResponse(
@@ -208,12 +208,12 @@ async def send_message(
     org_id: str,
     chat_id: str,
     message: ChatMessage,
-    provider: ClaudeAIProvider = Depends(get_provider)
+    provider: AsyncClaudeAIProvider = Depends(get_provider)
 ):
     try:
         # Create StreamingResponse for the message stream
         async def message_stream():
-            for event in provider.send_message(org_id, chat_id, message.prompt, message.timezone):
+            async for event in provider.send_message(org_id, chat_id, message.prompt, message.timezone):
                 yield f"data: {json.dumps(event)}\n\n"
                 
         return StreamingResponse(
@@ -227,10 +227,10 @@ async def send_message(
 async def delete_chats(
     org_id: str,
     chat_ids: List[str],
-    provider: ClaudeAIProvider = Depends(get_provider)
+    provider: AsyncClaudeAIProvider = Depends(get_provider)
 ):
     try:
-        result = provider.delete_chat(org_id, chat_ids)
+        result = await provider.delete_chat(org_id, chat_ids)
         return result
     except ProviderError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,91 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from claudesync.configmanager import InMemoryConfigManager
+from claudesync.exceptions import ProviderError
+from claudesync.providers.async_claude_ai import AsyncClaudeAIProvider
+from mock_http_server import run_mock_server
+
+
+class TestAsyncClaudeAIProvider(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.mock_server_thread = threading.Thread(
+            target=run_mock_server, kwargs={"port": 8001}
+        )
+        cls.mock_server_thread.daemon = True
+        cls.mock_server_thread.start()
+        time.sleep(1)
+
+    def setUp(self):
+        self.config = InMemoryConfigManager()
+        self.config.set("claude_api_url", "http://127.0.0.1:8001/api")
+        self.config.set("upload_delay", 0)
+        self.provider = AsyncClaudeAIProvider(self.config)
+
+    def run_async(self, coroutine_function):
+        async def run():
+            try:
+                return await coroutine_function()
+            finally:
+                await self.provider.aclose()
+
+        return asyncio.run(run())
+
+    def test_get_organizations(self):
+        organizations = self.run_async(self.provider.get_organizations)
+        self.assertEqual([{"id": "org1", "name": "Test Org 1"}], organizations)
+
+    def test_concurrent_requests(self):
+        async def fetch_all():
+            return await asyncio.gather(
+                *(self.provider.get_projects("org1") for _ in range(10))
+            )
+
+        results = self.run_async(fetch_all)
+        self.assertEqual(10, len(results))
+        self.assertEqual("proj1", results[0][0]["id"])
+
+    def test_send_message(self):
+        async def collect():
+            return [
+                event
+                async for event in self.provider.send_message("org1", "chat1", "Hello")
+            ]
+
+        messages = self.run_async(collect)
+        self.assertEqual(3, len(messages))
+        self.assertEqual("Hello", messages[0]["completion"])
+
+    def test_iter_files_matches_list_files(self):
+        async def collect():
+            await self.provider.upload_file("org1", "proj1", "async.txt", "Hello")
+            listed = await self.provider.list_files("org1", "proj1")
+            streamed = [
+                file async for file in self.provider.iter_files("org1", "proj1")
+            ]
+            return listed, streamed
+
+        listed, streamed = self.run_async(collect)
+        self.assertIn("async.txt", [file["file_name"] for file in streamed])
+        self.assertEqual(
+            [file["uuid"] for file in listed], [file["uuid"] for file in streamed]
+        )
+
+    def test_error_responses_raise_provider_errors(self):
+        with self.assertRaises(ProviderError):
+            self.run_async(lambda: self.provider.get_published_artifacts("org1"))
+
+    def test_delete_chat_is_retried_as_idempotent(self):
+        with patch.object(
+            self.provider, "_send_with_retries", return_value=None
+        ) as send:
+            self.run_async(lambda: self.provider.delete_chat("org1", ["chat1"]))
+        self.assertTrue(send.call_args.args[-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
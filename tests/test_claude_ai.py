@@ -7,6 +7,7 @@ from datetime import datetime
 from claudesync.configmanager import InMemoryConfigManager
 from claudesync.providers.claude_ai import ClaudeAIProvider
 from claudesync.exceptions import ProviderError
+from claudesync.utils import compute_md5_hash
 from mock_http_server import run_mock_server
 
 
@@ -74,6 +75,14 @@ class TestClaudeAIProvider(unittest.TestCase):
         self.assertEqual(files[0]["uuid"], "file1")
         self.assertEqual(files[0]["file_name"], "test.txt")
 
+    def test_iter_files(self):
+        self.provider.upload_file("org1", "proj1", "streamed.txt", "Hello")
+        files = list(self.provider.iter_files("org1", "proj1", include_content=False))
+        file = next(f for f in files if f["file_name"] == "streamed.txt")
+        self.assertNotIn("content", file)
+        self.assertEqual(compute_md5_hash("Hello"), file["checksum"])
+        self.assertEqual(5, file["size"])
+
     def test_upload_file(self):
         with patch.object(
             self.provider, "_make_request", return_value={"uuid": "file1"}
@@ -0,0 +1,281 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from claudesync.compression import (
+    Pack,
+    block_executor,
+    choose_algorithm,
+    compress_blocks,
+    compress_content,
+    compress_files,
+    compress_stream,
+    content_profile,
+    decompress_content,
+    decompress_files,
+    decompress_stream,
+    iter_decompressed_blocks,
+    pack_files,
+    sample_content,
+    split_algorithm,
+    split_chunks,
+    unpack_files,
+)
+from claudesync.utils import compute_md5_hash
+
+
+class TestSplitChunks(unittest.TestCase):
+    def chunks(self, files, chunk_size=200):
+        return [
+            pack_files(entries)
+            for entries in split_chunks(
+                ((path, content, None) for path, content in files), chunk_size
+            )
+        ]
+
+    def test_chunks_hold_every_file_in_order(self):
+        files = [(f"dir/file{i:03}.txt", f"content {i}\n" * 3) for i in range(100)]
+        chunks = self.chunks(files)
+
+        self.assertGreater(len(chunks), 5)
+        self.assertEqual(
+            files,
+            [(path, content) for chunk in chunks for path, content, _ in Pack(chunk)],
+        )
+
+    def test_editing_a_file_only_changes_its_chunk(self):
+        files = [(f"dir/file{i:03}.txt", f"content {i}\n" * 3) for i in range(100)]
+        before = self.chunks(files)
+        files[50] = (files[50][0], files[50][1].replace("content", "edited!"))
+        after = self.chunks(files)
+
+        self.assertEqual(len(before), len(after))
+        self.assertEqual(1, len(set(after) - set(before)))
+
+    def test_chunks_are_capped(self):
+        files = [(f"f{i}", "x" * 100) for i in range(100)]
+        for entries in split_chunks(
+            ((path, content, None) for path, content in files), 1000
+        ):
+            # A chunk ends with the file that takes it past the cap.
+            self.assertLess(sum(len(content) for _, content, _ in entries), 4100)
+
+
+class TestPack(unittest.TestCase):
+    def setUp(self):
+        self.local_path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.local_path)
+
+    def write(self, file_path, content):
+        full_path = os.path.join(self.local_path, file_path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+    def read(self, file_path):
+        with open(os.path.join(self.local_path, file_path), encoding="utf-8") as f:
+            return f.read()
+
+    def test_files_are_read_by_path(self):
+        tricky = "--- BEGIN FILE: b.txt ---\nnot a file\n--- END FILE: b.txt ---"
+        pack = Pack(
+            pack_files(
+                [("a.txt", "first", None), ("b.txt", tricky, None), ("c.txt", "", None)]
+            )
+        )
+
+        self.assertEqual(3, len(pack))
+        self.assertEqual(["a.txt", "b.txt", "c.txt"], pack.paths())
+        self.assertEqual(tricky, pack.read("b.txt"))
+        self.assertEqual("", pack.read("c.txt"))
+        self.assertEqual(compute_md5_hash("first"), pack.hash("a.txt"))
+        with self.assertRaises(KeyError):
+            pack.read("missing.txt")
+
+    def test_legacy_packs_are_read(self):
+        legacy = (
+            "--- BEGIN FILE: a.txt ---\nline 1\nline 2\n--- END FILE: a.txt ---\n"
+            "--- BEGIN FILE: dir/b.txt ---\nb\n--- END FILE: dir/b.txt ---\n"
+        )
+        pack = Pack(legacy)
+
+        self.assertEqual(["a.txt", "dir/b.txt"], pack.paths())
+        self.assertEqual("line 1\nline 2\n", pack.read("a.txt"))
+
+    def test_unpack_writes_only_changed_files(self):
+        self.write("same.txt", "same")
+        self.write("old.txt", "old")
+        packed = pack_files(
+            [
+                ("same.txt", "same", None),
+                ("old.txt", "new", None),
+                ("dir/added.txt", "added", None),
+            ]
+        )
+
+        written = unpack_files(
+            self.local_path,
+            packed,
+            {"same.txt": compute_md5_hash("same"), "old.txt": compute_md5_hash("old")},
+        )
+
+        self.assertEqual(["old.txt", "dir/added.txt"], written)
+        self.assertEqual("new", self.read("old.txt"))
+        self.assertEqual("added", self.read("dir/added.txt"))
+        self.assertEqual([], unpack_files(self.local_path, packed))
+
+    def test_unpack_selected_paths(self):
+        packed = pack_files([("a.txt", "a", None), ("b.txt", "b", None)])
+
+        self.assertEqual(
+            ["b.txt"], unpack_files(self.local_path, packed, paths=["b.txt"])
+        )
+        self.assertFalse(os.path.exists(os.path.join(self.local_path, "a.txt")))
+
+    def test_compress_files_round_trip(self):
+        self.write("a.txt", "alpha")
+        self.write("dir/b.txt", "beta " * 1000)
+        compressed = compress_files(
+            self.local_path, {"a.txt": None, "dir/b.txt": None}, "zlib", 256
+        )
+
+        target = tempfile.mkdtemp()
+        try:
+            with compressed:
+                written = decompress_files(target, compressed, "zlib")
+            self.assertEqual(["a.txt", "dir/b.txt"], written)
+            with open(os.path.join(target, "dir", "b.txt"), encoding="utf-8") as f:
+                self.assertEqual("beta " * 1000, f.read())
+        finally:
+            shutil.rmtree(target)
+
+    def test_packs_record_their_algorithm(self):
+        self.write("a.txt", "alpha " * 100)
+        packed = pack_files([("a.txt", "alpha " * 100, None)])
+        streamed = compress_files(self.local_path, {"a.txt": None}, "bz2:1")
+        self.write("a.txt", "old")
+        with streamed:
+            self.assertEqual(
+                ["a.txt"], decompress_files(self.local_path, streamed, "zlib")
+            )
+        for compressed in [
+            compress_blocks(packed, "lzma", block_size=100, record_algorithm=True),
+            compress_blocks(packed, "pack", record_algorithm=True),
+        ]:
+            self.assertEqual(packed, decompress_content(compressed, "zlib"))
+            self.assertEqual(packed, "".join(decompress_stream(compressed, "brotli")))
+        # Packs of earlier versions are decompressed with the algorithm given.
+        self.assertEqual(
+            packed, decompress_content(compress_content(packed, "bz2"), "bz2")
+        )
+
+    def test_truncated_pack_is_rejected(self):
+        packed = pack_files([("a.txt", "alpha", None)])
+
+        with self.assertRaises(ValueError):
+            unpack_files(self.local_path, packed[:-1])
+
+
+class TestStreamingCompression(unittest.TestCase):
+    content = "".join(f"line {i} \u00e9\u4e2d\n" for i in range(10000))
+
+    def test_streams_match_whole_content_compression(self):
+        pieces = [self.content[i : i + 7777] for i in range(0, len(self.content), 7777)]
+        for algorithm in ["zlib", "bz2", "lzma", "brotli", "huffman", "pack", "none"]:
+            with self.subTest(algorithm=algorithm):
+                with compress_stream(pieces, algorithm, memory_limit=1024) as out:
+                    compressed = out.read().decode("utf-8")
+                self.assertEqual(
+                    self.content, decompress_content(compressed, algorithm)
+                )
+                self.assertEqual(
+                    self.content,
+                    "".join(
+                        decompress_stream(
+                            compress_content(self.content, algorithm), algorithm
+                        )
+                    ),
+                )
+
+    def test_output_spills_to_disk_above_the_memory_limit(self):
+        with compress_stream([self.content], "zlib", memory_limit=1024) as out:
+            self.assertTrue(out._rolled)
+        with compress_stream([self.content], "zlib") as out:
+            self.assertFalse(out._rolled)
+
+
+class TestBlockCompression(unittest.TestCase):
+    content = "".join(f"line {i} \u00e9\n" for i in range(20000))
+
+    def test_output_does_not_depend_on_the_workers(self):
+        serial = compress_blocks(self.content, "zlib", block_size=10000)
+        with block_executor(3) as executor:
+            parallel = compress_blocks(
+                self.content, "zlib", block_size=10000, executor=executor
+            )
+            blocks = list(iter_decompressed_blocks(parallel, executor))
+
+        self.assertEqual(serial, parallel)
+        self.assertGreater(len(blocks), 10)
+        self.assertEqual(self.content, "".join(blocks))
+
+    def test_blocks_are_read_by_every_decompressor(self):
+        for algorithm in ["bz2", "brotli", "huffman"]:
+            with self.subTest(algorithm=algorithm):
+                compressed = compress_blocks(self.content, algorithm, block_size=50000)
+                self.assertEqual(
+                    self.content, decompress_content(compressed, algorithm)
+                )
+                self.assertEqual(
+                    self.content, "".join(decompress_stream(compressed, algorithm))
+                )
+
+    def test_content_is_kept_without_compression(self):
+        self.assertEqual(self.content, compress_blocks(self.content, "pack"))
+
+
+class TestAutoCompression(unittest.TestCase):
+    content = "".join(
+        f"def function_{i}(x):\n    return x * {i}\n" for i in range(2000)
+    )
+
+    def test_levels_are_applied_and_ignored_when_decompressing(self):
+        self.assertEqual(("zlib", 1), split_algorithm("zlib:1"))
+        self.assertEqual(("rle", None), split_algorithm("rle"))
+        fast = compress_content(self.content, "lzma:0")
+        best = compress_content(self.content, "lzma:9")
+
+        self.assertNotEqual(fast, best)
+        self.assertEqual(self.content, decompress_content(fast, "lzma"))
+        with compress_stream([self.content], "brotli:4") as out:
+            compressed = out.read().decode("utf-8")
+        self.assertEqual(self.content, decompress_content(compressed, "brotli:11"))
+
+    def test_choice_follows_the_upload_rate(self):
+        sample = sample_content(
+            [f"f{i}.py" for i in range(100)], lambda path: self.content, 64 * 1024
+        )
+
+        self.assertEqual(64 * 1024, len(sample))
+        self.assertNotEqual(
+            "pack", choose_algorithm(sample, 10 * 1024 * 1024, upload_rate=1024)
+        )
+        self.assertEqual("pack", choose_algorithm(sample, 10 * 1024 * 1024, 1e15))
+
+    def test_profile_ignores_small_edits(self):
+        sizes = {f"src/f{i}.py": 1000 for i in range(50)}
+        sizes.update({f"docs/d{i}.md": 1000 for i in range(10)})
+        profile = content_profile(sizes)
+
+        sizes["src/f1.py"] = 1200
+        self.assertEqual(profile, content_profile(sizes))
+        sizes.update({f"data/j{i}.json": 5000 for i in range(20)})
+        self.assertNotEqual(profile, content_profile(sizes))
+        self.assertEqual(content_profile({}), content_profile({}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import sys
+import tempfile
+import unittest
+
+from claudesync.configmanager import InMemoryConfigManager
+from claudesync.content_cache import ContentCache
+from claudesync.utils import get_local_files
+
+
+class TestContentCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, "w", newline="") as f:
+            f.write(content)
+        return path
+
+    def test_read_caches_until_the_file_changes(self):
+        path = self.write("a.txt", "one\r\n")
+        cache = ContentCache()
+
+        self.assertEqual("one\n", cache.read(path))
+        self.assertEqual("one\n", cache.get(path, os.stat(path)))
+
+        self.write("a.txt", "two, longer\n")
+        self.assertIsNone(cache.get(path, os.stat(path)))
+        self.assertEqual("two, longer\n", cache.read(path))
+
+    def test_least_recently_used_contents_are_evicted(self):
+        paths = [self.write(f"{i}.txt", str(i) * 100) for i in range(3)]
+        entry_size = sys.getsizeof("0" * 100)
+        cache = ContentCache(max_bytes=2 * entry_size)
+
+        cache.read(paths[0])
+        cache.read(paths[1])
+        cache.read(paths[0])
+        cache.read(paths[2])
+
+        self.assertEqual(2 * entry_size, cache.size)
+        self.assertIsNotNone(cache.get(paths[0], os.stat(paths[0])))
+        self.assertIsNone(cache.get(paths[1], os.stat(paths[1])))
+        self.assertIsNotNone(cache.get(paths[2], os.stat(paths[2])))
+
+    def test_scan_fills_the_cache(self):
+        path = self.write("a.txt", "line\r\n")
+        self.write("b.bin", "\x00")
+        cache = ContentCache()
+
+        get_local_files(InMemoryConfigManager(), self.tmpdir.name, content_cache=cache)
+
+        self.assertEqual("line\n", cache.get(path, os.stat(path)))
+        self.assertEqual(sys.getsizeof("line\n"), cache.size)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+
+from claudesync.fingerprint import tree_fingerprint
+
+
+class TestTreeFingerprint(unittest.TestCase):
+    def setUp(self):
+        self.files = [
+            ("README.md", (10, 1, 1)),
+            ("src/app.py", (20, 2, 2)),
+            ("src/lib/util.py", (30, 3, 3)),
+            ("docs/index.md", (40, 4, 4)),
+        ]
+
+    def test_changed_file_changes_the_fingerprint(self):
+        changed = list(self.files)
+        changed[2] = ("src/lib/util.py", (31, 5, 3))
+
+        self.assertNotEqual(tree_fingerprint(self.files), tree_fingerprint(changed))
+
+    def test_order_does_not_matter(self):
+        self.assertEqual(
+            tree_fingerprint(self.files), tree_fingerprint(self.files[::-1])
+        )
+
+    def test_added_and_removed_files_change_the_fingerprint(self):
+        fingerprint = tree_fingerprint(self.files)
+        self.assertNotEqual(fingerprint, tree_fingerprint(self.files[:-1]))
+        self.assertNotEqual(
+            fingerprint, tree_fingerprint(self.files + [("new.txt", (1, 1, 9))])
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
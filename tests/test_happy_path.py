@@ -1,8 +1,9 @@
+import os
+import tempfile
 import threading
 import time
 import unittest
 from click.testing import CliRunner
-from unittest.mock import patch
 from claudesync.cli.main import cli
 from claudesync.configmanager import InMemoryConfigManager
 from mock_http_server import run_mock_server
@@ -24,11 +25,18 @@ class TestClaudeSyncHappyPath(unittest.TestCase):
             "claude_api_url", "http://127.0.0.1:8000/api"
         )  # Set BASE_URL for the mock server
 
-    @patch("claudesync.utils.get_local_files")
-    def test_happy_path(self, mock_get_local_files):
-        # Mock the API calls
-        mock_get_local_files.return_value = {"test.txt": "content_hash"}
+        # The project is created in the working directory, and push writes its manifest there.
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmpdir.name)
+        with open("test.txt", "w") as f:
+            f.write("test content")
 
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmpdir.cleanup()
+
+    def test_happy_path(self):
         # Login
         result = self.runner.invoke(
             cli,
@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from claudesync.ignore import IgnoreMatcher, _RuleSet
+
+
+class TestIgnoreMatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.base_path = self.tmpdir.name
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, rel_path, content):
+        path = os.path.join(self.base_path, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+
+    def test_root_gitignore_and_claudeignore(self):
+        self.write(".gitignore", "build/\n*.log\n!keep.log\n")
+        self.write(".claudeignore", "secret.txt\n")
+        matcher = IgnoreMatcher(self.base_path, excluded_dirs={".git"})
+
+        self.assertTrue(matcher.is_ignored_dir("build"))
+        self.assertTrue(matcher.is_ignored_dir("src/build"))
+        self.assertTrue(matcher.is_ignored_dir(".git"))
+        self.assertFalse(matcher.is_ignored_dir("src"))
+        self.assertTrue(matcher.is_ignored_file("debug.log"))
+        self.assertFalse(matcher.is_ignored_file("keep.log"))
+        self.assertTrue(matcher.is_ignored_file("secret.txt"))
+        self.assertFalse(matcher.is_ignored_file("src/main.py"))
+
+    def test_nested_gitignore_applies_below_its_directory(self):
+        self.write(".gitignore", "*.tmp\n")
+        self.write("pkg/.gitignore", "/generated.py\n!important.tmp\n")
+        matcher = IgnoreMatcher(self.base_path)
+
+        self.assertTrue(matcher.is_ignored_file("pkg/generated.py"))
+        self.assertFalse(matcher.is_ignored_file("generated.py"))
+        self.assertFalse(matcher.is_ignored_file("pkg/sub/generated.py"))
+        self.assertTrue(matcher.is_ignored_file("pkg/other.tmp"))
+        self.assertFalse(matcher.is_ignored_file("pkg/important.tmp"))
+        self.assertTrue(matcher.is_ignored_file("important.tmp"))
+
+    def test_claudeignore_of_a_submodule_applies_below_it(self):
+        self.write(".claudeignore", "*.log\n")
+        self.write("modules/sub/.claudeignore", "/data.txt\n!keep.log\n")
+        matcher = IgnoreMatcher(self.base_path, claudeignore_roots=["modules/sub"])
+
+        self.assertTrue(matcher.is_ignored_file("modules/sub/data.txt"))
+        self.assertFalse(matcher.is_ignored_file("data.txt"))
+        self.assertFalse(matcher.is_ignored_file("modules/sub/src/data.txt"))
+        self.assertFalse(matcher.is_ignored_file("modules/sub/keep.log"))
+        self.assertTrue(matcher.is_ignored_file("modules/sub/debug.log"))
+        self.assertTrue(matcher.is_ignored_file("debug.log"))
+
+    def test_directories_below_ignored_directories_are_ignored(self):
+        self.write(".claudeignore", "vendor\n")
+        matcher = IgnoreMatcher(self.base_path, excluded_paths={"modules/sub"})
+
+        self.assertTrue(matcher.is_ignored_dir("vendor/lib/deep"))
+        self.assertTrue(matcher.is_ignored_dir("modules/sub/src"))
+        self.assertFalse(matcher.is_ignored_dir("modules/other"))
+
+    def test_category_patterns_and_binary_extensions(self):
+        matcher = IgnoreMatcher(self.base_path, category_patterns=["*.py", "*.png"])
+
+        self.assertFalse(matcher.is_ignored_file("a/b.py"))
+        self.assertTrue(matcher.is_ignored_file("a/b.txt"))
+        self.assertTrue(matcher.is_ignored_file("logo.PNG"))
+        self.assertTrue(matcher.is_ignored_file("b.py~"))
+        self.assertFalse(IgnoreMatcher(self.base_path).is_ignored_file("model.obj"))
+
+    def test_compiled_rules_are_persisted(self):
+        self.write(".gitignore", "*.log\n")
+        os.makedirs(os.path.join(self.base_path, ".claudesync"))
+        cache_file = os.path.join(self.base_path, ".claudesync", "ignore_cache.json")
+        matcher = IgnoreMatcher(self.base_path, cache_file=cache_file)
+        self.assertTrue(matcher.is_ignored_file("a.log"))
+        matcher.save()
+        self.assertTrue(os.path.exists(cache_file))
+
+        with mock.patch.object(_RuleSet, "from_lines") as from_lines:
+            matcher = IgnoreMatcher(self.base_path, cache_file=cache_file)
+            self.assertTrue(matcher.is_ignored_file("a.log"))
+        from_lines.assert_not_called()
+
+        self.write(".gitignore", "*.txt\n")
+        os.utime(os.path.join(self.base_path, ".gitignore"), ns=(0, 0))
+        matcher = IgnoreMatcher(self.base_path, cache_file=cache_file)
+        self.assertFalse(matcher.is_ignored_file("a.log"))
+        self.assertTrue(matcher.is_ignored_file("a.txt"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import json
+import unittest
+
+from claudesync.providers.json_stream import JSONArrayDecoder, iter_json_array
+
+
+def chunked(data, size):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+class TestJSONArrayDecoder(unittest.TestCase):
+    def setUp(self):
+        self.docs = [
+            {"uuid": str(i), "file_name": f"f{i}.txt", "content": "é ü\n" * (i * 50)}
+            for i in range(20)
+        ] + [12345, "text", None]
+        self.data = json.dumps(self.docs, ensure_ascii=False).encode("utf-8")
+
+    def test_any_chunk_size_yields_the_same_elements(self):
+        for size in (1, 3, 7, 64, 4096, len(self.data)):
+            self.assertEqual(
+                self.docs, list(iter_json_array(chunked(self.data, size))), size
+            )
+
+    def test_elements_are_yielded_as_soon_as_they_are_complete(self):
+        decoder = JSONArrayDecoder()
+        self.assertEqual([{"a": 1}], decoder.feed(b'[{"a": 1}, {"b"'))
+        self.assertEqual([{"b": 2}], decoder.feed(b": 2}, 3"))
+        self.assertEqual([], decoder.feed(b"4"))
+        self.assertEqual([34], decoder.feed(b"]"))
+        self.assertEqual([], decoder.close())
+
+    def test_empty_input_yields_nothing(self):
+        self.assertEqual([], list(iter_json_array([])))
+        self.assertEqual([], list(iter_json_array([b" [ ] "])))
+
+    def test_invalid_input_raises(self):
+        for data in (b'{"a": 1}', b"[1, 2", b"[1 2]", b"[1], 2"):
+            with self.assertRaises(ValueError, msg=data):
+                list(iter_json_array([data]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from claudesync.configmanager import InMemoryConfigManager
+from claudesync.manifest import SyncManifest
+from claudesync.utils import compute_md5_hash, get_local_files
+
+
+class TestSyncManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.local_path = self.tmpdir.name
+        os.makedirs(os.path.join(self.local_path, ".claudesync"))
+        with open(os.path.join(self.local_path, "a.txt"), "w") as f:
+            f.write("hello\r\nworld")
+        with open(os.path.join(self.local_path, "b.bin"), "wb") as f:
+            f.write(b"\x00\x01")
+        self.config = InMemoryConfigManager()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_unchanged_files_are_not_reopened(self):
+        manifest = SyncManifest.for_project(self.local_path, "proj1")
+        files = get_local_files(self.config, self.local_path, manifest=manifest)
+        self.assertEqual({"a.txt": compute_md5_hash("hello\nworld")}, files)
+        manifest.save()
+
+        manifest = SyncManifest.for_project(self.local_path, "proj1")
+        with patch("claudesync.utils.hash_text_file") as mock_hash:
+            self.assertEqual(
+                files,
+                get_local_files(self.config, self.local_path, manifest=manifest),
+            )
+        mock_hash.assert_not_called()
+
+    def test_changed_file_is_rehashed_and_loses_remote_state(self):
+        manifest = SyncManifest.for_project(self.local_path, "proj1")
+        get_local_files(self.config, self.local_path, manifest=manifest)
+        manifest.set_remote_uuid("a.txt", "doc1")
+        manifest.set_token_count("a.txt", manifest.get_hash("a.txt"), 3)
+
+        with open(os.path.join(self.local_path, "a.txt"), "w") as f:
+            f.write("changed content")
+        files = get_local_files(self.config, self.local_path, manifest=manifest)
+
+        self.assertEqual(compute_md5_hash("changed content"), files["a.txt"])
+        self.assertIsNone(manifest.files["a.txt"]["uuid"])
+        self.assertIsNone(manifest.get_token_count("a.txt", files["a.txt"]))
+
+    def test_remote_checksums_are_memoized_by_uuid(self):
+        manifest = SyncManifest.for_project(self.local_path, "proj1")
+        manifest.set_remote_files(
+            {
+                "doc1": {
+                    "file_name": "a.txt",
+                    "hash": "abc",
+                    "size": 5,
+                    "created_at": "2023-01-01T00:00:00Z",
+                }
+            }
+        )
+        doc = {
+            "uuid": "doc1",
+            "file_name": "a.txt",
+            "content": "hello",
+            "created_at": "2023-01-01T00:00:00Z",
+        }
+
+        self.assertEqual("abc", manifest.known_checksum(doc))
+        self.assertIsNone(manifest.known_checksum(dict(doc, uuid="doc2")))
+        self.assertIsNone(manifest.known_checksum(dict(doc, content="hello!")))
+        self.assertIsNone(manifest.known_checksum(dict(doc, file_name="b.txt")))
+
+    def test_up_to_date_after_a_complete_sync_of_the_same_files(self):
+        manifest = SyncManifest.for_project(self.local_path, "proj1")
+        get_local_files(self.config, self.local_path, manifest=manifest)
+        self.assertFalse(manifest.is_up_to_date())
+        manifest.mark_synced()
+        manifest.save()
+
+        manifest = SyncManifest.for_project(self.local_path, "proj1")
+        get_local_files(self.config, self.local_path, manifest=manifest)
+        self.assertTrue(manifest.is_up_to_date())
+
+        with open(os.path.join(self.local_path, "c.txt"), "w") as f:
+            f.write("new")
+        get_local_files(self.config, self.local_path, manifest=manifest)
+        self.assertFalse(manifest.is_up_to_date())
+
+        manifest.mark_synced(complete=False)
+        get_local_files(self.config, self.local_path, manifest=manifest)
+        self.assertFalse(manifest.is_up_to_date())
+
+    def test_changed_settings_or_stale_remote_state_are_not_up_to_date(self):
+        manifest = SyncManifest.for_project(self.local_path, "proj1")
+        get_local_files(self.config, self.local_path, manifest=manifest)
+        manifest.mark_synced(settings={"compression_algorithm": "none"})
+
+        self.assertTrue(manifest.is_up_to_date({"compression_algorithm": "none"}))
+        self.assertFalse(manifest.is_up_to_date({"compression_algorithm": "zlib"}))
+        self.assertTrue(manifest.is_up_to_date({"compression_algorithm": "none"}, 60))
+        manifest.synced_at -= 120
+        self.assertFalse(manifest.is_up_to_date({"compression_algorithm": "none"}, 60))
+
+        self.config.set("submodules", [{"relative_path": "sub"}])
+        get_local_files(self.config, self.local_path, manifest=manifest)
+        self.assertFalse(manifest.is_up_to_date({"compression_algorithm": "none"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
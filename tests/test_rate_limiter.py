@@ -0,0 +1,82 @@
+import time
+import unittest
+from unittest.mock import patch
+
+from claudesync.configmanager import InMemoryConfigManager
+from claudesync.exceptions import RateLimitError
+from claudesync.providers.claude_ai import ClaudeAIProvider
+from claudesync.rate_limiter import AdaptiveRateLimiter, get_shared_rate_limiter
+
+
+class TestAdaptiveRateLimiter(unittest.TestCase):
+    def test_rate_grows_on_success_and_halves_on_throttle(self):
+        limiter = AdaptiveRateLimiter(2.0, max_rate=3.0, increase_step=0.5)
+
+        for _ in range(5):
+            limiter.on_success(0.1)
+        self.assertEqual(3.0, limiter.rate)
+
+        limiter.on_throttle()
+        self.assertEqual(1.5, limiter.rate)
+
+    def test_slow_calls_back_off(self):
+        limiter = AdaptiveRateLimiter(4.0)
+        limiter.on_success(0.1)
+        rate = limiter.rate
+
+        limiter.on_success(5.0)
+
+        self.assertLess(limiter.rate, rate)
+
+    def test_no_call_starts_before_the_limit_resets(self):
+        limiter = AdaptiveRateLimiter(10.0)
+
+        wait = limiter.on_throttle(resets_at=time.time() + 30)
+
+        self.assertGreater(wait, 29)
+        self.assertGreater(limiter.reserve(), 29)
+
+    def test_limiter_is_shared_per_endpoint(self):
+        config = InMemoryConfigManager()
+        self.assertIs(
+            get_shared_rate_limiter("http://a", config),
+            get_shared_rate_limiter("http://a", config),
+        )
+        self.assertIsNot(
+            get_shared_rate_limiter("http://a", config),
+            get_shared_rate_limiter("http://b", config),
+        )
+
+
+class TestProviderRateLimiting(unittest.TestCase):
+    def setUp(self):
+        self.config = InMemoryConfigManager()
+        self.config.set("claude_api_url", f"http://rate-limit-test/{id(self)}")
+        self.config.set("upload_delay", 0)
+        self.provider = ClaudeAIProvider(self.config)
+
+    @patch("claudesync.providers.claude_ai.ClaudeAIProvider._send_request")
+    def test_throttled_request_waits_and_retries(self, mock_send):
+        mock_send.side_effect = [
+            RateLimitError("limited", time.time() + 0.2),
+            {"ok": True},
+        ]
+
+        start = time.monotonic()
+        self.assertEqual({"ok": True}, self.provider._make_request("GET", "/x"))
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+        self.assertEqual(2, mock_send.call_count)
+
+    @patch("claudesync.providers.claude_ai.ClaudeAIProvider._send_request")
+    def test_distant_reset_is_not_waited_for(self, mock_send):
+        self.config.set("rate_limit_max_wait", 10)
+        mock_send.side_effect = RateLimitError("limited", time.time() + 3600)
+
+        with self.assertRaises(RateLimitError):
+            self.provider._make_request("GET", "/x")
+        self.assertEqual(1, mock_send.call_count)
+
+
+if __name__ == "__main__":
+    unittest.main()
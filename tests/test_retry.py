@@ -0,0 +1,91 @@
+import unittest
+from unittest.mock import patch
+
+from claudesync.configmanager import InMemoryConfigManager
+from claudesync.exceptions import (
+    ConnectionFailedError,
+    ForbiddenError,
+    ProviderError,
+    RequestTimeoutError,
+    ServerError,
+)
+from claudesync.providers.claude_ai import ClaudeAIProvider
+from claudesync.retry import RetryBudget, RetryPolicy
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_rejected_requests_are_retried_for_every_method(self):
+        policy = RetryPolicy()
+        self.assertTrue(policy.is_retryable(ForbiddenError("403"), "POST"))
+        self.assertTrue(policy.is_retryable(ForbiddenError("403"), "GET"))
+
+    def test_transient_errors_are_only_retried_when_idempotent(self):
+        policy = RetryPolicy()
+        for error in (
+            ServerError("502", 502),
+            ConnectionFailedError("refused"),
+            RequestTimeoutError("timeout"),
+        ):
+            self.assertTrue(policy.is_retryable(error, "GET"))
+            self.assertTrue(policy.is_retryable(error, "DELETE"))
+            self.assertFalse(policy.is_retryable(error, "POST"))
+            self.assertTrue(policy.is_retryable(error, "POST", idempotent=True))
+
+    def test_other_errors_are_not_retried(self):
+        self.assertFalse(RetryPolicy().is_retryable(ProviderError("404"), "GET"))
+
+    def test_attempts_and_budget_are_limited(self):
+        policy = RetryPolicy(max_attempts=3, budget=RetryBudget(max_tokens=2))
+        error = ServerError("500", 500)
+
+        self.assertFalse(policy.should_retry(error, "GET", attempt=3))
+        self.assertTrue(policy.should_retry(error, "GET", attempt=1))
+        self.assertTrue(policy.should_retry(error, "GET", attempt=1))
+        self.assertFalse(policy.should_retry(error, "GET", attempt=1))
+
+        for _ in range(11):
+            policy.budget.record_success()
+        self.assertTrue(policy.should_retry(error, "GET", attempt=1))
+
+    def test_backoff_grows_exponentially_up_to_the_maximum(self):
+        policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+        for attempt, bound in ((1, 1.0), (2, 2.0), (3, 4.0), (6, 5.0)):
+            for _ in range(20):
+                self.assertLessEqual(policy.backoff(attempt), bound)
+
+
+class TestProviderRetries(unittest.TestCase):
+    def setUp(self):
+        self.config = InMemoryConfigManager()
+        self.config.set("claude_api_url", f"http://retry-test/{id(self)}")
+        self.config.set("upload_delay", 0)
+        self.config.set("retry_base_delay", 0.01)
+        self.provider = ClaudeAIProvider(self.config)
+
+    @patch("claudesync.providers.claude_ai.ClaudeAIProvider._send_request")
+    def test_server_errors_are_retried_for_gets(self, mock_send):
+        mock_send.side_effect = [ServerError("503", 503), {"ok": True}]
+
+        self.assertEqual({"ok": True}, self.provider._make_request("GET", "/x"))
+        self.assertEqual(2, mock_send.call_count)
+
+    @patch("claudesync.providers.claude_ai.ClaudeAIProvider._send_request")
+    def test_uploads_are_not_resent_after_server_errors(self, mock_send):
+        mock_send.side_effect = ServerError("503", 503)
+
+        with self.assertRaises(ServerError):
+            self.provider.upload_file("org", "proj", "a.txt", "content")
+        self.assertEqual(1, mock_send.call_count)
+
+    @patch("claudesync.providers.claude_ai.ClaudeAIProvider._send_request")
+    def test_forbidden_uploads_are_retried(self, mock_send):
+        mock_send.side_effect = [ForbiddenError("403"), {"uuid": "doc"}]
+
+        self.assertEqual(
+            {"uuid": "doc"},
+            self.provider.upload_file("org", "proj", "a.txt", "content"),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+from claudesync.configmanager import FileConfigManager
+from claudesync.session_key_manager import SessionKeyManager, _parse_ssh_key_type
+
+
+def openssh_private_key(private_key):
+    return private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.OpenSSH,
+        serialization.NoEncryption(),
+    ).decode("ascii")
+
+
+class TestSessionKeyManager(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.home = self.tmpdir.name
+        os.makedirs(os.path.join(self.home, ".ssh"))
+        with open(os.path.join(self.home, ".ssh", "id_ed25519"), "w") as f:
+            f.write(openssh_private_key(ed25519.Ed25519PrivateKey.generate()))
+        self.home_patch = patch.dict(os.environ, {"HOME": self.home})
+        self.home_patch.start()
+
+    def tearDown(self):
+        self.home_patch.stop()
+        self.tmpdir.cleanup()
+
+    def test_key_type_is_read_from_the_key_file(self):
+        self.assertEqual(
+            "ssh-ed25519",
+            _parse_ssh_key_type(
+                openssh_private_key(ed25519.Ed25519PrivateKey.generate())
+            ),
+        )
+        self.assertEqual(
+            "ecdsa-sha2-nistp256",
+            _parse_ssh_key_type(
+                openssh_private_key(ec.generate_private_key(ec.SECP256R1()))
+            ),
+        )
+        self.assertEqual("ed25519", SessionKeyManager()._get_key_type())
+
+    def test_session_key_is_decrypted_once_per_key_file_version(self):
+        config = FileConfigManager()
+        expiry = datetime.now() + timedelta(days=1)
+        config.set_session_key("claude.ai", "sk-ant-1", expiry)
+
+        with patch.object(
+            SessionKeyManager,
+            "decrypt_session_key",
+            wraps=SessionKeyManager().decrypt_session_key,
+        ) as decrypt:
+            for _ in range(3):
+                self.assertEqual("sk-ant-1", config.get_session_key("claude.ai")[0])
+            self.assertEqual(1, decrypt.call_count)
+
+            config.set_session_key("claude.ai", "sk-ant-2", expiry)
+            self.assertEqual("sk-ant-2", config.get_session_key("claude.ai")[0])
+            self.assertEqual(2, decrypt.call_count)
+
+    def test_expired_session_keys_are_not_returned(self):
+        config = FileConfigManager()
+        config.set_session_key(
+            "claude.ai", "sk-ant-1", datetime.now() - timedelta(seconds=1)
+        )
+        self.assertEqual((None, None), config.get_session_key("claude.ai"))
+
+
+if __name__ == "__main__":
+    unittest.main()
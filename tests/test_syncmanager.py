@@ -0,0 +1,298 @@
+import io
+import itertools
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from tqdm import tqdm
+
+from claudesync.compression import (
+    Pack,
+    compress_stream,
+    decompress_content,
+    pack_files,
+)
+from claudesync.configmanager import InMemoryConfigManager
+from claudesync.exceptions import ProviderError
+from claudesync.manifest import SyncManifest
+from claudesync.syncmanager import SyncManager
+from claudesync.utils import compute_md5_hash
+
+
+class FakeProvider:
+    def __init__(self, failing_files=()):
+        self.failing_files = set(failing_files)
+        self.docs = {}
+        self.contents = {}
+        self.uuids = itertools.count()
+        self.lock = threading.Lock()
+
+    def upload_file(self, organization_id, project_id, file_name, content):
+        if file_name in self.failing_files:
+            raise ProviderError(f"upload of {file_name} rejected")
+        with self.lock:
+            uuid = f"doc{next(self.uuids)}"
+            self.docs[uuid] = file_name
+            self.contents[uuid] = content
+        return {"uuid": uuid, "created_at": "2023-01-01T00:00:00Z"}
+
+    def delete_file(self, organization_id, project_id, file_uuid):
+        with self.lock:
+            del self.docs[file_uuid]
+
+
+class TestSyncManager(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.local_path = self.tmpdir.name
+        os.makedirs(os.path.join(self.local_path, ".claudesync"))
+        self.local_files = {}
+        for i in range(20):
+            with open(os.path.join(self.local_path, f"f{i}.txt"), "w") as f:
+                f.write(f"content {i}")
+            self.local_files[f"f{i}.txt"] = compute_md5_hash(f"content {i}")
+
+        self.config = InMemoryConfigManager()
+        self.config.set("active_organization_id", "org1")
+        self.config.set("active_project_id", "proj1")
+        self.config.set("upload_delay", 0)
+        self.config.set("prune_remote_files", True)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def sync_manager(self, provider):
+        manifest = SyncManifest.for_project(self.local_path, "proj1")
+        return SyncManager(
+            provider, self.config, self.local_path, manifest=manifest, jobs=4
+        )
+
+    def test_failures_are_collected_without_aborting(self):
+        provider = FakeProvider(failing_files={"f3.txt", "f7.txt"})
+        sync_manager = self.sync_manager(provider)
+
+        sync_manager.sync(self.local_files, [])
+
+        self.assertEqual(
+            {"f3.txt", "f7.txt"},
+            {action.file_name for action, _ in sync_manager.failures},
+        )
+        self.assertEqual(18, len(provider.docs))
+        self.assertEqual(18, sync_manager.get_synced_file_count())
+
+    def test_remote_state_is_recorded_for_dry_runs(self):
+        provider = FakeProvider()
+        self.sync_manager(provider).sync(self.local_files, [])
+
+        sync_manager = self.sync_manager(provider)
+        self.assertFalse(sync_manager.preview(self.local_files).has_changes())
+
+    def test_change_set_only_touches_given_paths(self):
+        provider = FakeProvider()
+        self.sync_manager(provider).sync(self.local_files, [])
+        remote_files = [
+            {
+                "uuid": uuid,
+                "file_name": file_name,
+                "created_at": "2023-01-01T00:00:00Z",
+                "checksum": self.local_files[file_name],
+            }
+            for uuid, file_name in provider.docs.items()
+        ]
+
+        for name in ("f1.txt", "new.txt"):
+            with open(os.path.join(self.local_path, name), "w") as f:
+                f.write("changed")
+        sync_manager = self.sync_manager(provider)
+        sync_manager.sync(
+            {
+                "f1.txt": compute_md5_hash("changed"),
+                "new.txt": compute_md5_hash("changed"),
+            },
+            remote_files,
+            deleted_files={"f2.txt"},
+        )
+
+        names = sorted(provider.docs.values())
+        self.assertEqual(20, len(names))
+        self.assertIn("new.txt", names)
+        self.assertNotIn("f2.txt", names)
+        self.assertEqual([], sync_manager.failures)
+        self.assertEqual(2, sync_manager.get_synced_file_count())
+        self.assertEqual(20, len(sync_manager.manifest.remote_files))
+
+    def test_concurrent_syncs_share_a_progress_bar(self):
+        provider = FakeProvider()
+        with tqdm(total=0, file=io.StringIO()) as progress:
+            sync_managers = []
+            for project_id in ("proj1", "proj2"):
+                manifest = SyncManifest.for_project(self.local_path, project_id)
+                sync_managers.append(
+                    SyncManager(
+                        provider,
+                        self.config,
+                        self.local_path,
+                        manifest=manifest,
+                        jobs=4,
+                        progress=progress,
+                    )
+                )
+            threads = [
+                threading.Thread(target=sm.sync, args=(self.local_files, []))
+                for sm in sync_managers
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(40, progress.total)
+            self.assertEqual(40, progress.n)
+        self.assertEqual(40, len(provider.docs))
+
+    def test_parallel_compression_names_and_contents_match(self):
+        self.config.set("compression_algorithm", "lzma")
+        self.config.set("pack_chunk_size", 64)
+        uploads = {}
+        for workers in [0, 1, 3]:
+            self.config.set("compression_workers", workers)
+            self.config.set("compression_block_size", 16)
+            provider = FakeProvider()
+            self.sync_manager(provider).sync(self.local_files, [])
+            uploads[workers] = {
+                provider.docs[uuid]: content
+                for uuid, content in provider.contents.items()
+            }
+
+        self.assertEqual(set(uploads[0]), set(uploads[3]))
+        self.assertEqual(uploads[1], uploads[3])
+        for name, content in uploads[3].items():
+            self.assertEqual(
+                decompress_content(uploads[0][name], "lzma"),
+                decompress_content(content, "lzma"),
+            )
+
+    def test_auto_compression_is_chosen_once_per_content_profile(self):
+        self.config.set("compression_algorithm", "auto")
+        provider = FakeProvider()
+        with patch(
+            "claudesync.syncmanager.choose_algorithm", return_value="bz2:1"
+        ) as choose:
+            self.sync_manager(provider).sync(self.local_files, [])
+            self.sync_manager(FakeProvider()).sync(self.local_files, [])
+
+            self.assertEqual(1, choose.call_count)
+            for i in range(20, 60):
+                with open(os.path.join(self.local_path, f"g{i}.md"), "w") as f:
+                    f.write("more content " * 10)
+                self.local_files[f"g{i}.md"] = compute_md5_hash("more content " * 10)
+            self.sync_manager(FakeProvider()).sync(self.local_files, [])
+            self.assertEqual(2, choose.call_count)
+
+        self.assertEqual(
+            20,
+            sum(
+                len(Pack(decompress_content(content, "bz2")))
+                for content in provider.contents.values()
+            ),
+        )
+
+    def test_compressed_sync_uploads_only_changed_chunks(self):
+        self.config.set("compression_algorithm", "zlib")
+        self.config.set("pack_chunk_size", 64)
+        provider = FakeProvider()
+
+        def remote_files():
+            return [
+                {
+                    "uuid": uuid,
+                    "file_name": file_name,
+                    "created_at": "2023-01-01T00:00:00Z",
+                    "content": provider.contents[uuid],
+                }
+                for uuid, file_name in provider.docs.items()
+            ]
+
+        self.sync_manager(provider).sync(self.local_files, remote_files())
+        packs = dict(provider.docs)
+        self.assertGreater(len(packs), 1)
+        self.assertEqual(
+            20,
+            sum(
+                len(Pack(decompress_content(content, "zlib")))
+                for content in provider.contents.values()
+            ),
+        )
+
+        with open(os.path.join(self.local_path, "f7.txt"), "w") as f:
+            f.write("changed")
+        self.local_files["f7.txt"] = compute_md5_hash("changed")
+        self.sync_manager(provider).sync(self.local_files, remote_files())
+
+        added = set(provider.docs) - set(packs)
+        removed = set(packs) - set(provider.docs)
+        self.assertEqual(1, len(added))
+        self.assertEqual(1, len(removed))
+        self.assertIn(
+            "changed", decompress_content(provider.contents[added.pop()], "zlib")
+        )
+
+    def test_foreign_packs_are_unpacked_and_packed_again(self):
+        self.config.set("compression_algorithm", "zlib")
+        self.config.set("two_way_sync", True)
+        provider = FakeProvider()
+        self.sync_manager(provider).sync(self.local_files, [])
+        remote_files = [
+            {
+                "uuid": uuid,
+                "file_name": file_name,
+                "created_at": "2023-01-01T00:00:00Z",
+                "content": provider.contents[uuid],
+            }
+            for uuid, file_name in provider.docs.items()
+        ]
+        provider.docs["foreign"] = "claudesync_pack_foreign.dat"
+        with compress_stream(
+            [pack_files([("new.txt", "from elsewhere", None)])],
+            "bz2",
+            record_algorithm=True,
+        ) as compressed:
+            remote_files.append(
+                {
+                    "uuid": "foreign",
+                    "file_name": "claudesync_pack_foreign.dat",
+                    "created_at": "2023-01-01T00:00:00Z",
+                    "content": compressed.read().decode("utf-8"),
+                }
+            )
+
+        sync_manager = self.sync_manager(provider)
+        sync_manager.sync(self.local_files, remote_files)
+
+        with open(os.path.join(self.local_path, "new.txt")) as f:
+            self.assertEqual("from elsewhere", f.read())
+        # The foreign pack is replaced by packs of this project holding its files.
+        self.assertNotIn("foreign", provider.docs)
+        self.assertIn(
+            "new.txt",
+            [
+                path
+                for uuid in provider.docs
+                for path in Pack(
+                    decompress_content(provider.contents[uuid], "zlib")
+                ).paths()
+            ],
+        )
+        self.assertEqual(
+            compute_md5_hash("from elsewhere"), sync_manager.local_checksums["new.txt"]
+        )
+        self.assertEqual(
+            compute_md5_hash("from elsewhere"),
+            sync_manager.manifest.get_hash("new.txt"),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from claudesync.syncplan import SyncActionType, build_sync_plan
+from claudesync.utils import compute_md5_hash
+
+
+def remote_doc(uuid, file_name, content, created_at="2023-01-01T00:00:00Z"):
+    return {
+        "uuid": uuid,
+        "file_name": file_name,
+        "content": content,
+        "created_at": created_at,
+    }
+
+
+class TestBuildSyncPlan(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.local_path = self.tmpdir.name
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def kinds(self, plan):
+        return {a.file_name: a.action_type for a in plan.actions}
+
+    def test_one_way_plan(self):
+        local_files = {
+            "same.txt": compute_md5_hash("same"),
+            "changed.txt": compute_md5_hash("new"),
+            "new.txt": compute_md5_hash("new file"),
+        }
+        remote_files = [
+            remote_doc("1", "same.txt", "same"),
+            remote_doc("2", "changed.txt", "old"),
+            remote_doc("3", "gone.txt", "gone"),
+        ]
+
+        plan = build_sync_plan(
+            local_files, remote_files, self.local_path, prune_remote_files=True
+        )
+
+        self.assertEqual(
+            {
+                "same.txt": SyncActionType.UNCHANGED,
+                "changed.txt": SyncActionType.REPLACE,
+                "new.txt": SyncActionType.UPLOAD,
+                "gone.txt": SyncActionType.DELETE,
+            },
+            self.kinds(plan),
+        )
+        self.assertTrue(plan.has_changes())
+
+    def test_remote_only_files_are_kept_without_pruning(self):
+        plan = build_sync_plan(
+            {}, [remote_doc("1", "gone.txt", "gone")], self.local_path
+        )
+        self.assertEqual([], plan.actions)
+
+    def test_duplicate_remote_docs_are_pruned(self):
+        local_files = {"a.txt": compute_md5_hash("a")}
+        remote_files = [remote_doc("1", "a.txt", "a"), remote_doc("2", "a.txt", "a")]
+
+        plan = build_sync_plan(
+            local_files, remote_files, self.local_path, prune_remote_files=True
+        )
+
+        deletes = plan.get(SyncActionType.DELETE)
+        self.assertEqual(["2"], [a.remote_file["uuid"] for a in deletes])
+
+    def test_two_way_pulls_missing_and_newer_files(self):
+        with open(os.path.join(self.local_path, "ignored.txt"), "w") as f:
+            f.write("old")
+        os.utime(os.path.join(self.local_path, "ignored.txt"), (0, 0))
+        remote_files = [
+            remote_doc("1", "missing.txt", "remote"),
+            remote_doc("2", "ignored.txt", "remote"),
+        ]
+
+        plan = build_sync_plan({}, remote_files, self.local_path, two_way_sync=True)
+
+        self.assertEqual(
+            {
+                "missing.txt": SyncActionType.PULL,
+                "ignored.txt": SyncActionType.PULL,
+            },
+            self.kinds(plan),
+        )
+
+    def test_precomputed_checksums_are_used(self):
+        local_files = {"a.txt": "abc"}
+        remote_files = [{"uuid": "1", "file_name": "a.txt", "checksum": "abc"}]
+
+        plan = build_sync_plan(local_files, remote_files, self.local_path)
+
+        self.assertFalse(plan.has_changes())
+
+    def test_known_checksums_skip_hashing_remote_content(self):
+        local_files = {"a.txt": compute_md5_hash("a")}
+        remote_files = [remote_doc("1", "a.txt", "a")]
+
+        with patch("claudesync.syncplan.compute_md5_hash") as mock_hash:
+            plan = build_sync_plan(
+                local_files,
+                remote_files,
+                self.local_path,
+                known_checksum=lambda doc: local_files[doc["file_name"]],
+            )
+        mock_hash.assert_not_called()
+        self.assertFalse(plan.has_changes())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import socket
+import threading
+import unittest
+import urllib.error
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from claudesync.providers.transport import HTTPTransport
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = set()
+
+    def do_GET(self):
+        KeepAliveHandler.connections.add(self.client_address)
+        status = 404 if self.path == "/missing" else 200
+        body = self.path.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestHTTPTransport(unittest.TestCase):
+    def setUp(self):
+        KeepAliveHandler.connections = set()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.transport = HTTPTransport(pool_size=2)
+
+    def tearDown(self):
+        self.transport.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get(self, path):
+        with self.transport.request("GET", self.base_url + path, timeout=5) as r:
+            return r.read()
+
+    def test_connections_are_reused(self):
+        for i in range(5):
+            self.assertEqual(f"/doc{i}".encode(), self.get(f"/doc{i}"))
+        self.assertEqual(1, len(KeepAliveHandler.connections))
+
+    def test_error_statuses_raise_http_errors(self):
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            self.get("/missing")
+        self.assertEqual(404, context.exception.code)
+        self.assertEqual(b"/missing", context.exception.read())
+        self.assertEqual(b"/ok", self.get("/ok"))
+        self.assertEqual(1, len(KeepAliveHandler.connections))
+
+    def test_connections_closed_by_the_server_are_reopened(self):
+        self.get("/first")
+        for conn in list(self.transport._pools.values())[0].idle.queue:
+            conn.sock.shutdown(socket.SHUT_RDWR)
+        self.assertEqual(b"/second", self.get("/second"))
+
+    def test_unreachable_hosts_raise_url_errors(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        with self.assertRaises(urllib.error.URLError):
+            self.transport.request("GET", f"http://127.0.0.1:{port}/", timeout=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,393 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from unittest import mock
+
+from claudesync.configmanager import InMemoryConfigManager
+from claudesync.exceptions import ConfigurationError
+from claudesync.manifest import SyncManifest
+from claudesync.utils import (
+    ProjectIndex,
+    compute_md5_hash,
+    detect_submodules,
+    get_changed_files,
+    get_files_at,
+    get_local_files,
+    hash_files,
+    hash_text_file,
+)
+
+
+class LocalFilesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.local_path = self.tmpdir.name
+        self.config = InMemoryConfigManager()
+        self.config.set("scan_jobs", 4)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, rel_path, content):
+        path = os.path.join(self.local_path, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        mode = "wb" if isinstance(content, bytes) else "w"
+        with open(path, mode) as f:
+            f.write(content)
+
+
+class TestGetLocalFiles(LocalFilesTestCase):
+    def test_scans_nested_directories(self):
+        expected = {}
+        for d in range(5):
+            for f in range(5):
+                rel_path = os.path.join(f"dir{d}", f"sub{f}", f"file{f}.txt")
+                self.write(rel_path, f"{d} {f}")
+                expected[rel_path] = compute_md5_hash(f"{d} {f}")
+        self.write("top.py", "print()")
+        expected["top.py"] = compute_md5_hash("print()")
+
+        files = get_local_files(self.config, self.local_path)
+
+        self.assertEqual(expected, files)
+        self.assertEqual(sorted(expected), list(files))
+
+    def test_applies_filters(self):
+        self.write(".gitignore", "build\n")
+        self.write(".claudeignore", "*.log\n")
+        self.write("keep.txt", "keep")
+        self.write("build/out.txt", "ignored")
+        self.write(".git/config", "ignored")
+        self.write("debug.log", "ignored")
+        self.write("notes.txt~", "ignored")
+        self.write("image.bin", b"\x00\x01\x02")
+        self.write("big.txt", "x" * 100)
+        self.write("sub/module.txt", "submodule")
+        self.config.set("max_file_size", 50)
+        self.config.set("submodules", [{"relative_path": "sub"}])
+
+        files = get_local_files(self.config, self.local_path)
+        self.assertEqual({".gitignore", ".claudeignore", "keep.txt"}, set(files))
+
+        files = get_local_files(self.config, self.local_path, include_submodules=True)
+        self.assertIn(os.path.join("sub", "module.txt"), files)
+
+    def test_records_hashes_in_manifest(self):
+        self.write("a/b.txt", "b")
+        manifest = SyncManifest.for_project(self.local_path, "proj1")
+
+        files = get_local_files(self.config, self.local_path, manifest=manifest)
+
+        rel_path = os.path.join("a", "b.txt")
+        self.assertEqual(files[rel_path], manifest.files[rel_path]["hash"])
+        known, file_hash = manifest.lookup(
+            rel_path, os.stat(os.path.join(self.local_path, rel_path))
+        )
+        self.assertTrue(known)
+        self.assertEqual(files[rel_path], file_hash)
+
+    def test_files_at_given_paths(self):
+        self.write("a/b.txt", "b")
+        self.write("a/c.txt", "c")
+        self.write("gone/d.txt", "d")
+        self.write("e.txt", "e")
+        self.write("debug.log", "log")
+        self.write(".gitignore", "*.log\n")
+        manifest = SyncManifest.for_project(self.local_path, "proj1")
+        get_local_files(self.config, self.local_path, manifest=manifest)
+        shutil.rmtree(os.path.join(self.local_path, "gone"))
+        os.remove(os.path.join(self.local_path, "e.txt"))
+        self.write("new/f.txt", "f")
+
+        files, deleted = get_files_at(
+            self.config,
+            self.local_path,
+            ["a/b.txt", "new", "gone", "e.txt", "debug.log"],
+            manifest=manifest,
+        )
+
+        self.assertEqual(
+            {
+                os.path.join("a", "b.txt"): compute_md5_hash("b"),
+                os.path.join("new", "f.txt"): compute_md5_hash("f"),
+            },
+            files,
+        )
+        self.assertEqual({"gone", os.path.join("gone", "d.txt"), "e.txt"}, deleted)
+        self.assertIsNone(manifest.fingerprint)
+
+
+class TestProjectIndex(LocalFilesTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("main.txt", "main")
+        self.write("lib/package.json", "{}")
+        self.write("lib/src/a.txt", "a")
+        self.write("tools/setup.py", "setup")
+        self.write("build/package.json", "{}")
+        self.write(".gitignore", "build/\n")
+        self.config.set(
+            "submodules",
+            [
+                {
+                    "relative_path": "lib",
+                    "active_project_id": "lib1",
+                    "active_project_name": "lib",
+                }
+            ],
+        )
+
+    def build(self, **kwargs):
+        self.manifest = SyncManifest.for_project(self.local_path, "proj1")
+        self.lib_manifest = SyncManifest.for_project(self.local_path, "lib1")
+        return ProjectIndex.build(
+            self.config,
+            self.local_path,
+            manifest=self.manifest,
+            submodule_manifests={"lib": self.lib_manifest},
+            detect_filenames=["setup.py", "package.json"],
+            **kwargs,
+        )
+
+    def test_files_are_partitioned_by_submodule(self):
+        index = self.build()
+
+        self.assertEqual(
+            {".gitignore", "main.txt", os.path.join("tools", "setup.py")},
+            set(index.files),
+        )
+        self.assertEqual(
+            {"package.json", os.path.join("src", "a.txt")},
+            set(index.submodule_files["lib"]),
+        )
+        self.assertIn(os.path.join("src", "a.txt"), self.lib_manifest.files)
+        self.assertNotIn(os.path.join("lib", "src", "a.txt"), self.manifest.files)
+        self.assertIsNotNone(self.lib_manifest.fingerprint)
+        self.assertEqual(
+            [("lib", "package.json"), ("tools", "setup.py")], index.detected
+        )
+
+    def test_every_file_is_hashed_once_for_an_uberproject(self):
+        with mock.patch(
+            "claudesync.utils.hash_files", side_effect=hash_files
+        ) as mock_hash:
+            index = self.build(include_submodules=True)
+
+        hashed = [path for call in mock_hash.call_args_list for path in call.args[0]]
+        self.assertEqual(len(set(hashed)), len(hashed))
+        self.assertEqual(
+            index.submodule_files["lib"][os.path.join("src", "a.txt")],
+            index.files[os.path.join("lib", "src", "a.txt")],
+        )
+        self.assertIn(os.path.join("lib", "src", "a.txt"), self.manifest.files)
+
+    def test_submodule_claudeignore_applies_below_the_submodule(self):
+        self.write("lib/.claudeignore", "a.txt\n")
+        self.write("a.txt", "root a")
+        index = self.build()
+
+        self.assertIn("a.txt", index.files)
+        self.assertNotIn(os.path.join("src", "a.txt"), index.submodule_files["lib"])
+        self.assertIn("package.json", index.submodule_files["lib"])
+
+    def test_detect_submodules(self):
+        self.assertEqual(
+            [("lib", "package.json"), ("tools", "setup.py")],
+            detect_submodules(self.local_path, ["package.json", "setup.py"]),
+        )
+
+
+@unittest.skipUnless(shutil.which("git"), "git is not installed")
+class TestGetLocalFilesFromGitIndex(LocalFilesTestCase):
+    def setUp(self):
+        super().setUp()
+        self.git("init", "-q")
+        self.write(".gitignore", "*.log\n")
+        self.write("tracked.txt", "tracked")
+        self.write("src/module.py", "module")
+        self.write("debug.log", "ignored")
+        self.git("add", ".")
+        self.git("-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "init")
+        self.write("untracked.txt", "untracked")
+
+    def git(self, *args):
+        subprocess.run(["git", "-C", self.local_path, *args], check=True)
+
+    def test_matches_the_directory_walk(self):
+        self.write("src/module.py", "changed")
+        files = get_local_files(self.config, self.local_path)
+
+        self.config.set("use_git_index", False)
+        self.assertEqual(get_local_files(self.config, self.local_path), files)
+        self.assertEqual(
+            {
+                ".gitignore",
+                "tracked.txt",
+                os.path.join("src", "module.py"),
+                "untracked.txt",
+            },
+            set(files),
+        )
+        self.assertEqual(
+            compute_md5_hash("changed"), files[os.path.join("src", "module.py")]
+        )
+
+    def test_tracked_files_matching_gitignore_are_skipped(self):
+        self.write("build/out.txt", "built")
+        self.git("add", "build/out.txt")
+        self.write(".gitignore", "*.log\nbuild/\n")
+        files = get_local_files(self.config, self.local_path)
+
+        self.assertNotIn(os.path.join("build", "out.txt"), files)
+        self.config.set("use_git_index", False)
+        self.assertEqual(get_local_files(self.config, self.local_path), files)
+
+    def test_index_walks_nested_repositories(self):
+        self.write("vendored/lib.txt", "lib")
+        self.write("nested/notes.txt", "notes")
+        for path in ["vendored", "nested"]:
+            self.git("-C", path, "init", "-q")
+        self.git("-C", "vendored", "add", ".")
+        self.git(
+            "-C",
+            "vendored",
+            "-c",
+            "user.name=t",
+            "-c",
+            "user.email=t@t",
+            "commit",
+            "-qm",
+            "init",
+        )
+        # Tracked as a gitlink, like a git submodule.
+        self.git("add", "vendored")
+        files = get_local_files(self.config, self.local_path)
+
+        self.assertIn(os.path.join("vendored", "lib.txt"), files)
+        self.assertIn(os.path.join("nested", "notes.txt"), files)
+        self.assertIn("tracked.txt", files)
+        self.assertEqual(files, ProjectIndex.build(self.config, self.local_path).files)
+        self.config.set("use_git_index", False)
+        self.assertEqual(get_local_files(self.config, self.local_path), files)
+
+    def test_index_walks_submodules_with_their_own_repository(self):
+        self.write("lib/lib.py", "lib")
+        subprocess.run(
+            ["git", "-C", os.path.join(self.local_path, "lib"), "init", "-q"]
+        )
+        self.config.set(
+            "submodules",
+            [
+                {
+                    "relative_path": "lib",
+                    "active_project_id": "lib1",
+                    "active_project_name": "lib",
+                }
+            ],
+        )
+
+        index = ProjectIndex.build(self.config, self.local_path)
+
+        self.assertEqual(
+            {"lib.py": compute_md5_hash("lib")}, index.submodule_files["lib"]
+        )
+        self.assertNotIn(os.path.join("lib", "lib.py"), index.files)
+        self.assertIn("tracked.txt", index.files)
+
+    def test_unmodified_files_are_found_by_blob(self):
+        manifest = SyncManifest.for_project(self.local_path, "proj1")
+        get_local_files(self.config, self.local_path, manifest=manifest)
+        self.assertIsNotNone(manifest.files["tracked.txt"].get("blob"))
+        self.assertIsNone(manifest.files["untracked.txt"].get("blob"))
+
+        manifest.files["tracked.txt"]["mtime_ns"] = 0
+        manifest.files["tracked.txt"]["hash"] = "recorded"
+        files = get_local_files(self.config, self.local_path, manifest=manifest)
+        self.assertEqual("recorded", files["tracked.txt"])
+
+        self.write("tracked.txt", "modified")
+        files = get_local_files(self.config, self.local_path, manifest=manifest)
+        self.assertEqual(compute_md5_hash("modified"), files["tracked.txt"])
+
+    def test_changed_files_since_a_revision(self):
+        self.write("doomed.txt", "doomed")
+        self.git("add", "doomed.txt")
+        self.git("-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "two")
+        self.write("tracked.txt", "committed change")
+        self.git("mv", "src/module.py", "src/renamed.py")
+        self.git("-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qam", "three")
+        self.write(os.path.join("src", "renamed.py"), "unstaged change")
+        os.remove(os.path.join(self.local_path, "doomed.txt"))
+
+        changed, deleted = get_changed_files(self.config, self.local_path, "HEAD~1")
+
+        self.assertEqual(
+            {
+                "tracked.txt": compute_md5_hash("committed change"),
+                os.path.join("src", "renamed.py"): compute_md5_hash("unstaged change"),
+                "untracked.txt": compute_md5_hash("untracked"),
+            },
+            changed,
+        )
+        self.assertEqual({"doomed.txt", os.path.join("src", "module.py")}, deleted)
+
+    def test_changed_files_excluded_by_the_filters_count_as_deleted(self):
+        self.write("tracked.txt", "changed")
+        self.write("src/module.py", "changed")
+        self.write(".claudeignore", "tracked.txt\n")
+        self.write(".gitignore", "*.log\nsrc/\n")
+
+        changed, deleted = get_changed_files(self.config, self.local_path, "HEAD")
+        self.assertEqual({".gitignore", ".claudeignore", "untracked.txt"}, set(changed))
+        self.assertEqual(set(), deleted)
+
+        self.config.set("prune_remote_files", True)
+        changed, deleted = get_changed_files(self.config, self.local_path, "HEAD")
+        self.assertEqual({"tracked.txt", os.path.join("src", "module.py")}, deleted)
+
+    def test_changed_files_require_a_revision(self):
+        with self.assertRaises(ConfigurationError):
+            get_changed_files(self.config, self.local_path, "no-such-ref")
+
+
+class TestHashFiles(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, name, data):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_hashes_normalized_text(self):
+        path = self.write("crlf.txt", "a\r\nb\rc\u00e9".encode("utf-8"))
+        self.assertEqual(compute_md5_hash("a\nb\nc\u00e9"), hash_text_file(path))
+
+    def test_hashes_large_files(self):
+        content = "\u00e9" * (1024 * 1024) + "\r\n"
+        path = self.write("large.txt", content.encode("utf-8"))
+        self.assertEqual(
+            compute_md5_hash(content.replace("\r\n", "\n")), hash_text_file(path)
+        )
+
+    def test_rejects_binary_files(self):
+        self.assertIsNone(hash_text_file(self.write("nul.bin", b"abc\x00def")))
+        self.assertIsNone(hash_text_file(self.write("latin1.txt", b"caf\xe9")))
+
+    def test_results_are_in_input_order(self):
+        paths = [self.write(f"f{i}.txt", f"file {i}".encode()) for i in range(50)]
+        paths.append(self.write("binary.bin", b"\x00"))
+        expected = [compute_md5_hash(f"file {i}") for i in range(50)] + [None]
+
+        self.assertEqual(expected, hash_files(paths, jobs=4))
+        self.assertEqual(expected, hash_files(paths, jobs=2, use_processes=True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from claudesync.watcher import InotifyWatcher, PollingWatcher, iter_changes
+
+
+class WatcherTestMixin:
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.base_path = self.tmpdir.name
+        os.makedirs(os.path.join(self.base_path, "src"))
+        os.makedirs(os.path.join(self.base_path, "node_modules"))
+        self.write("src/a.txt", "a")
+        self.watcher = self.create_watcher(lambda rel_path: rel_path == "node_modules")
+
+    def tearDown(self):
+        self.watcher.close()
+        self.tmpdir.cleanup()
+
+    def write(self, rel_path, content):
+        with open(os.path.join(self.base_path, rel_path), "w") as f:
+            f.write(content)
+
+    def test_reports_changed_and_deleted_files(self):
+        self.write("src/a.txt", "changed")
+        self.write("b.txt", "b")
+        self.write("node_modules/c.txt", "c")
+        self.assertEqual({os.path.join("src", "a.txt"), "b.txt"}, self.wait_for(2))
+
+        os.remove(os.path.join(self.base_path, "b.txt"))
+        self.assertEqual({"b.txt"}, self.wait_for(1))
+
+    def test_reports_new_directories(self):
+        os.makedirs(os.path.join(self.base_path, "new", "sub"))
+        self.write("new/sub/d.txt", "d")
+        changes = self.wait_for(1)
+        self.assertTrue(changes & {"new", os.path.join("new", "sub", "d.txt")}, changes)
+
+        # New directories are watched too.
+        self.write("new/sub/e.txt", "e")
+        self.assertIn(os.path.join("new", "sub", "e.txt"), self.wait_for(1))
+
+    def test_bursts_are_batched(self):
+        self.write("src/a.txt", "first edit")
+        self.write("src/a.txt", "second edit")
+        self.write("b.txt", "b")
+        batch = next(iter_changes(self.watcher, debounce=0.3, max_delay=5))
+        self.assertEqual({os.path.join("src", "a.txt"), "b.txt"}, batch)
+
+    def wait_for(self, count):
+        changes = set()
+        for _ in range(20):
+            changes |= self.watcher.wait(0.5)
+            if len(changes) >= count:
+                break
+        return changes
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "inotify requires Linux")
+class TestInotifyWatcher(WatcherTestMixin, unittest.TestCase):
+    def create_watcher(self, is_ignored_dir):
+        return InotifyWatcher(self.base_path, is_ignored_dir)
+
+    def test_removed_directories_are_reported(self):
+        shutil.rmtree(os.path.join(self.base_path, "src"))
+        self.assertIn("src", self.wait_for(2))
+
+
+class TestPollingWatcher(WatcherTestMixin, unittest.TestCase):
+    def create_watcher(self, is_ignored_dir):
+        return PollingWatcher(self.base_path, is_ignored_dir, interval=0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()